@@ -73,7 +73,7 @@ def anzo_session() -> requests.Session:
 
 def query_azg(anzo_config: dict, query: str,
               format: str = "json", is_update: bool = False,
-              data_layers: List[str] = None):
+              data_layers: List[str] = None, stream: bool = False):
     params = {
         'skipCache': 'true',
         'format': format,
@@ -82,7 +82,7 @@ def query_azg(anzo_config: dict, query: str,
         'using-named-graph-uri' if is_update else 'named-graph-uri': data_layers
     }
     url = f"{anzo_config['url']}/sparql"
-    return send_anzo_query(anzo_config, url=url, params=params, query=query, is_update=is_update)
+    return send_anzo_query(anzo_config, url=url, params=params, query=query, is_update=is_update, stream=stream)
 
 
 def query_graphmart(anzo_config: dict,
@@ -116,18 +116,21 @@ def _anzo_auth_detail(content_string: str) -> str:
     return BeautifulSoup(content_string, 'html.parser').title.string
 
 
-def manage_anzo_response(response: Response) -> str:
+def manage_anzo_response(response: Response, stream: bool = False) -> str:
     return manage_http_response(
         response, "Anzo",
-        success_codes=(200,), auth_codes=(403,), auth_detail=_anzo_auth_detail)
+        success_codes=(200,), auth_codes=(403,), auth_detail=_anzo_auth_detail, stream=stream)
 
 
-def send_anzo_query(anzo_config, url, params, query, is_update=False):
+def send_anzo_query(anzo_config, url, params, query, is_update=False, stream=False):
+    """POST a query to Anzo. With stream=True a success returns the response
+    unread (see manage_http_response)."""
     headers = {"Content-Type": f"application/sparql-{'update' if is_update else 'query' }"}
     logger.debug(f"send_anzo_query {url=} {query=} {is_update=}")
     return manage_anzo_response(anzo_session().post(url=url, params=params, data=query.encode('utf-8'),
                                                     auth=(anzo_config['username'], anzo_config['password']),
-                                                    headers=headers, verify=False))
+                                                    headers=headers, verify=False, stream=stream),
+                                stream=stream)
 
 
 def json_to_dictlist(json_string: str):
@@ -0,0 +1,91 @@
+"""Run specs from an asyncio event loop.
+
+`run_specs_async` is `mustrd.parallel`'s `--jobs` engine for callers that are
+already async — a notebook, a service, a suite that wants to await its specs
+alongside other work — and for runs that want many more specs in flight than
+there are CPUs. It keeps the same rules about what may overlap:
+
+* specs against one store share its input graph, so they run one after another;
+* specs against a store with `isolateGraphs` each have graphs of their own, and
+  up to `concurrency` of them are in flight at once;
+* rdflib specs are CPU-bound and go to a process pool, as with `--jobs`, of up
+  to one worker per CPU on top of the `concurrency` threads. Its workers are not
+  forked (see mustrd.parallel), and it is started before any thread is.
+
+The HTTP backends are the same blocking `requests` code the rest of mustrd
+uses, run in a thread per in-flight spec. What makes a high `concurrency` pay
+is that those threads share the store's pooled keep-alive connections
+(mustrd.http_session) rather than each connecting afresh — so give the store a
+`triplestore:poolSize` at least as large, or the surplus requests open and
+close a connection of their own every time.
+
+    results = await run_specs_async(specs, concurrency=64)
+"""
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import List, Tuple
+
+from mustrd.http_session import DEFAULT_POOL_SIZE
+from mustrd.isolation import is_isolated
+from mustrd.mustrd import Specification, SpecResult
+from mustrd.parallel import from_worker_run, partition, process_pool, timed_run_spec, to_worker
+from mustrd.scheduler import FILE_ORDER, in_order_async
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 32
+
+
+async def run_specs_async_timed(specs: list, concurrency: int = DEFAULT_CONCURRENCY, order: str = FILE_ORDER) \
+        -> List[Tuple[SpecResult, float]]:
+    """(result, seconds) for every spec, in input order, with up to
+    `concurrency` remote specs in flight. `order` is the order each store's
+    specs run in (mustrd.scheduler)."""
+    return await in_order_async(specs, order, lambda ordered: _run_specs_async_timed(ordered, concurrency))
+
+
+async def _run_specs_async_timed(specs: list, concurrency: int) -> List[Tuple[SpecResult, float]]:
+    outcomes = [None] * len(specs)
+    local, remote = partition(specs)
+    _warn_if_pool_is_smaller(specs, concurrency)
+    loop = asyncio.get_running_loop()
+
+    in_processes = len(local) > 1
+    with (process_pool(min(os.cpu_count() or 1, len(local))) if in_processes else nullcontext()) as processes, \
+            ThreadPoolExecutor(max_workers=max(1, concurrency)) as threads:
+        async def run_group(positions: List[int]):
+            for position in positions:
+                outcomes[position] = await loop.run_in_executor(threads, timed_run_spec, specs[position])
+
+        async def run_local(position: int):
+            outcomes[position] = await loop.run_in_executor(
+                processes, from_worker_run, to_worker(specs[position]))
+
+        groups = [run_group(positions) for positions in remote.values()]
+        if in_processes:
+            await asyncio.gather(*groups, *(run_local(position) for position in local))
+        else:
+            await asyncio.gather(*groups, run_group(local))
+    return outcomes
+
+
+async def run_specs_async(specs: list, concurrency: int = DEFAULT_CONCURRENCY,
+                          order: str = FILE_ORDER) -> List[SpecResult]:
+    """Every spec's result, in input order, with up to `concurrency` in flight."""
+    return [result for result, _ in await run_specs_async_timed(specs, concurrency, order)]
+
+
+def _warn_if_pool_is_smaller(specs: list, concurrency: int):
+    warned = set()
+    for spec in specs:
+        if not isinstance(spec, Specification) or not is_isolated(spec.triple_store):
+            continue
+        store = str(spec.triple_store.get("uri"))
+        pool_size = spec.triple_store.get("pool_size") or DEFAULT_POOL_SIZE
+        if store not in warned and pool_size < concurrency:
+            warned.add(store)
+            log.warning(f"{store}: {concurrency} specs in flight over a pool of {pool_size} connections; "
+                        f"set triplestore:poolSize {concurrency} to keep every connection alive")
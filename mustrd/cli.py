@@ -24,6 +24,8 @@ from mustrd.reporting import (
     ReportOptions, wants_coverage, wants_cq, collect_cq_defs, produce_report,
 )
 from mustrd.runner import run_config, ontology_paths_from_config
+from mustrd.scheduler import FILE_ORDER, ORDERS
+from mustrd.diff_render import DiffLimits, set_diff_limits
 
 log = logging.getLogger(__name__)
 
@@ -123,10 +125,11 @@ def _emit(args, review):
     """Run the config's specs and emit the requested reports. Returns the process
     exit code (non-zero if any spec did not pass)."""
     opts = _report_options(args)
+    set_diff_limits(DiffLimits(args.diff_max_triples, args.diff_max_rows, args.diff_in_both, args.diff_spill))
 
     results, all_specs, spec_by_uri, test_results, run_results, spec_paths = run_config(
         args.config, secrets=args.secrets, ignore_focus=args.ignore_focus,
-        verbose=args.verbose, review=review,
+        verbose=args.verbose, review=review, jobs=args.jobs, order=args.order,
     )
 
     cq_defs = collect_cq_defs(spec_paths, spec_by_uri) if wants_cq(opts) else []
@@ -179,6 +182,27 @@ def build_parser():
         p.add_argument("--ignore-focus", dest="ignore_focus", action="store_true",
                        help="Ignore focus markers in specs.")
         p.add_argument("-v", "--verbose", action="store_true", help="Verbose logging.")
+        p.add_argument("-j", "--jobs", type=int, default=1, metavar="N",
+                       help="Run up to N specs at once (0: one per CPU). rdflib "
+                            "specs run in worker processes; specs against a "
+                            "remote store run one at a time per store.")
+        p.add_argument("--order", choices=ORDERS, default=FILE_ORDER,
+                       help="The order specs run in: 'file' (default) runs them "
+                            "as they were read; 'given' groups specs that share "
+                            "a given so it is uploaded once. Results are "
+                            "reported in file order either way.")
+        p.add_argument("--diff-max-triples", type=int, default=DiffLimits.max_triples, metavar="N",
+                       help="Print at most N triples of each part of a failed "
+                            "spec's graph diff, after a count by predicate.")
+        p.add_argument("--diff-max-rows", type=int, default=DiffLimits.max_rows, metavar="N",
+                       help="Print at most N rows of a failed spec's table diff, "
+                            "after a count by column.")
+        p.add_argument("--diff-in-both", action="store_true",
+                       help="Also print the triples a failed spec's expected and "
+                            "actual graphs share.")
+        p.add_argument("--diff-spill", default=None, metavar="DIR",
+                       help="Write every failed spec's full diff to DIR, as "
+                            "N-Triples or CSV.")
 
     p_run = sub.add_parser("run", help="Run the specs and review the results.")
     common(p_run)
@@ -5,17 +5,14 @@ the pytest plugin read the same configuration the same way. It was extracted fro
 mustrdTestPlugin.py, which re-exports `TestConfig`/`parse_config` for callers that
 still import them from there.
 """
-import os
 from dataclasses import dataclass
 from pathlib import Path
 
 from pyshacl import validate
 from rdflib import Graph, RDF
 
+from mustrd.model_graphs import MUSTRD_TEST_ONTOLOGY, MUSTRD_TEST_SHAPES, model_graph
 from mustrd.namespace import MUSTRDTEST
-from mustrd.utils import get_mustrd_root
-
-mustrd_root = get_mustrd_root()
 
 
 @dataclass(frozen=True)
@@ -44,12 +41,8 @@ def parse_config(config_path):
     """
     test_configs = []
     config_graph = Graph().parse(config_path)
-    shacl_graph = Graph().parse(
-        Path(os.path.join(mustrd_root, "model/mustrdTestShapes.ttl"))
-    )
-    ont_graph = Graph().parse(
-        Path(os.path.join(mustrd_root, "model/mustrdTestOntology.ttl"))
-    )
+    shacl_graph = model_graph(MUSTRD_TEST_SHAPES)
+    ont_graph = model_graph(MUSTRD_TEST_ONTOLOGY)
     conforms, results_graph, results_text = validate(
         data_graph=config_graph,
         shacl_graph=shacl_graph,
@@ -28,11 +28,11 @@ from typing import List, Optional
 from rdflib import Graph, URIRef, RDF, RDFS
 
 from mustrd.ontology import (
-    CLASS_TYPES, PROPERTY_TYPES,
-    wk_qname, is_domain_term, namespace, slug,
-    declared_terms, metadata_terms, query_uris, abox_terms, shortener,
-    expand_ontology_files,
+    wk_qname, namespace, slug,
+    declared_terms, metadata_terms, shortener,
+    ontology_set,
 )
+from mustrd.spec_terms import SpecTermIndex, given_key
 
 
 log = logging.getLogger(__name__)
@@ -43,14 +43,6 @@ def pct(n, d) -> int:
     return round(100.0 * n / d) if d else 0
 
 
-# rdf:type objects and predicates that make a triple a TBox (schema) axiom. When
-# these appear in a test's `given`, the fixture is defining ontology structure —
-# which belongs in the ontology, not the test data — so the report hints they be
-# moved. The type set is derived from ontology.PROPERTY_TYPES so it can't drift.
-TBOX_TYPES = CLASS_TYPES + tuple(PROPERTY_TYPES)
-TBOX_PREDICATES = (RDFS.subClassOf, RDFS.subPropertyOf, RDFS.domain, RDFS.range)
-
-
 def schema_references(tbox: Graph, used: set, declared: dict, short) -> dict:
     """Declared terms that structurally support a *used* term via TBox axioms.
 
@@ -143,28 +135,22 @@ def _build_tbox(given_graphs, ontology):
     return tbox
 
 
-def _scan_specs(specs, declared_set):
-    """Walk each spec's data + queries once. Returns the credited used sets, the
+def _scan_specs(specs, declared_set, index: SpecTermIndex):
+    """Sum up each spec's data + query terms. Returns the credited used sets, the
     domain-namespace terms referenced anywhere (split data/query), and per-spec
     reference tuples for the undeclared report. (Per-CQ usage lives in cq.py.)"""
     used_data, used_query = set(), set()
     referenced_data, referenced_query = set(), set()
     spec_refs = []
     for s in specs:
-        g = s.get("given")
-        raw_data = abox_terms(g) if isinstance(g, Graph) else set()
-        raw_query = set()
-        for q in (s.get("queries") or []):
-            if isinstance(q, str):
-                raw_query |= query_uris(q)
-        s_data = {t for t in raw_data if is_domain_term(URIRef(t))}
-        s_query = {t for t in raw_query if is_domain_term(URIRef(t))}
-        referenced_data |= s_data
-        referenced_query |= s_query
-        spec_refs.append((s.get("name", "?"), s.get("source_file"), s_data, s_query, s.get("uri")))
+        terms = index.terms(s)
+        referenced_data |= terms.domain_data
+        referenced_query |= terms.domain_query
+        spec_refs.append((s.get("name", "?"), s.get("source_file"),
+                          terms.domain_data, terms.domain_query, s.get("uri")))
         if s.get("passed"):
-            used_data |= raw_data & declared_set
-            used_query |= raw_query & declared_set
+            used_data |= terms.data & declared_set
+            used_query |= terms.query & declared_set
     return used_data, used_query, referenced_data, referenced_query, spec_refs
 
 
@@ -183,7 +169,7 @@ def reason_key(r):
     return (0 if r.startswith("domain") else 1 if r.startswith("range") else 2, r)
 
 
-def _usage_by_term(specs, declared_set):
+def _usage_by_term(specs, declared_set, index: SpecTermIndex):
     """Map each declared term to the *passing* tests that exercise it.
 
     Used to link a term to the tests behind it — the covering tests in the Test
@@ -194,14 +180,9 @@ def _usage_by_term(specs, declared_set):
     for s in specs:
         if not s.get("passed"):
             continue
-        g = s.get("given")
-        d = {t for t in (abox_terms(g) if isinstance(g, Graph) else set())
-             if is_domain_term(URIRef(t))} & declared_set
-        q = set()
-        for query in (s.get("queries") or []):
-            if isinstance(query, str):
-                q |= {t for t in query_uris(query) if is_domain_term(URIRef(t))}
-        q &= declared_set
+        terms = index.terms(s)
+        d = terms.domain_data & declared_set
+        q = terms.domain_query & declared_set
         for t in d | q:
             refs_by_term.setdefault(t, []).append({
                 "name": s.get("name", "?"), "uri": s.get("uri"),
@@ -210,22 +191,20 @@ def _usage_by_term(specs, declared_set):
     return refs_by_term
 
 
-def _tbox_axioms(g, short):
-    """The TBox (schema) axioms in one given graph, as readable strings —
-    class/property declarations and rdfs:subClassOf/domain/range on domain terms."""
+def _tbox_axioms(triples, short):
+    """TBox (schema) axioms — class/property declarations and
+    rdfs:subClassOf/domain/range on domain terms — as readable strings."""
     axioms = set()
-    for ty in TBOX_TYPES:
-        axioms.update(f"{short(str(s))} a {wk_qname(ty)}"
-                      for s in g.subjects(RDF.type, ty) if is_domain_term(s))
-    for pred in TBOX_PREDICATES:
-        for subj, obj in g.subject_objects(pred):
-            if is_domain_term(subj):
-                tail = short(str(obj)) if isinstance(obj, URIRef) else str(obj)
-                axioms.add(f"{short(str(subj))} {wk_qname(pred)} {tail}")
+    for subj, pred, obj in triples:
+        if pred == RDF.type:
+            axioms.add(f"{short(str(subj))} a {wk_qname(obj)}")
+        else:
+            tail = short(str(obj)) if isinstance(obj, URIRef) else str(obj)
+            axioms.add(f"{short(str(subj))} {wk_qname(pred)} {tail}")
     return sorted(axioms)
 
 
-def _tbox_in_data(specs, short):
+def _tbox_in_data(specs, short, index: SpecTermIndex):
     """Find TBox (schema) axioms sitting in tests' input data.
 
     A `given` should hold instance data; class/property declarations and
@@ -236,10 +215,7 @@ def _tbox_in_data(specs, short):
     """
     results = []
     for s in specs:
-        g = s.get("given")
-        if not isinstance(g, Graph):
-            continue
-        axioms = _tbox_axioms(g, short)
+        axioms = _tbox_axioms(index.terms(s).tbox, short)
         if axioms:
             results.append({
                 "name": s.get("name", "?"), "uri": s.get("uri"),
@@ -322,14 +298,10 @@ def _find_decl_line(iri, lines) -> Optional[int]:
 def term_source_index(paths) -> dict:
     """Map each declared term IRI -> {'file': Path, 'line': int|None}: the file
     that declares it and the (best-effort) line of its declaration. First file to
-    declare a term wins."""
+    declare a term wins. `paths` may be an OntologySet."""
     index = {}
-    for f in expand_ontology_files(paths):
-        try:
-            g = Graph()
-            g.parse(str(f))
-        except Exception as e:
-            log.warning(f"Could not parse ontology file {f}: {e}")
+    for f, g in ontology_set(paths).graphs():
+        if g is None:
             continue
         decl = declared_terms(g)
         if not decl:
@@ -385,7 +357,8 @@ def apply_term_links(coverage, mode, paths=None, link_base=None):
 
 
 def compute_coverage(specs: List[dict], ontology: Optional[Graph] = None,
-                     cq_defs: Optional[List[dict]] = None) -> Optional[dict]:
+                     cq_defs: Optional[List[dict]] = None,
+                     index: Optional[SpecTermIndex] = None) -> Optional[dict]:
     """Ontology term coverage across ALL mustrd tests.
 
     `specs` is a list of dicts: {name, uri, passed, given (Graph), queries [str]}
@@ -398,10 +371,14 @@ def compute_coverage(specs: List[dict], ontology: Optional[Graph] = None,
     When given, it adds a CQ overlay: per-term CQ coverage, a CQ coverage
     percentage, the per-CQ breakdown, and duplicate-question detection. CQ nodes
     sharing a question are excluded from that overlay (likely copy/paste).
+    `index` is the run's SpecTermIndex, if the caller has one to share.
 
     Returns a template context dict, or None if no ontology terms are declared.
     """
-    given_graphs = [s["given"] for s in specs if isinstance(s.get("given"), Graph)]
+    index = index or SpecTermIndex()
+    # Each distinct given once: every spec parses its own copy of a shared given
+    # file, so the copies are told apart by fingerprint, not by graph.
+    given_graphs = list({given_key(s): s["given"] for s in specs if isinstance(s.get("given"), Graph)}.values())
     declared, metadata = _derive_declared(given_graphs, ontology)
     if not declared:
         return None
@@ -417,14 +394,14 @@ def compute_coverage(specs: List[dict], ontology: Optional[Graph] = None,
     # (the test can pass without it) — it is a query-only gap. `referenced` is the
     # looser union (data ∪ query), used for structural support and the class tree.
     used_data, used_query, referenced_data, referenced_query, spec_refs = \
-        _scan_specs(specs, declared_set)
+        _scan_specs(specs, declared_set, index)
     referenced = used_data | used_query
 
     # CQ overlay (built in cq.py): which declared terms competency questions
     # exercise, the per-CQ breakdown, and the duplicate-question warning. Imported
     # locally so coverage.py stays free of a module-load dependency on cq.py.
     from mustrd.cq import compute_cq_overlay
-    overlay = compute_cq_overlay(cq_defs or [], declared_set, declared, tbox, short)
+    overlay = compute_cq_overlay(cq_defs or [], declared_set, declared, tbox, short, index)
     cq_used_data, cq_used_query = overlay["cq_used_data"], overlay["cq_used_query"]
     per_cq, duplicate_cqs = overlay["per_cq"], overlay["duplicate_cqs"]
 
@@ -434,7 +411,7 @@ def compute_coverage(specs: List[dict], ontology: Optional[Graph] = None,
 
     # Which passing tests back each term, for the Test Term Coverage links / the
     # per-test cov:Exercise records.
-    test_refs = _usage_by_term(specs, declared_set)
+    test_refs = _usage_by_term(specs, declared_set, index)
     undeclared = _build_undeclared(referenced_data, referenced_query, declared,
                                    declared_set, spec_refs, short)
 
@@ -460,7 +437,7 @@ def compute_coverage(specs: List[dict], ontology: Optional[Graph] = None,
         "cq_pct": pct(covered_by_cq, denominator),
         "cq_ratio": (covered_by_cq / denominator) if denominator else 0.0,
         "undeclared": undeclared, "duplicate_cqs": duplicate_cqs,
-        "tbox_in_data": _tbox_in_data(specs, short),
+        "tbox_in_data": _tbox_in_data(specs, short, index),
         "per_cq": per_cq, "term_records": term_records,
         # Per-spec domain-term usage (full IRIs, declared or not) for the RDF
         # output's cov:usesInData/usesInQuery — lets the CQ report be rebuilt.
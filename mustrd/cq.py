@@ -13,10 +13,10 @@ A **CQ definition** (built by the pytest plugin) is a dict:
 from dataclasses import dataclass, field
 from typing import List, Optional
 
-from rdflib import Graph, URIRef
+from rdflib import Graph
 
-from mustrd.ontology import abox_terms, query_uris, is_domain_term
 from mustrd.coverage import requires_ontology_terms
+from mustrd.spec_terms import SpecTermIndex
 
 
 @dataclass
@@ -36,18 +36,6 @@ def _status(u: SpecUsage) -> str:
     return "passed" if u.passed else "not passed"
 
 
-def _raw_terms(spec):
-    """The domain-namespace IRIs a spec references, split (data, query) — raw
-    (not yet intersected with the declared terms)."""
-    g = spec.get("given")
-    raw_data = abox_terms(g) if isinstance(g, Graph) else set()
-    raw_query = set()
-    for q in (spec.get("queries") or []):
-        if isinstance(q, str):
-            raw_query |= query_uris(q)
-    return raw_data, raw_query
-
-
 def _split_duplicate_cqs(cq_defs):
     """Partition CQ defs into (duplicate_cqs, kept).
 
@@ -112,17 +100,19 @@ def _per_cq_entries(cq_defs, usage_by_uri):
     return entries
 
 
-def compute_cq_overlay(cq_defs, declared_set, declared, tbox, short):
+def compute_cq_overlay(cq_defs, declared_set, declared, tbox, short, index: Optional[SpecTermIndex] = None):
     """The CQ overlay for term coverage: which declared terms competency questions
     exercise (deduped), the per-CQ breakdown, and the duplicate-question warning.
+    `index` is the SpecTermIndex coverage already filled for the same specs.
     """
+    index = index or SpecTermIndex()
     duplicate_cqs, kept = _split_duplicate_cqs(cq_defs or [])
     linked = _linked_specs(kept)
     usage_by_uri, cq_used_data, cq_used_query = {}, set(), set()
     for s in linked:
-        raw_data, raw_query = _raw_terms(s)
-        d_terms = raw_data & declared_set
-        q_terms = raw_query & declared_set
+        terms = index.terms(s)
+        d_terms = terms.data & declared_set
+        q_terms = terms.query & declared_set
         usage_by_uri[s.get("uri")] = SpecUsage(
             name=s.get("name", "?"), uri=s.get("uri"), passed=bool(s.get("passed")),
             data_terms=sorted(short(t) for t in d_terms),
@@ -138,7 +128,7 @@ def compute_cq_overlay(cq_defs, declared_set, declared, tbox, short):
     }
 
 
-def cq_facts(cq_defs: List[dict]) -> dict:
+def cq_facts(cq_defs: List[dict], index: Optional[SpecTermIndex] = None) -> dict:
     """The facts for a CQ-only RDF graph (for `--cq` with no ontology).
 
     Returns {per_cq, duplicate_cqs, spec_usage, prefixes}: the per-CQ breakdown
@@ -147,13 +137,14 @@ def cq_facts(cq_defs: List[dict]) -> dict:
     domain namespace prefixes to bind into the graph so the renderer can shorten
     term IRIs. The graph builder is `coverage_rdf.cq_graph`.
     """
+    index = index or SpecTermIndex()
     duplicate_cqs, kept = _split_duplicate_cqs(cq_defs or [])
     linked = _linked_specs(kept)
     usage_by_uri, spec_usage, prefixes = {}, {}, {}
     for s in linked:
-        raw_data, raw_query = _raw_terms(s)
-        d = sorted(t for t in raw_data if is_domain_term(URIRef(t)))
-        q = sorted(t for t in raw_query if is_domain_term(URIRef(t)))
+        terms = index.terms(s)
+        d = sorted(terms.domain_data)
+        q = sorted(terms.domain_query)
         uri = s.get("uri")
         spec_usage[uri] = {
             "name": s.get("name", "?"),
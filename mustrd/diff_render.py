@@ -0,0 +1,118 @@
+"""How much of a failed spec's diff to print.
+
+A failure used to print the whole diff. For a graph that meant all three parts
+of the comparison as Turtle, and "in both" is usually nearly all of the result.
+For a table it meant the full markdown of every differing row. When a spec over
+a 200k-triple result breaks, that is minutes of serializing and a log nobody can
+read. A diff is now printed as:
+
+* a summary: how many triples differ, by predicate, or how many rows, by column;
+* at most `max_triples` triples, or `max_rows` rows, of each part. The triples
+  are the first in sorted order, so two runs print the same ones.
+
+"In both" is left out unless `show_in_both` is set, since it is not a
+difference. With a `spill_dir`, every part of a failed spec's diff is written
+there in full, as N-Triples or CSV, and the printout names the files.
+
+The limits are process-wide. They are set once by whoever owns the run: the
+pytest plugin (`--diff-max-triples`, `--diff-max-rows`, `--diff-in-both`,
+`--diff-spill`) or the `mustrd` CLI, which takes the same flags. A failed
+graph spec only builds its "in both" part when it will be shown, so `--jobs`
+worker processes are started with the same limits (mustrd.parallel).
+"""
+import heapq
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+import pandas
+from rdflib import Graph
+
+from .upload import ntriples
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class DiffLimits:
+    max_triples: int = 50
+    max_rows: int = 50
+    show_in_both: bool = False
+    spill_dir: Path = None
+
+
+_limits = DiffLimits()
+
+
+def set_diff_limits(limits: DiffLimits):
+    global _limits
+    _limits = limits
+
+
+def diff_limits() -> DiffLimits:
+    return _limits
+
+
+def _spill_path(spec_uri, triple_store, part: str, suffix: str) -> Path:
+    name = re.sub(r"[^\w.-]+", "_", f"{spec_uri}.{str(triple_store).split('/')[-1]}.{part}").strip("_")
+    spill_dir = Path(_limits.spill_dir)
+    spill_dir.mkdir(parents=True, exist_ok=True)
+    return spill_dir / f"{name}.{suffix}"
+
+
+def _by_count(counts: Counter, shorten) -> str:
+    return ", ".join(f"{shorten(key)} ({count})" for key, count in counts.most_common())
+
+
+def graph_diff_lines(spec_uri, triple_store, part: str, graph: Graph) -> List[str]:
+    """`graph`, one part of a graph comparison, as lines to print."""
+    if len(graph) == 0:
+        return ["(none)"]
+    predicates = Counter(predicate for _, predicate, _ in graph)
+    lines = [f"{len(graph)} triples, by predicate: {_by_count(predicates, graph.namespace_manager.normalizeUri)}"]
+    if _limits.spill_dir:
+        path = _spill_path(spec_uri, triple_store, part, "nt")
+        path.write_text(ntriples(graph), encoding="utf-8")
+        lines.append(f"all {len(graph)} written to {path}")
+    shown = graph if len(graph) <= _limits.max_triples \
+        else heapq.nsmallest(_limits.max_triples, graph, key=lambda triple: tuple(map(str, triple)))
+    sample = Graph(namespace_manager=graph.namespace_manager)
+    for triple in shown:
+        sample.add(triple)
+    lines.append(sample.serialize(format="ttl"))
+    if len(sample) < len(graph):
+        lines.append(f"... and {len(graph) - len(sample)} more")
+    return lines
+
+
+def _differing_rows(df_diff: pandas.DataFrame) -> Counter:
+    counts = Counter()
+    if isinstance(df_diff.columns, pandas.MultiIndex):
+        for column in dict.fromkeys(df_diff.columns.get_level_values(0)):
+            counts[column] = int(df_diff[column].notna().any(axis=1).sum())
+    else:
+        for column in df_diff.columns:
+            counts[column] = int(df_diff[column].notna().sum())
+    return Counter({column: count for column, count in counts.items() if count})
+
+
+def table_diff_summary(df_diff: pandas.DataFrame) -> str:
+    return f"{len(df_diff)} rows differ, by column: {_by_count(_differing_rows(df_diff), str)}"
+
+
+def table_diff_lines(spec_uri, triple_store, df_diff: pandas.DataFrame) -> List[str]:
+    """A table comparison as lines to print."""
+    if df_diff is None or df_diff.empty:
+        return []
+    lines = [table_diff_summary(df_diff)]
+    if _limits.spill_dir:
+        path = _spill_path(spec_uri, triple_store, "table_diff", "csv")
+        df_diff.to_csv(path)
+        lines.append(f"all {len(df_diff)} written to {path}")
+    lines.append(df_diff.head(_limits.max_rows).to_markdown())
+    if len(df_diff) > _limits.max_rows:
+        lines.append(f"... and {len(df_diff) - _limits.max_rows} more")
+    return lines
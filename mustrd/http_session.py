@@ -0,0 +1,81 @@
+"""One pooled HTTP session per remote triple store.
+
+The GraphDB and Stardog backends used to call `requests.post`/`requests.put`
+directly, and each of those builds a throwaway session: a new TCP connection,
+and a new TLS handshake, for every upload, query and read-back of every spec.
+Against a remote store that handshake was often the larger part of a spec's
+time.
+
+`store_session(triple_store)` returns the `requests.Session` kept for that
+store, so every spec run against it reuses the same keep-alive connections.
+The pool and retry policy are part of the store's config:
+
+    triplestore:poolSize 20 ;        # connections kept open (default 10)
+    triplestore:maxRetries 3 ;       # default 0: fail as before
+    triplestore:retryBackoff 0.5 .   # seconds, doubled on each retry
+
+Retries never repeat a request the server may already have acted on. A failed
+connect is retried for any request, since nothing was sent; a 502/503/504 or a
+dropped response only for GET/PUT/DELETE, which are idempotent. SPARQL queries
+and updates are both POSTs, and an update must not be applied twice.
+"""
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+log = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 10
+RETRY_STATUSES = (502, 503, 504)
+RETRY_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def _session_key(triple_store: dict) -> tuple:
+    # Keyed on the store's endpoint rather than the dict: mustrd.isolation hands
+    # each spec its own copy of the dict, and they should all share one pool.
+    return tuple(str(triple_store.get(key)) for key in ("uri", "url", "port"))
+
+
+def store_session(triple_store: dict) -> requests.Session:
+    """The session requests to `triple_store` go through, created on first use."""
+    key = _session_key(triple_store)
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = new_session(
+                pool_size=triple_store.get("pool_size"),
+                max_retries=triple_store.get("max_retries"),
+                retry_backoff=triple_store.get("retry_backoff"))
+        return session
+
+
+def new_session(pool_size: int = None, max_retries: int = None, retry_backoff: float = None) -> requests.Session:
+    pool_size = int(pool_size or DEFAULT_POOL_SIZE)
+    max_retries = int(max_retries or 0)
+    retry = Retry(total=max_retries, connect=max_retries, read=max_retries, status=max_retries,
+                  backoff_factor=float(retry_backoff or 0), status_forcelist=RETRY_STATUSES,
+                  allowed_methods=RETRY_METHODS,
+                  # Out of retries, hand back the last response as it was, so the
+                  # backend's own status handling reports it.
+                  raise_on_status=False)
+    log.debug(f"New HTTP session: pool {pool_size}, {max_retries} retries")
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def close_sessions():
+    """Close every pooled connection. The next request opens a new session."""
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
@@ -0,0 +1,71 @@
+"""Per-spec named graphs, so specs can share a remote store concurrently.
+
+Every remote backend loads a spec's given into the store's configured
+`input_graph` (and Anzo writes into its `output_graph`), then clears it for the
+next spec. Two specs in flight against one store would load into, query, and
+wipe the same graph. With `triplestore:isolateGraphs true` on a store's config,
+each spec instead runs against its own pair of graphs, minted from the
+configured IRIs, and drops them when it finishes:
+
+    <https://example.org/input>  ->  <https://example.org/input/mustrd-3f2a…>
+
+The backends need no change: they read the graphs from the `triple_store`
+dict, and the spec simply gets a copy of that dict with the graphs swapped.
+
+Graphs the spec only reads (Stardog's materialised and virtual graphs) are left
+shared. Writes the *query itself* directs elsewhere — a `GRAPH <…>` clause
+naming a fixed graph, or an unqualified INSERT on Stardog, which lands in the
+server's default graph — are outside what isolation can redirect; such specs
+should stay on a store without it.
+"""
+import logging
+import uuid
+from contextlib import contextmanager
+
+from .steprunner import drop_graph
+
+log = logging.getLogger(__name__)
+
+# The keys of a triple_store dict that name graphs a spec writes to.
+ISOLATED_KEYS = ("input_graph", "output_graph")
+
+
+def is_isolated(triple_store: dict) -> bool:
+    return bool(triple_store.get("isolate_graphs"))
+
+
+def mint_graph(graph, token: str, key: str) -> str:
+    """A graph IRI unique to one spec run, derived from the configured one.
+    A store configured without the graph (GraphDB's default insert graph)
+    gets a URN instead — isolation needs a named graph to put the given in."""
+    if graph:
+        return f"{str(graph).rstrip('/')}/mustrd-{token}"
+    return f"urn:mustrd:isolated:{token}:{key}"
+
+
+def isolate(triple_store: dict) -> dict:
+    """A copy of `triple_store` with a freshly minted graph in place of each
+    configured input/output graph."""
+    token = uuid.uuid4().hex
+    isolated = dict(triple_store)
+    for key in ISOLATED_KEYS:
+        if key == "input_graph" or triple_store.get(key):
+            isolated[key] = mint_graph(triple_store.get(key), token, key)
+    return isolated
+
+
+@contextmanager
+def isolated_graphs(triple_store: dict):
+    """`isolate(triple_store)` for the duration of a spec, dropping the minted
+    graphs afterwards however the spec ends. A failed drop is logged, not
+    raised: the spec's own result is what the run reports."""
+    isolated = isolate(triple_store)
+    try:
+        yield isolated
+    finally:
+        for key in ISOLATED_KEYS:
+            if isolated.get(key) and isolated[key] != triple_store.get(key):
+                try:
+                    drop_graph(isolated, isolated[key])
+                except Exception as e:
+                    log.warning(f"Could not drop isolated graph {isolated[key]}: {e}")
@@ -0,0 +1,64 @@
+"""Debug messages that cost nothing unless someone is reading them.
+
+An f-string is formatted before `log.debug` gets to decide the record is not
+wanted, and the values mustrd most wants to log are the expensive ones: a
+spec's given serialized to Turtle, a result graph, a result table rendered by
+pandas. Run with DEBUG off — every ordinary run — and a spec still paid for all
+of it, once per upload and once per `when`.
+
+Two ways to avoid that, and mustrd uses both:
+
+* a guard, `if debugging(log): log.debug(f"...")`, around a message built from
+  several values, or built in more than one statement;
+* a deferred value, `log.debug("given: %s", turtle(graph))`, for a single
+  expensive argument. `logging` only calls `str()` on its arguments when a
+  handler emits the record.
+
+`brief(value)` stands in for a graph or table where the message only needs to
+say what came back — its size, not every triple.
+"""
+import logging
+from typing import Any, Callable
+
+from rdflib import Graph
+
+
+class Lazy:
+    """Formats as `function(*args, **kwargs)`, worked out when it is formatted."""
+
+    __slots__ = ("function", "args", "kwargs")
+
+    def __init__(self, function: Callable, *args, **kwargs):
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self) -> str:
+        return str(self.function(*self.args, **self.kwargs))
+
+    __repr__ = __str__
+
+
+def debugging(logger: logging.Logger) -> bool:
+    return logger.isEnabledFor(logging.DEBUG)
+
+
+def turtle(graph: Graph) -> Lazy:
+    """`graph` as Turtle, if the message is emitted."""
+    return Lazy(graph.serialize, format="turtle")
+
+
+def _brief(value: Any) -> str:
+    if isinstance(value, Graph):
+        return f"<{type(value).__name__} of {len(value)} triples>"
+    shape = getattr(value, "shape", None)
+    if isinstance(shape, tuple) and len(shape) == 2:
+        return f"<{type(value).__name__} of {shape[0]} rows x {shape[1]} columns>"
+    if isinstance(value, (str, bytes)) and len(value) > 200:
+        return f"{value[:200]!r}... ({len(value)} characters)"
+    return repr(value)
+
+
+def brief(value: Any) -> Lazy:
+    """What `value` is and how big, if the message is emitted."""
+    return Lazy(_brief, value)
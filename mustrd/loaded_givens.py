@@ -0,0 +1,65 @@
+"""Which given each remote store's input graph holds, so it is not sent twice.
+
+Specs very often share a given file — a baseline every spec in a folder runs
+against — and each of them used to serialize and upload it again. A given read
+from a file now carries a fingerprint (a hash of its source; see
+`spec_component.load_dataset_from_file`), and this module remembers, per store
+and input graph, the fingerprint of what was last loaded there. A spec whose
+given is already loaded skips the upload.
+
+It stays true only while nothing writes to the graph. SELECT and CONSTRUCT do
+not, so they keep it; any other `when` — an update, or anything that might be
+one — forgets it before it runs, and the next spec uploads its given as usual.
+So does an upload that fails partway. A store with `triplestore:reuseGivens
+false` is never skipped, for a store something outside mustrd may be writing to.
+
+Nothing is remembered across processes: the first spec in a run always uploads.
+rdflib stores have nothing to upload, and an isolated store loads each spec into
+fresh graphs, so neither is tracked.
+"""
+import logging
+import threading
+
+from .isolation import is_isolated
+from .namespace import MUST, TRIPLESTORE
+
+log = logging.getLogger(__name__)
+
+READ_ONLY = (MUST.SelectSparql, MUST.ConstructSparql)
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def _tracked(triple_store: dict) -> bool:
+    return triple_store["type"] != TRIPLESTORE.RdfLib and not is_isolated(triple_store) \
+        and triple_store.get("reuse_givens") is not False
+
+
+def _key(triple_store: dict) -> tuple:
+    return tuple(str(triple_store.get(key)) for key in ("uri", "url", "input_graph"))
+
+
+def is_loaded(triple_store: dict, fingerprint: str) -> bool:
+    """Whether `triple_store`'s input graph already holds the given `fingerprint` names."""
+    if fingerprint is None or not _tracked(triple_store):
+        return False
+    with _lock:
+        return _loaded.get(_key(triple_store)) == fingerprint
+
+
+def loaded(triple_store: dict, fingerprint: str):
+    """Record that the given `fingerprint` names has just been uploaded."""
+    if _tracked(triple_store):
+        with _lock:
+            _loaded[_key(triple_store)] = fingerprint
+
+
+def forget(triple_store: dict):
+    """The input graph is about to change, or may have: assume nothing about it."""
+    with _lock:
+        _loaded.pop(_key(triple_store), None)
+
+
+def is_read_only(whens) -> bool:
+    return all(when.queryType in READ_ONLY for when in whens)
@@ -0,0 +1,35 @@
+"""mustrd's own model graphs — the shapes and ontologies under `model/` — parsed
+once per process.
+
+They never change at run time, yet every `generate_specs` (once per MustrdTest
+in a config), every `parse_config` (called from several plugin hooks) and every
+`get_triple_stores` used to parse its pair again. Callers now share one parsed
+copy of each, loaded the first time it is asked for.
+
+The graphs are shared, so callers must treat them as read-only. (pyshacl's
+advanced mode adds two RDFS axioms to a shapes graph the first time it
+validates with it; those are the same every time, so sharing is still safe.)
+"""
+import threading
+
+from rdflib import Graph
+
+from mustrd.utils import get_mustrd_root
+
+MUSTRD_SHAPES = "mustrdShapes.ttl"
+MUSTRD_ONTOLOGY = "ontology.ttl"
+MUSTRD_TEST_SHAPES = "mustrdTestShapes.ttl"
+MUSTRD_TEST_ONTOLOGY = "mustrdTestOntology.ttl"
+TRIPLESTORE_SHAPES = "triplestoreshapes.ttl"
+TRIPLESTORE_ONTOLOGY = "triplestoreOntology.ttl"
+
+_graphs: dict = {}
+_lock = threading.Lock()
+
+
+def model_graph(name: str) -> Graph:
+    """The parsed `model/<name>`, shared by every caller in the process."""
+    with _lock:
+        if name not in _graphs:
+            _graphs[name] = Graph().parse(get_mustrd_root() / "model" / name)
+        return _graphs[name]
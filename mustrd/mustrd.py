@@ -1,35 +1,43 @@
 import os
 import re
+import weakref
 from typing import Tuple, List, Union
 
 from rdflib.plugins.parsers.notation3 import BadSyntax
 
 from . import logger_setup
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
 from pyparsing import ParseException
 from pathlib import Path
 from requests import ConnectionError, ConnectTimeout, HTTPError, RequestException
 
-from rdflib import Graph, URIRef, RDF, XSD, SH, Literal
+from rdflib import BNode, Graph, URIRef, RDF, XSD, SH, Literal
 
-from rdflib.compare import isomorphic, graph_diff
+from rdflib.compare import to_canonical_graph, to_isomorphic
 import pandas
 
 from .namespace import MUST, TRIPLESTORE
 import requests
-import json
 from pandas import DataFrame
 
-from .spec_component import TableThenSpec, parse_spec_component, WhenSpec, ThenSpec
-from .utils import is_json, get_mustrd_root
+from .spec_component import TableThenSpec, parse_spec_component, resolve_whens, WhenSpec, ThenSpec
+from .sparql_results import StreamedSelectResult, close_select_result, select_bindings
+from .spec_cache import open_spec_cache
+from .model_graphs import TRIPLESTORE_ONTOLOGY, TRIPLESTORE_SHAPES, model_graph
 from colorama import Fore, Style
 from tabulate import tabulate
-from collections import defaultdict
+from collections import Counter, defaultdict
 from pyshacl import validate
 import logging
 from http.client import HTTPConnection
 from .steprunner import upload_given, run_when_impl
+from .isolation import is_isolated, isolated_graphs
+from .loaded_givens import forget, is_loaded, is_read_only, loaded
+from .read_back import scope_read_back
+from .scheduler import FILE_ORDER, in_order
+from .lazy_log import brief, debugging, turtle
+from .diff_render import diff_limits, graph_diff_lines, table_diff_lines, table_diff_summary
 from multimethods import MultiMethod, Default
 import traceback
 
@@ -91,6 +99,9 @@ class Specification:
     then: ThenSpec
     spec_file_name: str = "default.mustrd.ttl"
     spec_source_file: Path = Path("default.mustrd.ttl")
+    # What the given was read from, hashed — None if it cannot be named that way
+    # (see mustrd.loaded_givens).
+    given_fingerprint: str = None
 
 
 @dataclass
@@ -201,53 +212,61 @@ def validate_specs(
 
     log.info(f"Using {ttl_files} for test source")
     ttl_files.sort()
+    cache = open_spec_cache(shacl_graph, ont_graph)
 
-    # For each spec file found in spec_path
+    # Each file's triples: an unchanged file's come from the on-disk cache, with
+    # its verdict, skipping both the parse and the SHACL validation (see
+    # spec_cache); the rest are parsed.
+    file_graphs, verdicts, parse_errors, contents = {}, {}, {}, {}
     for file in ttl_files:
-        # file = file.resolve()
-        error_messages = []
-
+        contents[file] = file.read_bytes() if cache else None
+        cached = cache.get(file, contents[file]) if cache else None
+        if cached:
+            log.debug(f"Spec cache hit: {file}")
+            file_graphs[file] = cached.graph
+            verdicts[file] = cached.conforms, cached.messages
+            continue
         log.info(f"Parse: {file}")
         # Parse spec file and add error message if not conform to RDF standard
         try:
-            file_graph = Graph().parse(file)
+            file_graphs[file] = Graph().parse(file)
         except BadSyntax as e:
             template = "An exception of type {0} occurred when trying to parse a spec file. Arguments:\n{1!r}"
-            message = template.format(type(e).__name__, e.args)
-            log.error(message, exc_info=True)
+            parse_errors[file] = template.format(type(e).__name__, e.args)
+            log.error(parse_errors[file], exc_info=True)
+
+    # Everything the cache could not answer, validated in as few passes as possible.
+    validated = validate_spec_files(
+        {file: graph for file, graph in file_graphs.items() if file not in verdicts},
+        shacl_graph, ont_graph)
+    if cache:
+        for file, (conforms, messages) in validated.items():
+            cache.put(file, contents[file], file_graphs[file], conforms, messages)
+    verdicts.update(validated)
+
+    # For each spec file found in spec_path
+    for file in ttl_files:
+        # file = file.resolve()
+        error_messages = []
+
+        if file in parse_errors:
             error_messages += [
                 f"Could not extract spec from {file} due to exception of type "
-                f"{type(e).__name__} when parsing file"
+                f"BadSyntax when parsing file"
             ]
             invalid_specs += [
                 SpecInvalid(
-                    "urn:invalid_spec_file", triple_store["type"], message, file.name, file
+                    "urn:invalid_spec_file", triple_store["type"], parse_errors[file], file.name, file
                 )
                 for triple_store in triple_stores
             ]
             continue
 
-        # run shacl validation
-        conforms, results_graph, results_text = validate(
-            file_graph,
-            shacl_graph=shacl_graph,
-            ont_graph=ont_graph,
-            inference="none",
-            abort_on_first=False,
-            allow_infos=False,
-            allow_warnings=False,
-            meta_shacl=False,
-            advanced=True,
-            js=False,
-            debug=False,
-        )
-        if str(file.name).endswith("_duplicate"):
-            log.debug(f"Validation of {file.name} against SHACL shapes: {conforms}")
-            log.debug(f"{results_graph.serialize(format='turtle')}")
-        # log.debug(f"SHACL validation results: {results_text}")
+        file_graph = file_graphs[file]
+        conforms, messages = verdicts[file]
         # Add error message if not conform to spec shapes
         if not conforms:
-            for msg in results_graph.objects(predicate=SH.resultMessage):
+            for msg in messages:
                 log.warning(f"{file_graph}")
                 log.warning(f"{msg} File: {file.name}")
                 error_messages += [f"{msg} File: {file.name}"]
@@ -281,6 +300,91 @@ def validate_specs(
         return valid_spec_uris, spec_graph, invalid_specs
 
 
+def shacl_validate(data_graph: Graph, shacl_graph: Graph, ont_graph: Graph) -> Tuple[bool, Graph]:
+    conforms, results_graph, results_text = validate(
+        data_graph,
+        shacl_graph=shacl_graph,
+        ont_graph=ont_graph,
+        inference="none",
+        abort_on_first=False,
+        allow_infos=False,
+        allow_warnings=False,
+        meta_shacl=False,
+        advanced=True,
+        js=False,
+        debug=False,
+    )
+    return conforms, results_graph
+
+
+def validate_spec_files(file_graphs: dict, shacl_graph: Graph, ont_graph: Graph) -> dict:
+    """{file: (conforms, [sh:resultMessage, ...])} for each spec file's graph.
+
+    pyshacl compiles the shapes and mixes in the ontology on every call, which
+    dominated validation when it was called once per file. The files are instead
+    validated as one union in a single pass, and each result is handed back to
+    the file that owns its focus node — every node of a file is its own, blank
+    nodes being minted per parse and IRIs belonging to the file declaring them.
+
+    A file that describes an IRI another file also describes (the same spec
+    declared twice), or points at one another file declares (a competency
+    question's cq:cqSpec), would be judged on the other's triples in a union, so
+    those are still validated one by one — as is everything, if a result cannot
+    be placed.
+    """
+    batch, alone = _separate_entangled_files(file_graphs)
+    verdicts = _validate_union(batch, shacl_graph, ont_graph) if len(batch) > 1 else None
+    if verdicts is None:
+        verdicts, alone = {}, alone + list(batch)
+    for file in alone:
+        conforms, results_graph = shacl_validate(file_graphs[file], shacl_graph, ont_graph)
+        verdicts[file] = conforms, [str(msg) for msg in results_graph.objects(predicate=SH.resultMessage)]
+    return verdicts
+
+
+def _separate_entangled_files(file_graphs: dict) -> Tuple[dict, list]:
+    """(files safe to validate together, files that share an IRI with another)."""
+    declared_in = defaultdict(set)
+    for file, graph in file_graphs.items():
+        for subject in graph.subjects(unique=True):
+            if isinstance(subject, URIRef):
+                declared_in[subject].add(file)
+    entangled = set()
+    for file, graph in file_graphs.items():
+        # Both files, when two describe the same node. Only the referring file
+        # when it points at another's node: the shapes walk forward from a focus
+        # node, so the file pointed at is judged on its own triples either way.
+        for subject in graph.subjects(unique=True):
+            if declared_in.get(subject, {file}) - {file}:
+                entangled |= declared_in[subject]
+        if any(declared_in.get(node, {file}) - {file} for node in graph.objects(unique=True)):
+            entangled.add(file)
+    return ({file: graph for file, graph in file_graphs.items() if file not in entangled},
+            [file for file in file_graphs if file in entangled])
+
+
+def _validate_union(file_graphs: dict, shacl_graph: Graph, ont_graph: Graph):
+    owner = {}
+    union = Graph()
+    for file, graph in file_graphs.items():
+        for subject in graph.subjects(unique=True):
+            owner[subject] = file
+        union += graph
+    log.info(f"Validating {len(file_graphs)} spec files in one SHACL pass")
+    conforms, results_graph = shacl_validate(union, shacl_graph, ont_graph)
+    verdicts = {file: (True, []) for file in file_graphs}
+    if conforms:
+        return verdicts
+    for result in results_graph.subjects(SH.resultSeverity, None):
+        file = owner.get(results_graph.value(result, SH.focusNode))
+        if file is None:
+            log.debug(f"Could not place SHACL result {result}: validating file by file")
+            return None
+        messages = verdicts[file][1] + [str(msg) for msg in results_graph.objects(result, SH.resultMessage)]
+        verdicts[file] = False, messages
+    return verdicts
+
+
 def get_invalid_focus_spec(focus_uris: set, invalid_specs: list):
     invalid_focus_specs = []
     for spec in invalid_specs:
@@ -412,12 +516,15 @@ def get_specs(
     return specs, invalid_spec
 
 
-def run_specs(specs) -> List[SpecResult]:
-    results = []
+def run_specs(specs, jobs: int = 1, order: str = FILE_ORDER) -> List[SpecResult]:
     # https://github.com/Semantic-partners/mustrd/issues/115
-    for specification in specs:
-        results.append(run_spec(specification))
-    return results
+    # Results are in the order of `specs`; `order` is only the order they run in
+    # (see mustrd.scheduler).
+    if jobs == 1:
+        return in_order(specs, order, lambda scheduled: [run_spec(specification) for specification in scheduled])
+    # Imported here: mustrd.parallel builds on run_spec from this module.
+    from .parallel import run_specs as run_specs_in_parallel
+    return run_specs_in_parallel(specs, jobs, order)
 
 
 def get_spec_file(spec_uri: URIRef, spec_graph: Graph):
@@ -468,6 +575,7 @@ def get_spec(
             components[2],
             spec_file_name,
             spec_file_path,
+            getattr(components[0], "fingerprint", None),
         )
 
     except (ValueError, FileNotFoundError) as e:
@@ -485,15 +593,12 @@ def get_spec(
 
 def check_result(spec: Specification, result: Union[str, Graph]):
 
-    log.debug(
-        f"check_result {spec.spec_uri=}, {spec.triple_store=}, {result=} {type(spec.then)}"
-    )
+    log.debug("check_result %s, %s, result=%s %s", spec.spec_uri, spec.triple_store, brief(result), type(spec.then))
     if isinstance(spec.then, TableThenSpec):
         log.debug("table_comparison")
         return table_comparison(result, spec)
     else:
-        graph_compare = graph_comparison(spec.then.value, result)
-        if isomorphic(result, spec.then.value):
+        if graphs_match(spec.then.value, result, spec.then.fingerprint):
             log.debug(f"isomorphic {spec}")
             log.debug(f"{spec.spec_uri}")
             log.debug(f"{spec.triple_store}")
@@ -502,6 +607,8 @@ def check_result(spec: Specification, result: Union[str, Graph]):
             return ret
         else:
             log.debug("not isomorphic")
+            # Only a failure needs the diff, so only a failure pays for it.
+            graph_compare = graph_comparison(spec.then.value, result)
             if spec.when[0].queryType == MUST.ConstructSparql:
                 log.debug("ConstructSpecFailure")
                 return ConstructSpecFailure(
@@ -515,6 +622,37 @@ def check_result(spec: Specification, result: Union[str, Graph]):
 
 
 def run_spec(spec: Specification) -> SpecResult:
+    # A store configured with isolateGraphs gives each spec its own input/output
+    # graphs, dropped once it has run — see mustrd.isolation.
+    if isinstance(spec, Specification):
+        spec = resolve_deferred_whens(spec)
+    if isinstance(spec, Specification):
+        # An update spec may read back no more of the store than its then needs
+        # (mustrd.read_back).
+        spec = scope_read_back(spec)
+    if isinstance(spec, Specification) and is_isolated(spec.triple_store):
+        with isolated_graphs(spec.triple_store) as triple_store:
+            return _run_spec(replace(spec, triple_store=triple_store))
+    return _run_spec(spec)
+
+
+def resolve_deferred_whens(spec: Specification) -> Union[Specification, SpecResult]:
+    """`spec` with its `when`s fetched from Anzo, if any are kept there — or
+    why they could not be. Collection leaves them unresolved, so that only the
+    specs that run pay for the lookup."""
+    try:
+        return replace(spec, when=resolve_whens(spec.when))
+    except (ValueError, FileNotFoundError) as e:
+        log.error(f"{spec.spec_uri}: {e}")
+        return SpecInvalid(spec.spec_uri, spec.triple_store["type"], str(e),
+                           spec.spec_file_name, spec.spec_source_file)
+    except (ConnectionError, TimeoutError, HTTPError, ConnectTimeout) as e:
+        message = f"An exception of type {type(e).__name__} occurred. Arguments:\n{e.args!r}"
+        log.error(message, exc_info=True)
+        return TripleStoreConnectionError(spec.spec_uri, spec.triple_store["type"], message)
+
+
+def _run_spec(spec: Specification) -> SpecResult:
     spec_uri = spec.spec_uri
     triple_store = spec.triple_store
 
@@ -523,18 +661,23 @@ def run_spec(spec: Specification) -> SpecResult:
         return spec
         # return SpecSkipped(getattr(spec, 'spec_uri', None), getattr(spec, 'triple_store', {}), "Spec is not a valid Specification instance")
 
-    log.debug(f"run_spec {spec=}")
-    log.debug(
-        f"run_when {spec_uri=}, {triple_store=}, {spec.given=}, {spec.when=}, {spec.then=}"
-    )
+    if debugging(log):
+        log.debug(f"run_spec {spec=}")
+        log.debug(
+            f"run_when {spec_uri=}, {triple_store=}, {spec.given=}, {spec.when=}, {spec.then=}"
+        )
     # `is not None`, not truthiness: an empty graph is falsy, so a given that
     # parsed to nothing used to be reported as an inherited-state spec — a
     # feature the spec never mentioned. Inherited state is the absence of a
     # given, which is `None`.
     if spec.given is not None:
-        given_as_turtle = spec.given.serialize(format="turtle")
-        log.debug(f"{given_as_turtle}")
-        upload_given(triple_store, spec.given)
+        if is_loaded(triple_store, spec.given_fingerprint):
+            log.debug(f"{spec_uri}: given already loaded in {triple_store.get('uri')}, not uploading it again")
+        else:
+            log.debug("%s", turtle(spec.given))
+            forget(triple_store)
+            upload_given(triple_store, spec.given)
+            loaded(triple_store, spec.given_fingerprint)
     else:
         if triple_store["type"] == TRIPLESTORE.RdfLib:
             return SpecInvalid(
@@ -542,16 +685,22 @@ def run_spec(spec: Specification) -> SpecResult:
                 triple_store["type"],
                 "Unable to run Inherited State tests on Rdflib",
             )
+    if not is_read_only(spec.when):
+        # This spec may write to the input graph: the next one uploads its given.
+        forget(triple_store)
+    result = None
     try:
         for when in spec.when:
             log.debug(
                 f"Running {when.queryType} spec {spec_uri} on {triple_store['type']}"
             )
+            # Only the last when's result is checked: an earlier streamed SELECT
+            # would otherwise keep its pooled connection checked out.
+            close_select_result(result)
             try:
                 result = run_when_impl(spec_uri, triple_store, when)
-                log.debug(
-                    f"run {when.queryType} spec {spec_uri} on {triple_store['type']} {result=}"
-                )
+                log.debug("run %s spec %s on %s result=%s", when.queryType, spec_uri, triple_store["type"],
+                          brief(result))
             except ParseException as e:
                 log.error(f"parseException {e}")
                 return SparqlParseFailure(spec_uri, triple_store["type"], e)
@@ -571,6 +720,10 @@ def run_spec(spec: Specification) -> SpecResult:
     except Exception as e:
         log.error(f"Unexpected error {e}", exc_info=True)
         return RuntimeError(spec_uri, triple_store["type"], f"{type(e).__name__}: {e}")
+    finally:
+        # table_comparison reads a streamed SELECT to the end and closes it; a
+        # graph then, or an error on the way, would leave it open.
+        close_select_result(result)
     # https://github.com/Semantic-partners/mustrd/issues/78
     # finally:
     #     if type(mustrd_triple_store) == MustrdAnzo and close_connection:
@@ -610,12 +763,8 @@ def get_credentials(triple_store_graph_path: Path, secrets: str = None) -> dict:
 # Parse and validate triple store configuration
 def get_triple_stores(triple_store_graph: Graph, credentials: dict = None) -> list[dict]:
     triple_stores = []
-    shacl_graph = Graph().parse(
-        Path(os.path.join(get_mustrd_root(), "model/triplestoreshapes.ttl"))
-    )
-    ont_graph = Graph().parse(
-        Path(os.path.join(get_mustrd_root(), "model/triplestoreOntology.ttl"))
-    )
+    shacl_graph = model_graph(TRIPLESTORE_SHAPES)
+    ont_graph = model_graph(TRIPLESTORE_ONTOLOGY)
     # SHACL validation of triple store configuration
     conforms, results_graph, results_text = validate(
         data_graph=triple_store_graph,
@@ -643,10 +792,40 @@ def get_triple_stores(triple_store_graph: Graph, credentials: dict = None) -> li
         # Fill in the store-specific connection details. Dispatch on the store
         # type so a new backend is a registered method, not another elif here.
         get_triple_store_config(triple_store, triple_store_graph, triple_store_config, credentials)
+        # Store-independent: any store may ask for per-spec graphs (mustrd.isolation).
+        isolate_graphs = triple_store_graph.value(
+            subject=triple_store_config, predicate=TRIPLESTORE.isolateGraphs
+        )
+        triple_store["isolate_graphs"] = bool(isolate_graphs and isolate_graphs.toPython())
+        # Likewise the HTTP pool and retry policy (mustrd.http_session) and how
+        # givens are uploaded (mustrd.upload).
+        for predicate, key in {**HTTP_SESSION_PROPERTIES, **UPLOAD_PROPERTIES}.items():
+            value = triple_store_graph.value(subject=triple_store_config, predicate=predicate)
+            if value is not None:
+                triple_store[key] = value.toPython() if isinstance(value, Literal) else value
+        triple_store["read_back"] = triple_store_graph.value(
+            subject=triple_store_config, predicate=TRIPLESTORE.readBack
+        )
         triple_stores.append(triple_store)
     return triple_stores
 
 
+# Per-store HTTP connection settings, read onto the triple_store dict under these keys.
+HTTP_SESSION_PROPERTIES = {
+    TRIPLESTORE.poolSize: "pool_size",
+    TRIPLESTORE.maxRetries: "max_retries",
+    TRIPLESTORE.retryBackoff: "retry_backoff",
+}
+
+# Per-store upload settings, likewise.
+UPLOAD_PROPERTIES = {
+    TRIPLESTORE.uploadFormat: "upload_format",
+    TRIPLESTORE.gzipUpload: "gzip_upload",
+    TRIPLESTORE.uploadChunkSize: "upload_chunk_size",
+    TRIPLESTORE.reuseGivens: "reuse_givens",
+}
+
+
 # Names auth lives under in both the config graph and the credentials map.
 CREDENTIAL_PROPERTIES = {
     TRIPLESTORE.token: "token",
@@ -831,37 +1010,47 @@ def check_triple_store_params(triple_store: dict, required_params: List[str]):
 
 
 # Convert sparql json query results as defined in https://www.w3.org/TR/rdf-sparql-json-res/
-def json_results_to_panda_dataframe(result: str) -> pandas.DataFrame:
-    json_result = json.loads(result)
-    frames = DataFrame()
-    for binding in json_result["results"]["bindings"]:
-        columns = []
-        values = []
-        for key in binding:
-            value_object = binding[key]
-            columns.append(key)
-            values.append(str(value_object["value"]))
-            columns.append(key + "_datatype")
+def json_results_to_panda_dataframe(result: Union[str, StreamedSelectResult]) -> pandas.DataFrame:
+    # Built column by column in one pass, then framed once: concatenating a
+    # one-row frame per binding was quadratic in the number of rows. Columns come
+    # in order of first appearance, each value followed by its `_datatype`, and a
+    # variable a row leaves unbound is "" — exactly as the concatenation gave them.
+    # That includes dropping rows with no bindings at all until a bound one is seen.
+    columns = {}
+    rows = 0
+    for binding in select_bindings(result):
+        if not binding and not columns:
+            continue
+        for key, value_object in binding.items():
+            if key not in columns:
+                columns[key] = [""] * rows
+                columns[key + "_datatype"] = [""] * rows
+            columns[key].append(str(value_object["value"]))
             if "type" in value_object and value_object["type"] == "literal":
                 literal_type = str(XSD.string)
                 if "datatype" in value_object:
                     literal_type = value_object["datatype"]
-                values.append(literal_type)
+                columns[key + "_datatype"].append(literal_type)
             else:
-                values.append(str(XSD.anyURI))
+                columns[key + "_datatype"].append(str(XSD.anyURI))
+        rows += 1
+        for values in columns.values():
+            if len(values) < rows:
+                values.append("")
+
+    if not columns:
+        return pandas.DataFrame()
+    return pandas.DataFrame(columns, dtype=object)
 
-        frames = pandas.concat(
-            objs=[frames, pandas.DataFrame([values], columns=columns)],
-            ignore_index=True,
-        )
-        frames.fillna("", inplace=True)
 
-        if frames.size == 0:
-            frames = pandas.DataFrame()
-    return frames
+def table_comparison(result: Union[str, StreamedSelectResult], spec: Specification) -> SpecResult:
+    try:
+        return _table_comparison(result, spec)
+    finally:
+        close_select_result(result)
 
 
-def table_comparison(result: str, spec: Specification) -> SpecResult:
+def _table_comparison(result: Union[str, StreamedSelectResult], spec: Specification) -> SpecResult:
     warning = None
     order_list = ["order by ?", "order by desc", "order by asc"]
     ordered_result = any(
@@ -884,10 +1073,11 @@ def table_comparison(result: str, spec: Specification) -> SpecResult:
             spec.spec_uri, spec.triple_store["type"], None, message
         )
 
-    # Convert results to dataframe
-    if is_json(result):
+    # Convert results to dataframe, parsing them once: a result that is not JSON
+    # fails to parse here, as it used to fail a separate is_json check first.
+    try:
         df = json_results_to_panda_dataframe(result)
-    else:
+    except ValueError:
         return SelectSpecFailure(
             spec.spec_uri,
             spec.triple_store["type"],
@@ -906,7 +1096,8 @@ def table_comparison(result: str, spec: Specification) -> SpecResult:
         else:
             return SpecPassed(spec.spec_uri, spec.triple_store["type"])
     else:
-        log.error("\n" + df_diff.to_markdown())
+        # The rows themselves are printed with the failure (mustrd.diff_render).
+        log.error(table_diff_summary(df_diff))
         log.error(message)
         return SelectSpecFailure(
             spec.spec_uri, spec.triple_store["type"], df_diff, message
@@ -934,6 +1125,15 @@ def _compare_results(resultDf: DataFrame, spec: Specification):
         pattern in spec.when[0].value.lower() for pattern in order_list
     )
 
+    # Most specs pass, and proving that needs no diff at all: compare the rows as
+    # a multiset of tuples (a sequence, when the query is ordered), in one pass
+    # over each table. Only a failure goes on to the sorting and DataFrame diffing
+    # below, which exist to render it.
+    if sorted_columns == sorted_then_cols and len(resultDf) == len(then) \
+            and _same_rows(resultDf, then, sorted_columns, ordered_result):
+        return pandas.DataFrame(), build_summary_message(
+            then.shape[0], round(then.shape[1] / 2), resultDf.shape[0], round(resultDf.shape[1] / 2))
+
     if not ordered_result:
         resultDf.sort_values(by=list(resultDf.columns)[::2], inplace=True)
         resultDf.reset_index(inplace=True, drop=True)
@@ -974,6 +1174,17 @@ def _compare_results(resultDf: DataFrame, spec: Specification):
     return df_diff, message
 
 
+def _row_tuples(df: DataFrame, columns: List[str]):
+    return zip(*(df[column].tolist() for column in columns))
+
+
+def _same_rows(resultDf: DataFrame, then: DataFrame, columns: List[str], ordered: bool) -> bool:
+    if ordered:
+        return all(actual == expected for actual, expected
+                   in zip(_row_tuples(resultDf, columns), _row_tuples(then, columns)))
+    return Counter(_row_tuples(resultDf, columns)) == Counter(_row_tuples(then, columns))
+
+
 # Scenario 2: expected no result but got a result
 @compare_table_results.method((True, False))
 def _unexpected_results(resultDf: DataFrame, spec: Specification):
@@ -1283,15 +1494,79 @@ def elide_around_difference(left: str, right: str) -> Tuple[str, str]:
     return window(left), window(right)
 
 
+def _has_bnode(triple) -> bool:
+    return any(isinstance(term, BNode) for term in triple)
+
+
+def _graph_of(triples) -> Graph:
+    graph = Graph()
+    graph += triples
+    return graph
+
+
+def graphs_match(expected_graph: Graph, actual_graph: Graph, expected_fingerprint: str = None) -> bool:
+    """Whether the two graphs are isomorphic, answered as cheaply as possible.
+
+    Canonicalising blank nodes is the expensive part of `isomorphic`, and most
+    then graphs have none. Two graphs can only be isomorphic with the same number
+    of triples and the same ground (blank-node-free) triples, which are plain set
+    comparisons; when that accounts for every triple, that is the answer, and
+    only graphs that really do hold blank nodes are canonicalised.
+
+    `expected_fingerprint` names the file the expected graph was read from, if it
+    was (ThenSpec.fingerprint); see `canonical_digest`.
+    """
+    expected_triples = set(expected_graph)
+    actual_triples = set(actual_graph)
+    if len(expected_triples) != len(actual_triples):
+        return False
+    expected_ground = {triple for triple in expected_triples if not _has_bnode(triple)}
+    actual_ground = {triple for triple in actual_triples if not _has_bnode(triple)}
+    if expected_ground != actual_ground:
+        return False
+    if len(expected_ground) == len(expected_triples):
+        return True
+    return canonical_digest(expected_graph, expected_fingerprint) == to_isomorphic(actual_graph).graph_digest()
+
+
+# The expected side of a comparison is a then graph, never modified, so its
+# digest — the hash `isomorphic` would compute — is computed once. A then read
+# from a file is kept by the file's fingerprint (its path, format and content
+# hash), which holds in any process: a `--jobs` worker gets its own unpickled
+# copy of the graph for each spec, and a multi-store run or a re-run shares
+# one. Any other then graph is kept by the graph object, for as long as it lives.
+_canonical_digests_by_source = {}
+_canonical_digests = weakref.WeakKeyDictionary()
+
+
+def canonical_digest(graph: Graph, fingerprint: str = None) -> int:
+    digests, key = (_canonical_digests_by_source, fingerprint) if fingerprint else (_canonical_digests, graph)
+    if key not in digests:
+        digests[key] = to_isomorphic(graph).graph_digest()
+    return digests[key]
+
+
 def graph_comparison(expected_graph: Graph, actual_graph: Graph) -> GraphComparison:
-    diff = graph_diff(expected_graph, actual_graph)
-    in_both = diff[0]
-    in_expected = diff[1]
-    in_actual = diff[2]
-    in_expected_not_in_actual = in_expected - in_actual
-    in_actual_not_in_expected = in_actual - in_expected
+    # "In both" is usually nearly all of the result and is only printed with
+    # `show_in_both` (mustrd.diff_render), so otherwise it is left empty.
+    show_in_both = diff_limits().show_in_both
+    # Without blank nodes the canonical graphs are the graphs themselves, so the
+    # diff is set operations.
+    expected_triples = set(expected_graph)
+    actual_triples = set(actual_graph)
+    if not any(_has_bnode(triple) for triple in expected_triples | actual_triples):
+        return GraphComparison(
+            _graph_of(expected_triples - actual_triples),
+            _graph_of(actual_triples - expected_triples),
+            _graph_of(expected_triples & actual_triples) if show_in_both else Graph(),
+        )
+    # What rdflib's graph_diff does, less the intersection when it is not shown.
+    expected_canonical = to_canonical_graph(expected_graph)
+    actual_canonical = to_canonical_graph(actual_graph)
     return GraphComparison(
-        in_expected_not_in_actual, in_actual_not_in_expected, in_both
+        expected_canonical - actual_canonical,
+        actual_canonical - expected_canonical,
+        expected_canonical * actual_canonical if show_in_both else Graph(),
     )
 
 
@@ -1331,20 +1606,27 @@ render_result_diff = MultiMethod("render_result_diff", render_result_diff_dispat
 @render_result_diff.method(UpdateSpecFailure)
 @render_result_diff.method(ConstructSpecFailure)
 def _render_graph_failure(res, info):
+    # Bounded by mustrd.diff_render's limits: a summary, then a sample of each part.
+    comparison = res.graph_comparison
+    parts = [(f"{Fore.BLUE} In Expected Not In Actual:", "in_expected_not_in_actual",
+              comparison.in_expected_not_in_actual),
+             (f"{Fore.RED} in_actual_not_in_expected", "in_actual_not_in_expected",
+              comparison.in_actual_not_in_expected)]
+    if diff_limits().show_in_both:
+        parts.append((f"{Fore.GREEN} in_both", "in_both", comparison.in_both))
     info(f"{Fore.RED}Failed {res.spec_uri} {res.triple_store}")
-    info(f"{Fore.BLUE} In Expected Not In Actual:")
-    info(res.graph_comparison.in_expected_not_in_actual.serialize(format="ttl"))
-    info(f"{Fore.RED} in_actual_not_in_expected")
-    info(res.graph_comparison.in_actual_not_in_expected.serialize(format="ttl"))
-    info(f"{Fore.GREEN} in_both")
-    info(res.graph_comparison.in_both.serialize(format="ttl"))
+    for heading, part, graph in parts:
+        info(heading)
+        for line in graph_diff_lines(res.spec_uri, res.triple_store, part, graph):
+            info(line)
 
 
 @render_result_diff.method(SelectSpecFailure)
 def _render_select_failure(res, info):
     info(f"{Fore.RED}Failed {res.spec_uri} {res.triple_store}")
     info(res.message)
-    info(res.table_comparison.to_markdown())
+    for line in table_diff_lines(res.spec_uri, res.triple_store, res.table_comparison):
+        info(line)
 
 
 @render_result_diff.method(SpecPassedWithWarning)
@@ -1380,9 +1662,31 @@ def write_result_diff_to_log(res, info):
 def calculate_row_difference(
     df1: pandas.DataFrame, df2: pandas.DataFrame
 ) -> pandas.DataFrame:
-    df_all = df1.merge(df2.drop_duplicates(), how="left", indicator=True)
-    actual_rows = df_all[df_all["_merge"] == "left_only"]
-    actual_rows = actual_rows.drop("_merge", axis=1)
+    """The rows of df1 that appear nowhere in df2, matched on their shared columns.
+
+    What `df1.merge(df2.drop_duplicates(), how="left", indicator=True)` keeps as
+    left_only — each row at its position in df1, with df2's other columns
+    appended empty — found with a set of df2's row tuples rather than a merge.
+    """
+    common = [column for column in df1.columns if column in df2.columns]
+    if not common:
+        # Nothing to match on: let pandas refuse, as it always has.
+        df1.merge(df2, how="left")
+    # A df1 row matching k distinct df2 rows comes out of the merge k times, which
+    # moves the merged position (and so the index) of every row after it.
+    matches = Counter(_row_tuples(df2.drop_duplicates(), common))
+    positions, merged_positions, merged_position = [], [], 0
+    for position, row in enumerate(_row_tuples(df1, common)):
+        if row not in matches:
+            positions.append(position)
+            merged_positions.append(merged_position)
+        merged_position += matches.get(row, 1)
+    actual_rows = df1.iloc[positions]
+    actual_rows.index = pandas.Index(merged_positions, dtype="int64")
+    extra = [column for column in df2.columns if column not in df1.columns]
+    if extra:
+        actual_rows = actual_rows.reindex(columns=list(df1.columns) + extra)
+        actual_rows[extra] = actual_rows[extra].astype(object)
     return actual_rows
 
 
@@ -1566,9 +1870,9 @@ original_run_when_impl = run_when_impl
 
 # Wrapper function for logging inputs and outputs of run_when
 def run_when_with_logging(*args, **kwargs):
-    log.debug(f"run_when called with args: {args}, kwargs: {kwargs}")
+    log.debug("run_when called with args: %s, kwargs: %s", args, kwargs)
     result = original_run_when_impl(*args, **kwargs)  # Call the original multimethod
-    log.debug(f"run_when returned: {result}")
+    log.debug("run_when returned: %s", brief(result))
     return result
 
 
@@ -3,24 +3,42 @@ from requests import ConnectTimeout, HTTPError, ConnectionError
 import logging
 from mustrd.anzo_utils import query_azg, query_graphmart
 from mustrd.anzo_utils import query_configuration, json_to_dictlist, ttl_to_graph
+from mustrd.lazy_log import brief, turtle
+from mustrd.read_back import read_back_query
+from mustrd.sparql_results import StreamedSelectResult
+from mustrd.upload import given_chunks, ntriples
 
 
 
 def execute_select(triple_store: dict,  when: str, bindings: dict = None) -> str:
     try:
-        if bindings:
-            when = query_with_bindings(bindings, when)
-        # FIXME: why do we have those tokens in a select query? in particular ${targetGraph}?
-        # FIXME: why do we also query the output graph?
-        when = when.replace("${fromSources}",
-                            f"FROM <{triple_store['input_graph']}>\nFROM <{triple_store['output_graph']}>").replace(
-                                "${targetGraph}", f"<{triple_store['output_graph']}>")
         # TODO: manage results here
-        return query_azg(anzo_config=triple_store, query=when, data_layers=[triple_store['input_graph'], triple_store['output_graph']])
+        return query_azg(anzo_config=triple_store, query=_select_query(triple_store, when, bindings),
+                         data_layers=[triple_store['input_graph'], triple_store['output_graph']])
     except (ConnectionError, TimeoutError, HTTPError, ConnectTimeout):
         raise
 
 
+def stream_select(triple_store: dict, when: str, bindings: dict = None) -> StreamedSelectResult:
+    """execute_select, with the result left on the wire to be read incrementally."""
+    try:
+        return StreamedSelectResult(
+            query_azg(anzo_config=triple_store, query=_select_query(triple_store, when, bindings),
+                      data_layers=[triple_store['input_graph'], triple_store['output_graph']], stream=True))
+    except (ConnectionError, TimeoutError, HTTPError, ConnectTimeout):
+        raise
+
+
+def _select_query(triple_store: dict, when: str, bindings: dict = None) -> str:
+    if bindings:
+        when = query_with_bindings(bindings, when)
+    # FIXME: why do we have those tokens in a select query? in particular ${targetGraph}?
+    # FIXME: why do we also query the output graph?
+    return when.replace("${fromSources}",
+                        f"FROM <{triple_store['input_graph']}>\nFROM <{triple_store['output_graph']}>").replace(
+                            "${targetGraph}", f"<{triple_store['output_graph']}>")
+
+
 def execute_update(triple_store: dict, when: str, bindings: dict = None) -> Graph:
     logging.debug(f"updating in anzo! {triple_store=} {when=}")
     input_graph = triple_store['input_graph']
@@ -38,9 +56,10 @@ USING <{triple_store['output_graph']}>""").replace(
                          data_layers=[input_graph, output_graph], format="ttl")
     logging.debug(f'response {response}')
     # TODO: deal with error responses
-    new_graph = ttl_to_graph(query_azg(anzo_config=triple_store, query="construct {?s ?p ?o} { ?s ?p ?o }",
+    # Only the output graph is read back, so WrittenGraphs is the default here.
+    new_graph = ttl_to_graph(query_azg(anzo_config=triple_store, query=read_back_query(triple_store),
                                        format="ttl", data_layers=output_graph))
-    logging.debug(f"new_graph={new_graph.serialize(format='ttl')}")
+    logging.debug("new_graph=%s", turtle(new_graph))
     return new_graph
 
 
@@ -145,14 +164,15 @@ SELECT ?query ?param_query ?query_template
     return result
 
 def upload_given(triple_store: dict, given: Graph):
-    logging.debug(f"upload_given {triple_store} {given}")
+    logging.debug("upload_given %s %s", triple_store, brief(given))
 
     try:
         clear_graph(triple_store, triple_store['input_graph'])
         clear_graph(triple_store, triple_store['output_graph'])
-        serialized_given = given.serialize(format="nt")
-        insert_query = f"INSERT DATA {{graph <{triple_store['input_graph']}>{{{serialized_given}}}}}"
-        query_azg(anzo_config=triple_store, query=insert_query, is_update=True)
+        # An INSERT DATA per part of a chunked given (mustrd.upload).
+        for triples in given_chunks(triple_store, given):
+            insert_query = f"INSERT DATA {{graph <{triple_store['input_graph']}>{{{ntriples(triples)}}}}}"
+            query_azg(anzo_config=triple_store, query=insert_query, is_update=True)
     except (ConnectionError, TimeoutError, HTTPError, ConnectTimeout):
         logging.error("Exception occurred while uploading given graph", exc_info=True)
         raise
@@ -165,3 +185,8 @@ def clear_graph(triple_store: dict, graph_uri: str):
     except (ConnectionError, TimeoutError, HTTPError, ConnectTimeout):
         logging.error(f"Failed to clear graph {graph_uri} in triple store {triple_store['name']}")
         raise
+
+
+def drop_graph(triple_store: dict, graph_uri: str):
+    # SILENT: an isolated output graph a select spec never wrote to does not exist.
+    query_azg(anzo_config=triple_store, query=f"DROP SILENT GRAPH <{graph_uri}>", is_update=True)
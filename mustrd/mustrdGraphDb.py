@@ -1,17 +1,20 @@
 import urllib.parse
-import requests
 from rdflib import Graph, Literal
 from requests import ConnectionError, Response
 
+from .http_session import store_session
+from .read_back import NTRIPLES, parse_ntriples, read_back_query
+from .sparql_results import StreamedSelectResult
+from .upload import upload_requests
 from .utils import manage_http_response
 
 
 # https://github.com/Semantic-partners/mustrd/issues/72
-def manage_graphdb_response(response: Response) -> str:
+def manage_graphdb_response(response: Response, stream: bool = False) -> str:
     # 406 stays an HTTPError (not a generic RequestException) — see manage_http_response.
     return manage_http_response(
         response, "GraphDB",
-        success_codes=(200, 204), auth_codes=(401,), http_error_codes=(406,))
+        success_codes=(200, 204), auth_codes=(401,), http_error_codes=(406,), stream=stream)
 
 
 def upload_given(triple_store: dict, given: Graph):
@@ -24,14 +27,30 @@ def upload_given(triple_store: dict, given: Graph):
                   f"/rdf-graphs/service?{graph}"
             # graph store PUT drop silently the graph or default and upload the payload
             # https://www.w3.org/TR/sparql11-http-rdf-update/#http-put
-            manage_graphdb_response(requests.put(url=url,
-                                                 auth=(triple_store['username'], triple_store['password']),
-                                                 data=given.serialize(format="ttl"),
-                                                 headers={'Content-Type': 'text/turtle'}))
+            # (and any further parts are POSTed onto it — see mustrd.upload)
+            session = store_session(triple_store)
+            for method, body, headers in upload_requests(triple_store, given):
+                manage_graphdb_response(getattr(session, method)(
+                    url=url,
+                    auth=(triple_store['username'], triple_store['password']),
+                    data=body,
+                    headers=headers))
         except ConnectionError:
             raise
 
 
+def drop_graph(triple_store: dict, graph: str):
+    """DELETE a named graph through the graph store protocol — the cleanup for
+    graphs minted by mustrd.isolation. A 404 (nothing was ever written there)
+    is as good as a drop."""
+    url = f"{triple_store['url']}/repositories/{triple_store['repository']}" \
+          f"/rdf-graphs/service?{urllib.parse.urlencode({'graph': graph})}"
+    response = store_session(triple_store).delete(
+        url=url, auth=(triple_store['username'], triple_store['password']))
+    if response.status_code != 404:
+        manage_graphdb_response(response)
+
+
 def parse_bindings(bindings: dict = None) -> dict:
     return None if not bindings else {f"${k}": str(v.n3()) for k, v in bindings.items()}
 
@@ -40,19 +59,40 @@ def execute_select(triple_store: dict, when: str, bindings: dict = None) -> str:
     return post_query(triple_store, when, "application/sparql-results+json", parse_bindings(bindings))
 
 
+def stream_select(triple_store: dict, when: str, bindings: dict = None) -> StreamedSelectResult:
+    """execute_select, with the result left on the wire to be read incrementally."""
+    try:
+        return StreamedSelectResult(manage_graphdb_response(store_session(triple_store).post(
+            **_query_request(triple_store, when, "application/sparql-results+json", parse_bindings(bindings)),
+            stream=True), stream=True))
+    except (ConnectionError, OSError):
+        raise
+
+
 def execute_construct(triple_store: dict, when: str, bindings: dict = None) -> Graph:
     return Graph().parse(data=post_query(triple_store, when, "text/turtle", parse_bindings(bindings)))
 
 
 def execute_update(triple_store: dict, when: str, bindings: dict = None) -> Graph:
     post_update_query(triple_store, when, parse_bindings(bindings))
-    return Graph().parse(data=post_query(triple_store, "CONSTRUCT {?s ?p ?o} where { ?s ?p ?o }", 'text/turtle'))
+    return read_back(triple_store)
+
+
+def read_back(triple_store: dict) -> Graph:
+    """The input graph after an update, streamed as N-Triples (see mustrd.read_back).
+    Reads here only ever cover the input graph, so WrittenGraphs is the default."""
+    try:
+        return parse_ntriples(manage_graphdb_response(store_session(triple_store).post(
+            **_query_request(triple_store, read_back_query(triple_store), NTRIPLES),
+            stream=True), stream=True))
+    except (ConnectionError, OSError):
+        raise
 
 
 def post_update_query(triple_store: dict, query: str, params: dict = None) -> str:
     params = add_graph_to_params(params, triple_store["input_graph"])
     try:
-        return manage_graphdb_response(requests.post(
+        return manage_graphdb_response(store_session(triple_store).post(
             url=f"{triple_store['url']}/repositories/{triple_store['repository']}/statements",
             data=query,
             params=params,
@@ -63,20 +103,24 @@ def post_update_query(triple_store: dict, query: str, params: dict = None) -> st
 
 
 def post_query(triple_store: dict, query: str, accept: str, params: dict = None) -> str:
+    try:
+        return manage_graphdb_response(
+            store_session(triple_store).post(**_query_request(triple_store, query, accept, params)))
+    except (ConnectionError, OSError):
+        raise
+
+
+def _query_request(triple_store: dict, query: str, accept: str, params: dict = None) -> dict:
     headers = {
         'Content-Type': 'application/sparql-query',
         'Accept': accept
     }
     params = add_graph_to_params(params, triple_store["input_graph"])
-    try:
-        return manage_graphdb_response(
-            requests.post(url=f"{triple_store['url']}/repositories/{triple_store['repository']}",
-                          data=query,
-                          params=params,
-                          auth=(triple_store['username'], triple_store['password']),
-                          headers=headers))
-    except (ConnectionError, OSError):
-        raise
+    return dict(url=f"{triple_store['url']}/repositories/{triple_store['repository']}",
+                data=query,
+                params=params,
+                auth=(triple_store['username'], triple_store['password']),
+                headers=headers)
 
 
 def add_graph_to_params(params: dict, graph: Literal) -> dict:
@@ -3,6 +3,8 @@ from rdflib import Graph
 from requests import RequestException
 import logging
 
+from .overlay import is_overlay, overlay
+
 
 def execute_select(triple_store: dict, given: Graph, when: str, bindings: dict = None) -> str:
     try:
@@ -30,7 +32,11 @@ def execute_construct(triple_store: dict, given: Graph, when: str, bindings: dic
 
 def execute_update(triple_store: dict, given: Graph, when: str, bindings: dict = None) -> Graph:
     try:
-        result = given
+        # Copy-on-write: the update lands in an overlay of the given, never in the
+        # parsed given itself (see mustrd.overlay). The overlay becomes the store's
+        # given for the rest of the run, so a later step sees this one's changes.
+        result = given if is_overlay(given) else overlay(given)
+        triple_store["given"] = result
         result.update(when, initBindings=bindings)
         return result
     except ParseException:
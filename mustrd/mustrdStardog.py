@@ -16,10 +16,14 @@ Two things set this backend apart from the GraphDb/Anzo ones:
 import urllib.parse
 import logging
 
-import requests
 from rdflib import Graph
 from requests import ConnectionError, Response
 
+from .http_session import store_session
+from .namespace import TRIPLESTORE
+from .read_back import NTRIPLES, parse_ntriples, read_back_mode, read_back_query, written_graphs
+from .sparql_results import StreamedSelectResult
+from .upload import upload_requests
 from .utils import manage_http_response
 
 log = logging.getLogger(__name__)
@@ -51,10 +55,10 @@ def _auth_and_headers(triple_store: dict, extra_headers: dict = None):
 
 
 # https://docs.stardog.com/operating-stardog/server-administration/server-monitoring#http-status-codes
-def manage_stardog_response(response: Response) -> str:
+def manage_stardog_response(response: Response, stream: bool = False) -> str:
     return manage_http_response(
         response, "Stardog",
-        success_codes=(200, 201, 204), auth_codes=(401, 403))
+        success_codes=(200, 201, 204), auth_codes=(401, 403), stream=stream)
 
 
 def dataset_graphs(triple_store: dict) -> list:
@@ -107,16 +111,31 @@ def upload_given(triple_store: dict, given: Graph):
         if triple_store.get("input_graph"):
             graph = urllib.parse.urlencode({"graph": str(triple_store["input_graph"])})
         url = f"{_base_url(triple_store)}/{triple_store['database']}?{graph}"
-        auth, headers = _auth_and_headers(triple_store, {"Content-Type": "text/turtle"})
-        manage_stardog_response(requests.put(
-            url=url,
-            auth=auth,
-            data=given.serialize(format="ttl"),
-            headers=headers))
+        session = store_session(triple_store)
+        # One PUT, then a POST for each further part of a chunked given (mustrd.upload).
+        for method, body, content_headers in upload_requests(triple_store, given):
+            auth, headers = _auth_and_headers(triple_store, content_headers)
+            manage_stardog_response(getattr(session, method)(
+                url=url,
+                auth=auth,
+                data=body,
+                headers=headers))
     except ConnectionError:
         raise
 
 
+def drop_graph(triple_store: dict, graph: str):
+    """DELETE a named graph through the graph store protocol — the cleanup for
+    graphs minted by mustrd.isolation. A 404 (nothing was ever written there)
+    is as good as a drop."""
+    url = f"{_base_url(triple_store)}/{triple_store['database']}?" \
+          f"{urllib.parse.urlencode({'graph': str(graph)})}"
+    auth, headers = _auth_and_headers(triple_store)
+    response = store_session(triple_store).delete(url=url, auth=auth, headers=headers)
+    if response.status_code != 404:
+        manage_stardog_response(response)
+
+
 def execute_select(triple_store: dict, when: str, bindings: dict = None) -> str:
     return post_query(triple_store, when, "application/sparql-results+json", bindings)
 
@@ -137,13 +156,47 @@ def execute_update(triple_store: dict, when: str, bindings: dict = None) -> Grap
     if bindings:
         when = query_with_bindings(bindings, when)
     post_update(triple_store, when)
-    return execute_construct(triple_store, "CONSTRUCT {?s ?p ?o} WHERE { ?s ?p ?o }")
+    return read_back(triple_store)
+
+
+def read_back(triple_store: dict) -> Graph:
+    """The dataset after an update, streamed as N-Triples — or only the graphs
+    mustrd writes to, with ``triplestore:readBack triplestore:WrittenGraphs``
+    (see mustrd.read_back)."""
+    graphs = written_graphs(triple_store) if read_back_mode(triple_store) == TRIPLESTORE.WrittenGraphs \
+        else dataset_graphs(triple_store)
+    try:
+        return parse_ntriples(manage_stardog_response(store_session(triple_store).post(
+            **_query_request(triple_store, read_back_query(triple_store), NTRIPLES, graphs=graphs),
+            stream=True), stream=True))
+    except (ConnectionError, OSError):
+        raise
+
+
+def stream_select(triple_store: dict, when: str, bindings: dict = None) -> StreamedSelectResult:
+    """execute_select, with the result left on the wire to be read incrementally."""
+    try:
+        return StreamedSelectResult(manage_stardog_response(store_session(triple_store).post(
+            **_query_request(triple_store, when, "application/sparql-results+json", bindings),
+            stream=True), stream=True))
+    except (ConnectionError, OSError):
+        raise
 
 
 def post_query(triple_store: dict, query: str, accept: str, bindings: dict = None) -> str:
+    try:
+        return manage_stardog_response(
+            store_session(triple_store).post(**_query_request(triple_store, query, accept, bindings)))
+    except (ConnectionError, OSError):
+        raise
+
+
+def _query_request(triple_store: dict, query: str, accept: str, bindings: dict = None,
+                   graphs: list = None) -> dict:
     if bindings:
         query = query_with_bindings(bindings, query)
-    graphs = dataset_graphs(triple_store)
+    if graphs is None:
+        graphs = dataset_graphs(triple_store)
     params = {}
     if graphs:
         # Expose the combination both merged into the default graph and as named
@@ -153,15 +206,7 @@ def post_query(triple_store: dict, query: str, accept: str, bindings: dict = Non
     url = f"{_base_url(triple_store)}/{triple_store['database']}/query"
     auth, headers = _auth_and_headers(
         triple_store, {"Content-Type": "application/sparql-query", "Accept": accept})
-    try:
-        return manage_stardog_response(requests.post(
-            url=url,
-            data=query.encode("utf-8"),
-            params=params,
-            auth=auth,
-            headers=headers))
-    except (ConnectionError, OSError):
-        raise
+    return dict(url=url, data=query.encode("utf-8"), params=params, auth=auth, headers=headers)
 
 
 def post_update(triple_store: dict, query: str) -> str:
@@ -174,7 +219,7 @@ def post_update(triple_store: dict, query: str) -> str:
     auth, headers = _auth_and_headers(
         triple_store, {"Content-Type": "application/sparql-update"})
     try:
-        return manage_stardog_response(requests.post(
+        return manage_stardog_response(store_session(triple_store).post(
             url=url,
             data=query.encode("utf-8"),
             params=params,
@@ -1,6 +1,8 @@
 import logging
+import pickle
 import pytest
 import os
+import tempfile
 from pathlib import Path
 from rdflib.namespace import Namespace
 from rdflib import Graph, RDF
@@ -9,12 +11,13 @@ from pytest import Session
 from mustrd.TestResult import TestResult
 from mustrd.reporting import (
     ReportOptions, wants_coverage, wants_cq, produce_report, collect_cq_defs,
-    coverage_spec,
+    coverage_spec, spec_queries,
 )
 from mustrd.runner import generate_specs, resolve_triple_stores
 # TestConfig / parse_config moved to mustrd.config (no pytest dependency, so the
 # CLI shares them); re-exported here for callers that import them from the plugin.
 from mustrd.config import TestConfig, parse_config, get_config_param  # noqa: F401
+from mustrd.diff_render import DiffLimits, set_diff_limits
 from mustrd.results_rdf import RunResult
 # re-exported so `from mustrd.mustrdTestPlugin import _link_href, ...` keeps
 # working for existing callers/tests after the extraction into reporting.py
@@ -27,6 +30,7 @@ from mustrd.mustrd import (
     SpecInvalid
 )
 from mustrd.namespace import MUST, MUSTRDTEST
+from mustrd.parallel import from_worker, to_worker
 
 import traceback
 
@@ -188,10 +192,46 @@ def pytest_addoption(parser):
              "browsing; 'iri' links to the term's full IRI, for environments "
              "where it HTTP-resolves; 'off' (default) leaves terms as plain text.",
     )
+    group.addoption(
+        "--diff-max-triples",
+        action="store",
+        dest="diff_max_triples",
+        metavar="N",
+        type=int,
+        default=DiffLimits.max_triples,
+        help="Print at most N triples of each part of a failed spec's graph diff, "
+             "after a count by predicate.",
+    )
+    group.addoption(
+        "--diff-max-rows",
+        action="store",
+        dest="diff_max_rows",
+        metavar="N",
+        type=int,
+        default=DiffLimits.max_rows,
+        help="Print at most N rows of a failed spec's table diff, after a count by column.",
+    )
+    group.addoption(
+        "--diff-in-both",
+        action="store_true",
+        dest="diff_in_both",
+        help="Also print the triples a failed spec's expected and actual graphs share.",
+    )
+    group.addoption(
+        "--diff-spill",
+        action="store",
+        dest="diff_spill",
+        metavar="dir",
+        default=None,
+        help="Write every failed spec's full diff to this directory, as N-Triples or CSV.",
+    )
     return
 
 
 def pytest_configure(config) -> None:
+    if config.getoption("mustrd"):
+        set_diff_limits(DiffLimits(config.getoption("diff_max_triples"), config.getoption("diff_max_rows"),
+                                   config.getoption("diff_in_both"), config.getoption("diff_spill")))
     # Read configuration file
     if config.getoption("mustrd") and config.getoption("configpath"):
         config.pluginmanager.register(
@@ -252,28 +292,23 @@ class MustrdTestPlugin:
         self.term_links = term_links
         self.ontology_paths = []
         self.items = []
+        self.selected_tests = None
+        self.path_filter = None
+        # Built once per process; under pytest-xdist, once on the controller and
+        # handed to the workers through a pickle (see pytest_configure_node).
+        self._spec_groups = None
+        self._spec_handoff = None
+        # Under pytest-xdist the controller never sees a test item, only the
+        # workers' reports: their results are gathered here instead.
+        self.distributed_results = []
 
     @pytest.hookimpl(tryfirst=True)
     def pytest_collection(self, session):
         logger.info("Starting test collection")
 
         args = session.config.args
+        mustrd_args, pytest_args = self._read_selection(session.config)
 
-        # Split args into mustrd and regular pytest args
-        mustrd_args = [arg for arg in args if ".mustrd.ttl" in arg]
-        pytest_args = [arg for arg in args if arg != os.getcwd() and ".mustrd.ttl" not in arg]
-
-        self.selected_tests = list(
-            map(
-                lambda arg: Path(arg.split("::")[0]),
-                mustrd_args
-            )
-        )
-        logger.info(f"selected_tests is: {self.selected_tests}")
-
-        self.path_filter = session.config.getoption("pytest_path") or None
-
-        logger.info(f"path_filter is: {self.path_filter}")
         logger.info(f"Args: {args}")
         logger.info(f"Mustrd Args: {mustrd_args}")
         logger.info(f"Pytest Args: {pytest_args}")
@@ -300,6 +335,28 @@ class MustrdTestPlugin:
             # without insisting on them.
             self._resolve_ontology_paths()
 
+    def _read_selection(self, config):
+        """Which spec files and pytest_path the run is narrowed to, from the
+        command line. Returns the args split into (mustrd, regular pytest)."""
+        args = config.args
+
+        # Split args into mustrd and regular pytest args
+        mustrd_args = [arg for arg in args if ".mustrd.ttl" in arg]
+        pytest_args = [arg for arg in args if arg != os.getcwd() and ".mustrd.ttl" not in arg]
+
+        self.selected_tests = list(
+            map(
+                lambda arg: Path(arg.split("::")[0]),
+                mustrd_args
+            )
+        )
+        logger.info(f"selected_tests is: {self.selected_tests}")
+
+        self.path_filter = config.getoption("pytest_path") or None
+
+        logger.info(f"path_filter is: {self.path_filter}")
+        return mustrd_args, pytest_args
+
     def _resolve_ontology_paths(self):
         # Reuse parse_config (which also SHACL-validates) so ontology paths come
         # from the same TestConfig the tests are built from — one source of truth.
@@ -365,6 +422,88 @@ class MustrdTestPlugin:
     def get_triple_stores_from_file(self, test_config):
         return resolve_triple_stores(test_config, self.secrets)
 
+    def spec_groups(self, config, config_path):
+        """The suite's specs, grouped by pytest_path: {pytest_path: [spec, ...]}.
+
+        Built once per process. A pytest-xdist worker loads the copy the
+        controller built (see pytest_configure_node) instead of parsing the
+        config, validating and building every spec again itself — which also
+        guarantees every worker collects the identical list xdist requires.
+        """
+        if self._spec_groups is None:
+            handoff = getattr(config, "workerinput", {}).get("mustrd_specs")
+            if handoff and os.path.exists(handoff):
+                with open(handoff, "rb") as f:
+                    self._spec_groups = {pytest_path: [from_worker(spec) for spec in specs]
+                                         for pytest_path, specs in pickle.load(f).items()}
+            else:
+                self._spec_groups = self._generate_spec_groups(config_path)
+        return self._spec_groups
+
+    def _generate_spec_groups(self, config_path):
+        test_configs = parse_config(config_path)
+        from collections import defaultdict
+        pytest_path_grouped = defaultdict(list)
+        for test_config in test_configs:
+            if (
+                self.path_filter is not None
+                and not str(test_config.pytest_path).startswith(str(self.path_filter))
+            ):
+                logger.info(f"Skipping test config due to path filter: {test_config.pytest_path=} {self.path_filter=}")
+                continue
+
+            triple_stores = self.get_triple_stores_from_file(test_config)
+            try:
+                specs = self.generate_tests_for_config(
+                    {
+                        "spec_path": test_config.spec_path,
+                        "data_path": test_config.data_path,
+                    },
+                    triple_stores,
+                    None,
+                )
+            except Exception as e:
+                logger.error(f"Error generating tests: {e}\n{traceback.format_exc()}")
+                specs = [
+                    SpecInvalid(
+                        MUST.TestSpec,
+                        triple_store["uri"] if isinstance(triple_store, dict) else triple_store,
+                        f"Test generation failed: {str(e)}",
+                        spec_file_name=str(test_config.spec_path.name) if test_config.spec_path else "unknown.mustrd.ttl",
+                        spec_source_file=config_path if test_config.spec_path else Path("unknown.mustrd.ttl"),
+                    )
+                    for triple_store in (triple_stores or test_config.filter_on_tripleStore)
+                ]
+            pytest_path = getattr(test_config, "pytest_path", "unknown")
+            for spec in specs:
+                pytest_path_grouped[pytest_path].append(spec)
+        return dict(pytest_path_grouped)
+
+    # pytest-xdist hook, on the controller, once per worker it starts.
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_configure_node(self, node):
+        if self._spec_handoff is None:
+            self._spec_handoff = ""
+            if self.selected_tests is None:
+                self._read_selection(node.config)
+            groups = self.spec_groups(node.config, self.test_config_file)
+            fd, path = tempfile.mkstemp(prefix="mustrd-specs-", suffix=".pickle")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump({pytest_path: [to_worker(spec) for spec in specs]
+                                 for pytest_path, specs in groups.items()}, f)
+                self._spec_handoff = path
+            except Exception as e:
+                # Not fatal: each worker falls back to building the specs itself.
+                logger.warning(f"Could not hand the specs to the xdist workers: {e}")
+                os.remove(path)
+        if self._spec_handoff:
+            node.workerinput["mustrd_specs"] = self._spec_handoff
+
+    def _remove_spec_handoff(self):
+        if self._spec_handoff and os.path.exists(self._spec_handoff):
+            os.remove(self._spec_handoff)
+
     # Hook function. Initialize the list of result in session
     def pytest_sessionstart(self, session):
         session.results = dict()
@@ -377,18 +516,34 @@ class MustrdTestPlugin:
         outcome = yield
         result = outcome.get_result()
 
-        if result.when == "call":
+        if _is_final_report(result):
             # Add the result of the test to the session
             item.session.results[item] = result
-        elif result.when == "setup" and result.outcome == "skipped":
-            # A skipped test never reaches the call phase, so without this it would
-            # be absent from the results graph entirely rather than reported as
-            # skipped. A setup report that passed is ignored — the call report
-            # that follows carries the real outcome.
-            item.session.results[item] = result
+            if _is_xdist_worker(getattr(item, "config", None)):
+                # An xdist worker: the report is all that reaches the controller,
+                # so it carries what the controller needs to place the result —
+                # the names, and the spec's handle into the controller's own
+                # spec groups rather than the spec itself.
+                result.user_properties.append(
+                    ("mustrd_result", _result_names(item) + (getattr(item, "handle", None),)))
+                # The controller's copy of the spec never ran, so its Anzo-sourced
+                # whens were never fetched there: send the query texts as run.
+                if getattr(item, "spec", None) is not None:
+                    result.user_properties.append(("mustrd_queries", spec_queries(item.spec)))
+
+    # Hook function called on the xdist controller with every worker's reports.
+    def pytest_runtest_logreport(self, report):
+        record = dict(report.user_properties).get("mustrd_result")
+        if record is not None and _is_final_report(report):
+            self.distributed_results.append((record, report))
 
     # Take all the test results in session, parse them, and generate the md file.
     def pytest_sessionfinish(self, session: Session, exitstatus):
+        self._remove_spec_handoff()
+        if _is_xdist_worker(session.config):
+            # An xdist worker holds only its slice of the run: the controller
+            # reports on the whole of it.
+            return
         opts = ReportOptions(
             md_path=self.md_path, term_coverage=self.term_coverage, cq=self.cq,
             term_coverage_rdf=self.term_coverage_rdf,
@@ -432,25 +587,8 @@ class MustrdTestPlugin:
         Returns (test_results, all_specs, spec_by_uri, last_is_mustrd, run_results)."""
         test_results, all_specs, spec_by_uri, run_results = [], [], {}, []
         is_mustrd = False
-        for test_conf, result in session.results.items():
-            # Case auto generated tests
-            if test_conf.originalname != test_conf.name:
-                module_name = test_conf.parent.name
-                class_name = test_conf.originalname
-                test_name = (
-                    test_conf.name.replace(class_name, "")
-                    .replace("[", "")
-                    .replace("]", "")
-                )
-                is_mustrd = True
-            # Case normal unit tests
-            else:
-                module_name = test_conf.parent.parent.name
-                class_name = test_conf.parent.name
-                test_name = test_conf.originalname
-                is_mustrd = False
-
-            spec = getattr(test_conf, 'spec', None)
+        for (test_name, class_name, module_name, is_mustrd), result, spec in \
+                self._result_entries(session):
             test_result = TestResult(
                 test_name, class_name, module_name, result.outcome, is_mustrd,
             )
@@ -473,12 +611,29 @@ class MustrdTestPlugin:
             ))
 
             if spec is not None:
-                cspec = coverage_spec(spec, result.outcome, test_name)
+                cspec = coverage_spec(spec, result.outcome, test_name,
+                                      dict(result.user_properties).get("mustrd_queries"))
                 all_specs.append(cspec)
                 if cspec.get("uri"):
                     spec_by_uri[cspec["uri"]] = cspec
         return test_results, all_specs, spec_by_uri, is_mustrd, run_results
 
+    def _result_entries(self, session):
+        """(names, report, spec) for every test: from this process's items, or
+        — under pytest-xdist — from the workers' reports, each spec looked up by
+        its handle in the groups the controller built."""
+        for item, result in session.results.items():
+            yield _result_names(item), result, getattr(item, 'spec', None)
+        groups = {str(pytest_path): specs
+                  for pytest_path, specs in (self._spec_groups or {}).items()}
+        for record, result in self.distributed_results:
+            *names, handle = record
+            spec = None
+            if handle is not None:
+                pytest_path, index = handle
+                spec = groups[pytest_path][index] if pytest_path in groups else None
+            yield tuple(names), result, spec
+
     def _collect_cq_defs(self, spec_by_uri):
         """Resolve the suite's competency questions (pytest-side wrapper): read
         the spec paths from the test config, then delegate to the shared
@@ -522,43 +677,7 @@ class MustrdFile(pytest.File):
             #     logger.info(f"Skipping non-config file: {self.fspath}")
             #     return []
 
-            test_configs = parse_config(self.path)
-            from collections import defaultdict
-            pytest_path_grouped = defaultdict(list)
-            for test_config in test_configs:
-                if (
-                    self.mustrd_plugin.path_filter is not None
-                    and not str(test_config.pytest_path).startswith(str(self.mustrd_plugin.path_filter))
-                ):
-                    logger.info(f"Skipping test config due to path filter: {test_config.pytest_path=} {self.mustrd_plugin.path_filter=}")
-                    continue
-
-                triple_stores = self.mustrd_plugin.get_triple_stores_from_file(test_config)
-                try:
-                    specs = self.mustrd_plugin.generate_tests_for_config(
-                        {
-                            "spec_path": test_config.spec_path,
-                            "data_path": test_config.data_path,
-                        },
-                        triple_stores,
-                        None,
-                    )
-                except Exception as e:
-                    logger.error(f"Error generating tests: {e}\n{traceback.format_exc()}")
-                    specs = [
-                        SpecInvalid(
-                            MUST.TestSpec,
-                            triple_store["uri"] if isinstance(triple_store, dict) else triple_store,
-                            f"Test generation failed: {str(e)}",
-                            spec_file_name=str(test_config.spec_path.name) if test_config.spec_path else "unknown.mustrd.ttl",
-                            spec_source_file=self.path if test_config.spec_path else Path("unknown.mustrd.ttl"),
-                        )
-                        for triple_store in (triple_stores or test_config.filter_on_tripleStore)
-                    ]
-                pytest_path = getattr(test_config, "pytest_path", "unknown")
-                for spec in specs:
-                    pytest_path_grouped[pytest_path].append(spec)
-
+            pytest_path_grouped = self.mustrd_plugin.spec_groups(self.config, self.path)
             for pytest_path, specs_for_path in pytest_path_grouped.items():
                 logger.info(f"pytest_path group: {pytest_path} ({len(specs_for_path)} specs)")
 
@@ -583,21 +702,24 @@ class MustrdPytestPathCollector(pytest.Class):
         self.mustrd_plugin = mustrd_plugin
 
     def collect(self):
-        for spec in self.specs:
+        for index, spec in enumerate(self.specs):
             item = MustrdItem.from_parent(
                 self,
                 name=spec.spec_file_name,
                 spec=spec,
+                handle=(str(self.pytest_path), index),
             )
             self.mustrd_plugin.items.append(item)
             yield item
 
 
 class MustrdItem(pytest.Item):
-    def __init__(self, name, parent, spec):
+    def __init__(self, name, parent, spec, handle=None):
         logging.debug(f"Creating item: {name}")
         super().__init__(name, parent)
         self.spec = spec
+        # (pytest_path, position) of the spec in the plugin's spec groups.
+        self.handle = handle
         self.fspath = spec.spec_source_file
         self.originalname = name
 
@@ -624,6 +746,33 @@ class MustrdItem(pytest.Item):
         return r
 
 
+def _is_xdist_worker(config):
+    return hasattr(config, "workerinput")
+
+
+def _is_final_report(report):
+    # The call report carries a test's outcome. A skipped test never reaches the
+    # call phase, so without its setup report it would be absent from the results
+    # graph entirely rather than reported as skipped. A setup report that passed
+    # is ignored — the call report that follows carries the real outcome.
+    return report.when == "call" or (report.when == "setup" and report.outcome == "skipped")
+
+
+def _result_names(item):
+    """(test_name, class_name, module_name, is_mustrd) for a collected item."""
+    # Case auto generated tests
+    if item.originalname != item.name:
+        class_name = item.originalname
+        test_name = (
+            item.name.replace(class_name, "")
+            .replace("[", "")
+            .replace("]", "")
+        )
+        return test_name, class_name, item.parent.name, True
+    # Case normal unit tests
+    return item.originalname, item.parent.name, item.parent.parent.name, False
+
+
 # Function called in the test to actually run it
 def run_test_spec(test_spec):
     logger = logging.getLogger("mustrd.test")
@@ -640,7 +789,7 @@ def run_test_spec(test_spec):
         logger.error(f"Invalid test specification: {test_spec.message} {test_spec}")
         pytest.fail(f"Invalid test specification: {test_spec.message} {test_spec}")
     if not isinstance(result, SpecPassed):
-        write_result_diff_to_log(result, logger.info)
+        # Rendered once, for both the log and the assertion.
         log_lines = []
 
         def log_to_string(message):
@@ -650,6 +799,8 @@ def run_test_spec(test_spec):
         except Exception as e:
             logger.error(f"Exception in write_result_diff_to_log: {e}")
             logger.error(traceback.format_exc())
+        for line in log_lines:
+            logger.info(line)
         logger.error(f"Test failed: {log_lines}")
         raise AssertionError("Test failed: " + "\n".join(log_lines))
 
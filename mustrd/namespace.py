@@ -92,6 +92,23 @@ class TRIPLESTORE(DefinedNamespace):
     username: URIRef
     password: URIRef
     repository: URIRef
+    isolateGraphs: URIRef  # mint per-spec input/output graphs (mustrd.isolation)
+    # HTTP connection pool and retry policy (mustrd.http_session)
+    poolSize: URIRef
+    maxRetries: URIRef
+    retryBackoff: URIRef
+    # What an update spec reads back from the store (mustrd.read_back)
+    readBack: URIRef
+    Dataset: URIRef
+    WrittenGraphs: URIRef
+    ThenSubjects: URIRef
+    # How a given is sent to the store (mustrd.upload)
+    uploadFormat: URIRef
+    Turtle: URIRef
+    NTriples: URIRef
+    gzipUpload: URIRef
+    uploadChunkSize: URIRef
+    reuseGivens: URIRef  # skip re-uploading a given already loaded (mustrd.loaded_givens)
 
     # Stardog config parameters
     token: URIRef       # bearer token (preferred); falls back to username/password
@@ -5,9 +5,12 @@ their owl:Ontology metadata, deriving declared class/property terms, extracting
 the terms an ABox or a SPARQL query references, namespace helpers, and prefix
 shortening. Knows nothing about specs, coverage, or competency questions.
 """
+import hashlib
 import logging
 import os
 import re
+import threading
+from collections import OrderedDict, namedtuple
 from pathlib import Path
 from typing import Optional
 
@@ -129,6 +132,67 @@ def expand_ontology_files(paths) -> list:
     return unique
 
 
+class OntologySet:
+    """The ontology files under some paths, each parsed at most once.
+
+    A report reads the ontology four ways: the merged graph coverage is measured
+    against (`load_ontology`), the owl:Ontology header of each file
+    (`ontology_report`), which file's ontology declares each term
+    (`term_ontology_index`), and where in which file (`coverage.term_source_index`,
+    for --term-links file). Each used to expand the paths and parse every file
+    itself, so a large ontology was parsed four times per report. Hand them one
+    OntologySet instead — each also still accepts the paths themselves — and
+    they share its per-file graphs and their union.
+
+    Files are parsed when first asked for. One that does not parse is logged once
+    and has no graph.
+    """
+
+    def __init__(self, paths):
+        self.paths = tuple(paths or ())
+        self._graphs = None
+        self._union = None
+
+    @property
+    def files(self) -> list:
+        return list(self._parsed())
+
+    def _parsed(self) -> "OrderedDict[Path, Optional[Graph]]":
+        if self._graphs is None:
+            self._graphs = OrderedDict()
+            for f in expand_ontology_files(self.paths):
+                g = Graph()
+                try:
+                    g.parse(str(f))
+                except Exception as e:
+                    log.warning(f"Could not parse ontology file {f}: {e}")
+                    g = None
+                self._graphs[f] = g
+        return self._graphs
+
+    def graphs(self):
+        """(file, graph) for each file, in order; graph None if it did not parse."""
+        return self._parsed().items()
+
+    def union(self) -> Optional[Graph]:
+        """Every file's triples and prefixes in one graph; None if there are no files."""
+        if self._union is None and self._parsed():
+            union = Graph()
+            for g in self._parsed().values():
+                if g is None:
+                    continue
+                for prefix, ns in g.namespaces():
+                    union.bind(prefix, ns)
+                union += g
+            self._union = union
+        return self._union
+
+
+def ontology_set(paths) -> OntologySet:
+    """`paths` as an OntologySet, if it is not one already."""
+    return paths if isinstance(paths, OntologySet) else OntologySet(paths)
+
+
 def ontology_report(paths, link_base=None, href=None) -> list:
     """Per-file summary of the ontologies under `paths`, for the report header.
 
@@ -138,15 +202,12 @@ def ontology_report(paths, link_base=None, href=None) -> list:
     owl:Ontology still appears (uri/description None); a file declaring several
     yields one row each. `href`, if given, is a callable path->url that overrides
     the default `link_base`-relative href (e.g. absolute GitHub URLs in CI).
+    `paths` may be an OntologySet.
     """
     rows = []
-    for f in expand_ontology_files(paths):
+    for f, g in ontology_set(paths).graphs():
         link = _source_link(f, link_base, href)
-        g = Graph()
-        try:
-            g.parse(str(f))
-        except Exception as e:
-            log.warning(f"Could not parse ontology file {f}: {e}")
+        if g is None:
             rows.append({**link, "uri": None, "description": None})
             continue
         ontologies = sorted(str(s) for s in g.subjects(RDF.type, OWL.Ontology))
@@ -169,17 +230,9 @@ def _first_literal(graph: Graph, subject, predicates) -> Optional[str]:
 
 
 def load_ontology(paths) -> Optional[Graph]:
-    """Parse every ontology file under `paths` (files or dirs) into one graph."""
-    files = expand_ontology_files(paths)
-    if not files:
-        return None
-    g = Graph()
-    for f in files:
-        try:
-            g.parse(str(f))
-        except Exception as e:
-            log.warning(f"Could not parse ontology file {f}: {e}")
-    return g
+    """Parse every ontology file under `paths` (files or dirs, or an
+    OntologySet) into one graph."""
+    return ontology_set(paths).union()
 
 
 def term_ontology_index(paths) -> dict:
@@ -187,14 +240,11 @@ def term_ontology_index(paths) -> dict:
     it (the first owl:Ontology in that file). The authoritative basis for linking a
     term to its ontology — based on where the term is actually declared, not a
     lexical namespace guess. Terms in a file with no owl:Ontology header are
-    omitted (nothing authoritative to point at). First declaration wins."""
+    omitted (nothing authoritative to point at). First declaration wins.
+    `paths` may be an OntologySet."""
     index = {}
-    for f in expand_ontology_files(paths):
-        g = Graph()
-        try:
-            g.parse(str(f))
-        except Exception as e:
-            log.warning(f"Could not parse ontology file {f}: {e}")
+    for _, g in ontology_set(paths).graphs():
+        if g is None:
             continue
         onts = sorted(str(s) for s in g.subjects(RDF.type, OWL.Ontology))
         if not onts:
@@ -267,11 +317,74 @@ def _collect_uris(root) -> set:
     return found
 
 
+CacheInfo = namedtuple("CacheInfo", "hits misses maxsize currsize")
+
+
+class _QueryTermCache:
+    """The IRIs of the most recently used queries, keyed by a hash of the text.
+
+    Coverage, CQ coverage and the report each ask for the terms of the same
+    queries, and parsing is by far the dearest part of answering. One process
+    parses each distinct query once, while it stays among the last `maxsize`
+    asked about. Keyed by hash, so the cache does not keep every query's text.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._terms = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query_text: str, parse) -> frozenset:
+        key = hashlib.sha256(query_text.encode("utf-8")).digest()
+        with self._lock:
+            if key in self._terms:
+                self.hits += 1
+                self._terms.move_to_end(key)
+                return self._terms[key]
+            self.misses += 1
+        terms = frozenset(parse(query_text))
+        with self._lock:
+            self._terms[key] = terms
+            self._terms.move_to_end(key)
+            while len(self._terms) > self.maxsize:
+                self._terms.popitem(last=False)
+        return terms
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._terms))
+
+    def clear(self):
+        with self._lock:
+            self._terms.clear()
+            self.hits = self.misses = 0
+
+
+QUERY_TERM_CACHE_SIZE = 4096
+_query_terms = _QueryTermCache(QUERY_TERM_CACHE_SIZE)
+
+
 def query_uris(query_text: str) -> set:
     """Every IRI referenced in a query's parsed algebra (ignores comments).
 
     Handles SELECT/CONSTRUCT/ASK/DESCRIBE and, as a fallback, SPARQL Update.
+    Each distinct query is parsed once per process (see `_QueryTermCache`); the
+    set returned is the caller's own.
     """
+    return set(_query_terms.get(query_text, _parse_query_uris))
+
+
+def query_uris_cache_info() -> CacheInfo:
+    """Hits, misses and size of the cache behind `query_uris`."""
+    return _query_terms.info()
+
+
+def query_uris_cache_clear():
+    _query_terms.clear()
+
+
+def _parse_query_uris(query_text: str) -> set:
     try:
         algebra = prepareQuery(query_text).algebra
     except Exception as query_exc:
@@ -0,0 +1,173 @@
+"""Copy-on-write givens for the rdflib backend.
+
+An rdflib spec runs its `when` against the given graph itself, and an update
+used to change it in place: the parsed given — shared by the spec's every run,
+and by the same spec on every rdflib store — came back with the update applied.
+Re-running a `Specification` then started from the wrong data, and anything
+running specs side by side needed its own deep copy of every given.
+
+`overlay(given)` instead puts a `ConjunctiveGraph` over an `OverlayStore`: reads
+go through to the given's own store, which is never written to, and writes land
+in a delta of their own — added quads in a Memory store, deleted ones as
+tombstones. An update spec copies nothing up front and pays only for what it
+changes, and the given is exactly as parsed afterwards.
+
+Until something is written, every read is passed straight through to the base
+store; only an overlay with changes pays for merging the two.
+"""
+from typing import Iterator, Set, Tuple
+
+from rdflib import ConjunctiveGraph, Graph
+from rdflib.plugins.stores.memory import Memory
+from rdflib.store import Store
+
+
+class OverlayStore(Store):
+    """A writable view of `base` that never writes to it."""
+
+    context_aware = True
+    formula_aware = False
+    graph_aware = True
+    transaction_aware = False
+
+    def __init__(self, base: Store):
+        super().__init__()
+        self.base = base
+        self.delta = Memory()
+        # (triple, context identifier) of every base quad deleted through the view.
+        self.removed: Set[Tuple] = set()
+        self.dropped: Set = set()
+        self._graphs = {}
+        # The base's own graph objects, by identifier. Lookups in the base go
+        # through these: a Memory store remembers the last graph object it was
+        # asked about for each context, and must never be handed one of ours.
+        self._base_graphs = {context.identifier: context for context in base.contexts()}
+        for prefix, namespace in base.namespaces():
+            self.delta.bind(prefix, namespace, override=True)
+
+    def _changed(self) -> bool:
+        return bool(self.removed or self.dropped or len(self.delta))
+
+    def _graph(self, identifier) -> Graph:
+        """The context `identifier`, as a graph over this store, not the base."""
+        if identifier not in self._graphs:
+            self._graphs[identifier] = Graph(store=self, identifier=identifier)
+        return self._graphs[identifier]
+
+    def _base_triples(self, triple_pattern, context):
+        if context is None:
+            return self.base.triples(triple_pattern)
+        base_context = self._base_graphs.get(_identifier(context))
+        return self.base.triples(triple_pattern, base_context) if base_context is not None else ()
+
+    def _delta_triples(self, triple_pattern, context):
+        return self.delta.triples(triple_pattern, None if context is None else self._graph(_identifier(context)))
+
+    def _base_contexts(self, triple) -> list:
+        return [context.identifier for context in self.base.contexts(triple)
+                if (triple, context.identifier) not in self.removed]
+
+    def _delta_contexts(self, triple) -> list:
+        return [context.identifier for context in self.delta.contexts(triple)]
+
+    def _contexts_of(self, triple) -> Iterator[Graph]:
+        for identifier in self._base_contexts(triple) + self._delta_contexts(triple):
+            yield self._graph(identifier)
+
+    def add(self, triple, context, quoted: bool = False):
+        identifier = _identifier(context)
+        self.dropped.discard(identifier)
+        if (triple, identifier) in self.removed:
+            # Deleted from the base and added back: the base quad stands again.
+            self.removed.discard((triple, identifier))
+            return
+        if any(c.identifier == identifier for c in self.base.contexts(triple)):
+            return
+        self.delta.add(triple, self._graph(identifier), quoted)
+
+    def remove(self, triple_pattern, context=None):
+        identifier = None if context is None else _identifier(context)
+        for triple, contexts in list(self.triples(triple_pattern, context)):
+            targets = [identifier] if identifier is not None else [c.identifier for c in contexts]
+            for target in targets:
+                if target in self._delta_contexts(triple):
+                    self.delta.remove(triple, self._graph(target))
+                else:
+                    self.removed.add((triple, target))
+
+    def triples(self, triple_pattern, context=None):
+        if not self._changed():
+            for triple, contexts in self._base_triples(triple_pattern, context):
+                yield triple, (self._graph(c.identifier) for c in contexts)
+            return
+
+        identifier = None if context is None else _identifier(context)
+        if identifier in self.dropped:
+            return
+        # Read as the union, a triple in both layers is still one triple.
+        from_base = set()
+        for triple, _ in self._base_triples(triple_pattern, context):
+            live = self._base_contexts(triple)
+            if (identifier in live) if identifier is not None else live:
+                from_base.add(triple)
+                yield triple, self._contexts_of(triple)
+        for triple, _ in self._delta_triples(triple_pattern, context):
+            if triple not in from_base:
+                yield triple, self._contexts_of(triple)
+
+    def __len__(self, context=None) -> int:
+        if not self._changed():
+            if context is None:
+                return len(self.base)
+            base_context = self._base_graphs.get(_identifier(context))
+            return self.base.__len__(base_context) if base_context is not None else 0
+        return sum(1 for _ in self.triples((None, None, None), context))
+
+    def contexts(self, triple=None):
+        if triple is not None:
+            return self._contexts_of(triple)
+        identifiers = list(self._base_graphs)
+        identifiers += [context.identifier for context in self.delta.contexts()
+                        if context.identifier not in identifiers]
+        return (self._graph(identifier) for identifier in identifiers
+                if identifier not in self.dropped)
+
+    def add_graph(self, graph: Graph):
+        self.dropped.discard(graph.identifier)
+        self.delta.add_graph(self._graph(graph.identifier))
+
+    def remove_graph(self, graph: Graph):
+        self.remove((None, None, None), graph)
+        self.delta.remove_graph(self._graph(graph.identifier))
+        self.dropped.add(graph.identifier)
+
+    def bind(self, prefix, namespace, override: bool = True):
+        self.delta.bind(prefix, namespace, override=override)
+
+    def namespace(self, prefix):
+        return self.delta.namespace(prefix)
+
+    def prefix(self, namespace):
+        return self.delta.prefix(namespace)
+
+    def namespaces(self):
+        return self.delta.namespaces()
+
+
+def _identifier(context):
+    return context.identifier if isinstance(context, Graph) else context
+
+
+def overlay(given: Graph) -> ConjunctiveGraph:
+    """A copy-on-write view of `given`: reads see it, writes never reach it."""
+    view = ConjunctiveGraph(store=OverlayStore(given.store), identifier=given.identifier)
+    if isinstance(given, ConjunctiveGraph):
+        # A ConjunctiveGraph made without an identifier names itself and its
+        # default context apart, and rdflib's updates write to the former: the
+        # view keeps both, so an update lands where it would have in the given.
+        view.default_context = view.get_context(given.default_context.identifier)
+    return view
+
+
+def is_overlay(graph: Graph) -> bool:
+    return isinstance(graph.store, OverlayStore)
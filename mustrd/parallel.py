@@ -0,0 +1,185 @@
+"""Run specs concurrently — the engine behind `--jobs`.
+
+`run_spec` is the unit of work and stays exactly as it is; this module only
+decides how many of them are in flight at once, and where.
+
+Two kinds of store, two kinds of pool:
+
+* **rdflib** specs are CPU-bound and run in this interpreter, so they go to a
+  process pool. Each worker gets its own pickled copy of the spec — and of the
+  `triple_store` dict `upload_given` writes the given into, which would
+  otherwise be shared between every rdflib spec in the run.
+* **HTTP stores** (GraphDB, Stardog, Anzo) are latency-bound, so they go to a
+  thread pool. Every spec against one store loads its given into the same
+  configured `input_graph`, so two of them in flight at once would clobber each
+  other's data. Specs are therefore run one after another *per store*, and the
+  stores run concurrently with each other and with the rdflib pool — unless the
+  store is configured with `isolateGraphs`, in which case each spec has graphs
+  of its own (mustrd.isolation) and they all go to the pool independently.
+
+`jobs` is one budget shared by both pools: at most `jobs` specs are in flight,
+whichever pool they are in. With rdflib specs to run, at least one job goes to
+the process pool, and the thread pool gets at most `jobs - 1`.
+
+Worker processes are not forked from this one. By the time rdflib specs are
+handed out the thread pool may already be running, and a child forked while a
+thread holds a lock (logging's, urllib3's pool) inherits it held, with nobody
+left to release it. The pool starts its workers from a clean interpreter:
+`forkserver` where the platform has it, `spawn` otherwise.
+
+Results come back in the order the specs went in, as the same `SpecResult`
+objects a serial run produces.
+"""
+import logging
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import replace
+from typing import List, Tuple
+
+from rdflib import ConjunctiveGraph
+
+from mustrd.diff_render import diff_limits, set_diff_limits
+from mustrd.isolation import is_isolated
+from mustrd.mustrd import Specification, SpecResult, run_spec
+from mustrd.namespace import TRIPLESTORE
+from mustrd.scheduler import FILE_ORDER, in_order
+
+log = logging.getLogger(__name__)
+
+
+def resolve_jobs(jobs: int) -> int:
+    """`jobs` as a worker count: 0 (or less) means one per CPU."""
+    if jobs is None:
+        return 1
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def timed_run_spec(spec) -> Tuple[SpecResult, float]:
+    """`run_spec`, plus how long it took. Module level so a process pool can
+    pickle it."""
+    start = time.perf_counter()
+    result = run_spec(spec)
+    return result, time.perf_counter() - start
+
+
+def to_worker(spec):
+    """A spec in a form that survives pickling into a worker process.
+
+    A ConjunctiveGraph pickles with its own identifier standing in for its
+    default context's, so the given comes back with every triple in a named
+    graph and an empty default graph — and an unqualified DELETE then matches
+    nothing. The store pickles faithfully, so the given travels as its store
+    plus the default context's identifier and is rebuilt around them.
+    """
+    given = getattr(spec, "given", None)
+    if isinstance(spec, Specification) and isinstance(given, ConjunctiveGraph):
+        return replace(spec, given=None), (given.store, given.default_context.identifier)
+    return spec, None
+
+
+def from_worker(portable):
+    """The spec `to_worker` packed, with its given rebuilt."""
+    spec, given = portable
+    if given is not None:
+        store, identifier = given
+        spec = replace(spec, given=ConjunctiveGraph(store=store, identifier=identifier))
+    return spec
+
+
+def from_worker_run(portable) -> Tuple[SpecResult, float]:
+    """`timed_run_spec` on a spec packed by `to_worker`."""
+    return timed_run_spec(from_worker(portable))
+
+
+def store_key(spec) -> str:
+    """Which store a spec runs against, as a grouping key. Specs sharing a key
+    share an input graph."""
+    triple_store = spec.triple_store
+    return str(triple_store.get("uri") or triple_store["type"])
+
+
+def partition(specs: list) -> Tuple[List[int], dict]:
+    """Split spec positions into (in-process rdflib, {store key: [positions]}).
+
+    Anything that is not a runnable Specification — a SpecInvalid handed through
+    for reporting — lands in its own serial group: `run_spec` returns it as-is,
+    so there is nothing to gain from a worker. A spec against an isolating store
+    is a group of its own.
+    """
+    local, remote = [], defaultdict(list)
+    for position, spec in enumerate(specs):
+        if not isinstance(spec, Specification):
+            remote[None].append(position)
+        elif spec.triple_store["type"] == TRIPLESTORE.RdfLib:
+            local.append(position)
+        elif is_isolated(spec.triple_store):
+            remote[(store_key(spec), position)].append(position)
+        else:
+            remote[store_key(spec)].append(position)
+    return local, dict(remote)
+
+
+def process_pool(workers: int) -> ProcessPoolExecutor:
+    """A pool of `workers` processes that are not forked from this one, with
+    this one's diff limits."""
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method),
+                               initializer=set_diff_limits, initargs=(diff_limits(),))
+
+
+def _run_serially(specs: list, positions: List[int], outcomes: list):
+    for position in positions:
+        outcomes[position] = timed_run_spec(specs[position])
+
+
+def run_specs_timed(specs: list, jobs: int = 1, order: str = FILE_ORDER) -> List[Tuple[SpecResult, float]]:
+    """(result, seconds) for every spec, in input order, with up to `jobs`
+    specs in flight. `jobs=1` is the plain serial loop. `order` is the order
+    they run in (mustrd.scheduler)."""
+    return in_order(specs, order, lambda scheduled: _run_specs_timed(scheduled, jobs))
+
+
+def _run_specs_timed(specs: list, jobs: int) -> List[Tuple[SpecResult, float]]:
+    jobs = resolve_jobs(jobs)
+    if jobs <= 1 or len(specs) < 2:
+        return [timed_run_spec(spec) for spec in specs]
+
+    outcomes = [None] * len(specs)
+    local, remote = partition(specs)
+    groups = list(remote.values())
+    if len(local) == 1:
+        # Not worth a process: it runs on a thread, like a store group.
+        groups.append(local)
+        local = []
+    thread_workers = min(len(groups), jobs - 1 if local else jobs)
+    process_workers = min(len(local), jobs - thread_workers)
+    log.info(f"Running {len(specs)} specs with {jobs} jobs: {len(local)} in {process_workers} "
+             f"process(es), {len(specs) - len(local)} across {len(groups)} group(s) "
+             f"on {thread_workers} thread(s)")
+
+    # The process pool is started before any thread is.
+    with (process_pool(process_workers) if local else nullcontext()) as processes, \
+            ThreadPoolExecutor(max_workers=max(1, thread_workers)) as threads:
+        running = [threads.submit(_run_serially, specs, positions, outcomes) for positions in groups]
+        if local:
+            # Chunked so a suite of thousands of small specs is not dominated
+            # by one round trip to a worker per spec.
+            chunksize = max(1, len(local) // (process_workers * 4))
+            for position, outcome in zip(local, processes.map(
+                    from_worker_run, [to_worker(specs[p]) for p in local],
+                    chunksize=chunksize)):
+                outcomes[position] = outcome
+        for group in running:
+            group.result()
+    return outcomes
+
+
+def run_specs(specs: list, jobs: int = 1, order: str = FILE_ORDER) -> List[SpecResult]:
+    """Every spec's result, in input order, with up to `jobs` in flight."""
+    return [result for result, _ in run_specs_timed(specs, jobs, order)]
@@ -0,0 +1,93 @@
+"""What a remote store sends back after an update spec's `when`.
+
+An update's result is whatever the store holds once it has run, so every remote
+backend follows the update with a `CONSTRUCT {?s ?p ?o} WHERE {?s ?p ?o}` and
+compares that with the spec's `then`. Over a Stardog dataset that includes
+materialised and virtual reference graphs, that means fetching every one of
+them after every update spec.
+
+`triplestore:readBack` on a store's config narrows that read-back:
+
+* `triplestore:Dataset` (the default) — everything the store's queries run
+  over, as before.
+* `triplestore:WrittenGraphs` — only the graphs mustrd writes to: the input
+  graph the given is loaded into, and the output graph where there is one. The
+  reference graphs are left on the server, and a `then` no longer restates them.
+* `triplestore:ThenSubjects` — only triples about the subjects the `then`
+  mentions. Anything the update did to other subjects goes unseen, so this
+  suits specs whose update is known to touch only what they assert on. A `then`
+  with a blank-node subject cannot be named in a query, and an empty one names
+  nothing to look at: both are read back whole.
+
+Both narrower modes change what an update spec checks, which is why neither is
+the default. GraphDB and Stardog also stream the read-back as N-Triples, which
+parses line by line and far faster than the Turtle it used to come back as.
+"""
+import codecs
+import logging
+from dataclasses import replace
+from typing import List, Optional
+
+from rdflib import BNode, Graph
+from rdflib.plugins.parsers.ntriples import NTGraphSink, W3CNTriplesParser
+from requests import Response
+
+from .namespace import MUST, TRIPLESTORE
+
+log = logging.getLogger(__name__)
+
+READ_BACK_ALL = "CONSTRUCT {?s ?p ?o} WHERE { ?s ?p ?o }"
+NTRIPLES = "application/n-triples"
+
+
+def read_back_mode(triple_store: dict):
+    return triple_store.get("read_back") or TRIPLESTORE.Dataset
+
+
+def written_graphs(triple_store: dict) -> List[str]:
+    """The graphs mustrd itself writes to on this store."""
+    return [str(triple_store[key]) for key in ("input_graph", "output_graph") if triple_store.get(key)]
+
+
+def then_subjects(then_graph: Graph) -> Optional[List]:
+    """The subjects of `then_graph`, or None if it has none or one of them is a
+    blank node."""
+    subjects = set(then_graph.subjects(unique=True))
+    if not subjects or any(isinstance(subject, BNode) for subject in subjects):
+        return None
+    return sorted(subjects)
+
+
+def scope_read_back(spec):
+    """`spec`, with its store's read-back narrowed to its `then`'s subjects when
+    the store asks for that and the spec can have it."""
+    triple_store = spec.triple_store
+    if read_back_mode(triple_store) != TRIPLESTORE.ThenSubjects \
+            or not isinstance(spec.then.value, Graph) or not spec.when \
+            or spec.when[-1].queryType != MUST.UpdateSparql:
+        return spec
+    subjects = then_subjects(spec.then.value)
+    if subjects is None:
+        log.debug(f"{spec.spec_uri}: no subjects to scope the read-back to, reading back the whole dataset")
+        return spec
+    return replace(spec, triple_store=dict(triple_store, read_back_subjects=subjects))
+
+
+def read_back_query(triple_store: dict) -> str:
+    """The CONSTRUCT that reads an update's result back from `triple_store`."""
+    subjects = triple_store.get("read_back_subjects")
+    if subjects is None:
+        return READ_BACK_ALL
+    values = " ".join(subject.n3() for subject in subjects)
+    return f"CONSTRUCT {{?s ?p ?o}} WHERE {{ VALUES ?s {{ {values} }} ?s ?p ?o }}"
+
+
+def parse_ntriples(response: Response) -> Graph:
+    """Parse a streamed N-Triples response as it arrives, then release it."""
+    graph = Graph()
+    try:
+        response.raw.decode_content = True
+        W3CNTriplesParser(NTGraphSink(graph)).parse(codecs.getreader("utf-8")(response.raw))
+    finally:
+        response.close()
+    return graph
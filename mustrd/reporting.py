@@ -26,13 +26,16 @@ from mustrd.TestResult import (
 )
 from mustrd.coverage import compute_coverage, apply_term_links
 from mustrd.ontology import (
-    load_ontology, ontology_report, local_name, term_ontology_index,
+    load_ontology, ontology_report, local_name, term_ontology_index, query_uris_cache_info,
+    OntologySet, ontology_set,
 )
 from mustrd.cq import cq_facts
+from mustrd.spec_terms import SpecTermIndex
 from mustrd.coverage_rdf import coverage_graph, cq_graph
 from mustrd.coverage_render import coverage_context, read_ontologies
 from mustrd.cq_render import cq_report
 from mustrd.namespace import CQ
+from mustrd.spec_component import resolved_whens
 
 logger = logging.getLogger(__name__)
 
@@ -140,24 +143,34 @@ def _link_report_refs(coverage, href):
 # ---------------------------------------------------------------------------
 # Spec-dict projection (shared input shape for coverage).
 # ---------------------------------------------------------------------------
-def coverage_spec(spec, outcome, test_name):
+def coverage_spec(spec, outcome, test_name, queries=None):
     """Project a mustrd Specification + its outcome string into the plain dict
-    compute_coverage consumes. `outcome` is 'passed' / 'failed' / 'skipped'."""
-    when = getattr(spec, 'when', None)
-    # `when` may be a single WhenSpec or a list of them.
-    when_list = when if isinstance(when, list) else ([when] if when is not None else [])
-    queries = [w.value for w in when_list if isinstance(getattr(w, 'value', None), str)]
+    compute_coverage consumes. `outcome` is 'passed' / 'failed' / 'skipped'.
+    `queries` overrides the query texts read off the spec's whens — for a spec
+    that ran in another process, whose Anzo-sourced whens were resolved there."""
+    if queries is None:
+        queries = spec_queries(spec)
     uri = getattr(spec, 'spec_uri', None)
     return {
         "name": getattr(spec, 'spec_file_name', test_name),
         "uri": str(uri) if uri is not None else None,
         "passed": outcome == "passed",
         "given": getattr(spec, 'given', None),
+        "given_fingerprint": getattr(spec, 'given_fingerprint', None),
         "queries": queries,
         "source_file": getattr(spec, 'spec_source_file', None),
     }
 
 
+def spec_queries(spec) -> list:
+    """The query text of each of `spec`'s whens — including those fetched from
+    Anzo, once the spec has run (spec_component.resolved_whens)."""
+    when = getattr(spec, 'when', None)
+    # `when` may be a single WhenSpec or a list of them.
+    when_list = when if isinstance(when, list) else ([when] if when is not None else [])
+    return [w.value for w in resolved_whens(when_list) if isinstance(getattr(w, 'value', None), str)]
+
+
 # ---------------------------------------------------------------------------
 # Competency questions.
 # ---------------------------------------------------------------------------
@@ -264,44 +277,49 @@ def run_ident():
     }
 
 
-def _coverage_graph(coverage, ontology_paths, ident):
+def _coverage_graph(coverage, ontology_files, ident):
     """Build the canonical coverage RDF graph."""
     ontologies = [{"uri": r["uri"], "version": r.get("version"),
                    "description": r.get("description"), "path": r.get("path")}
-                  for r in ontology_report(ontology_paths) if r.get("uri")]
+                  for r in ontology_report(ontology_files) if r.get("uri")]
     return coverage_graph(coverage, ontologies,
-                          term_ontology=term_ontology_index(ontology_paths),
+                          term_ontology=term_ontology_index(ontology_files),
                           **ident)
 
 
-def compute(all_specs, cq_defs, ontology_paths, report_cq, ident):
+def compute(all_specs, cq_defs, ontology_paths, report_cq, ident, index=None):
     """Compute coverage and build its canonical RDF graph. Returns
     (coverage_dict, ontology_graph, graph); (None, None, None) on failure or
-    when nothing is declared."""
+    when nothing is declared. `ontology_paths` may be an OntologySet, so the
+    files are parsed once for everything here."""
     try:
-        ontology_graph = load_ontology(ontology_paths)
+        ontology_files = ontology_set(ontology_paths)
+        ontology_graph = load_ontology(ontology_files)
         coverage = compute_coverage(all_specs, ontology=ontology_graph,
-                                    cq_defs=cq_defs if report_cq else None)
+                                    cq_defs=cq_defs if report_cq else None, index=index)
         if coverage is None:
             return None, None, None
-        return coverage, ontology_graph, _coverage_graph(coverage, ontology_paths, ident)
+        return coverage, ontology_graph, _coverage_graph(coverage, ontology_files, ident)
     except Exception as e:
         logger.warning(f"Could not compute ontology term coverage: {e}")
         return None, None, None
 
 
 def build_report_data(all_specs, cq_defs, opts: ReportOptions,
-                      report_coverage: bool, report_cq: bool, ident):
+                      report_coverage: bool, report_cq: bool, ident, ontologies=None):
     """The canonical RDF outputs of a run: (coverage, ontology_graph, graph).
 
     With an ontology it's the full coverage graph (with a CQ overlay when --cq);
     with `--cq` alone it's a CQ-only graph (no measurements). compute() returns
-    None coverage if nothing is declared."""
+    None coverage if nothing is declared. Each spec's terms are extracted once,
+    into one SpecTermIndex both of those share; the ontology files are read
+    through `ontologies`, an OntologySet, when the caller has one."""
+    index = SpecTermIndex()
     coverage, ontology_graph, graph = \
-        compute(all_specs, cq_defs, opts.ontology_paths, report_cq, ident) \
+        compute(all_specs, cq_defs, ontologies or opts.ontology_paths, report_cq, ident, index) \
         if report_coverage else (None, None, None)
     if graph is None and report_cq:              # --cq with no ontology
-        graph = cq_graph(cq_facts(cq_defs), **ident)
+        graph = cq_graph(cq_facts(cq_defs, index), **ident)
     return coverage, ontology_graph, graph
 
 
@@ -322,33 +340,35 @@ def render_result_list(test_results, is_mustrd):
     return result_list.render()
 
 
-def render_markdown(graph, ontology_graph, coverage, link_base, opts: ReportOptions):
+def render_markdown(graph, ontology_graph, coverage, link_base, opts: ReportOptions, ontologies=None):
     """Assemble the report, rendered entirely FROM the RDF graph (+ the
     ontology for the subClassOf tree). Two H2 sub-reports under a top title:
 
       # Ontologies Report
       ## Coverage Report              (when an ontology was checked)
       ## Competency Questions Report  (--cq)
+
+    `ontologies`, an OntologySet, saves re-parsing the ontology for --term-links.
     """
     parts = []
     href = _link_href(link_base)
     if coverage is not None and graph is not None and ontology_graph is not None:
         ctx = coverage_context(graph, ontology_graph)
         _link_report_refs(ctx, href)
-        apply_term_links(ctx, opts.term_links, opts.ontology_paths, link_base)
+        apply_term_links(ctx, opts.term_links, ontologies or opts.ontology_paths, link_base)
         parts.append("# Ontologies Report")
         parts.append("## Coverage Report")
-        ontologies = read_ontologies(graph)
-        for o in ontologies:
+        ontology_rows = read_ontologies(graph)
+        for o in ontology_rows:
             o["url"] = href(o["path"])
-        if ontologies:
-            parts.append(render_ontologies(ontologies))
+        if ontology_rows:
+            parts.append(render_ontologies(ontology_rows))
         parts.append(render_term_coverage(ctx))
         if ctx.get("tbox_in_data"):
             parts.append(render_tbox_in_data(ctx["tbox_in_data"]))
     if opts.cq and graph is not None:
         cqr = cq_report(graph, ontology_graph, href)
-        apply_term_links(cqr, opts.term_links, opts.ontology_paths, link_base)
+        apply_term_links(cqr, opts.term_links, ontologies or opts.ontology_paths, link_base)
         parts.append("## Competency Questions Report" if coverage is not None
                      else "# Competency Questions Report")
         parts.append(render_cq_table(cqr["per_cq"], show_coverage=cqr["has_ontology"]))
@@ -388,8 +408,12 @@ def produce_report(all_specs, cq_defs, test_results, last_is_mustrd,
     # call, so every graph below has to be handed the same one or they describe
     # different runs.
     ident = run_ident()
+    # Likewise one OntologySet, so each ontology file is parsed once however many
+    # parts of the report read it.
+    ontologies = OntologySet(opts.ontology_paths)
     coverage, ontology_graph, graph = build_report_data(
-        all_specs, cq_defs, opts, report_coverage, report_cq, ident)
+        all_specs, cq_defs, opts, report_coverage, report_cq, ident, ontologies)
+    logger.debug("query_uris cache: %s", query_uris_cache_info())
 
     # Markdown report. What --md contains is decided by whether the assembled
     # report has anything in it, not by which graphs were built: --viewer asks for
@@ -400,7 +424,7 @@ def produce_report(all_specs, cq_defs, test_results, last_is_mustrd,
         md = ""
         if report_coverage or report_cq:
             md = render_markdown(graph, ontology_graph, coverage,
-                                 os.path.dirname(opts.md_path) or ".", opts)
+                                 os.path.dirname(opts.md_path) or ".", opts, ontologies)
         if not md.strip():
             md = render_result_list(test_results, last_is_mustrd)
         _ensure_parent(opts.md_path)
@@ -445,7 +469,7 @@ def produce_report(all_specs, cq_defs, test_results, last_is_mustrd,
 
     # To the terminal — only for the human-facing flags (not RDF/viewer-only runs).
     if (opts.term_coverage or opts.cq) and terminal_writer is not None:
-        body = render_markdown(graph, ontology_graph, coverage, os.getcwd(), opts)
+        body = render_markdown(graph, ontology_graph, coverage, os.getcwd(), opts, ontologies)
         terminal_writer(body)
 
     return coverage, ontology_graph, graph
@@ -1,12 +1,11 @@
 import argparse
 import logger_setup
 import sys
-import os
-from rdflib import Graph
 from .mustrd import get_triple_store_graph, get_credentials, run_specs, get_triple_stores, review_results, validate_specs, get_specs
 from pathlib import Path
 from .namespace import TRIPLESTORE
-from .utils import get_project_root
+from .scheduler import FILE_ORDER, ORDERS
+from .model_graphs import MUSTRD_ONTOLOGY, MUSTRD_SHAPES, model_graph
 log = logger_setup.setup_logger(__name__)
 
 
@@ -19,6 +18,9 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("-g", "--given", help="Override path for given files", default=None)
     parser.add_argument("-w", "--when", help="Override path for when files", default=None)
     parser.add_argument("-t", "--then", help="Override path for then files", default=None)
+    parser.add_argument("-j", "--jobs", help="Run up to N specs at once (0: one per CPU)", type=int, default=1)
+    parser.add_argument("--order", help="Run specs as read (file) or grouped by given (given)",
+                        choices=ORDERS, default=FILE_ORDER)
 
     return parser.parse_args()
 
@@ -26,7 +28,6 @@ def parse_args() -> argparse.Namespace:
 # https://github.com/Semantic-partners/mustrd/issues/108
 def main(argv):
     # Given_path = when_path = then_path = None
-    project_root = get_project_root()
     run_config = {}
     args = parse_args()
     run_config["spec_path"] = Path(args.put)
@@ -66,8 +67,8 @@ def main(argv):
         run_config["then_path"] = Path(args.then)
         log.info(f"Path for then folder is {run_config['then_path']}")
 
-    shacl_graph = Graph().parse(Path(os.path.join(project_root, "model/mustrdShapes.ttl")))
-    ont_graph = Graph().parse(Path(os.path.join(project_root, "model/ontology.ttl")))
+    shacl_graph = model_graph(MUSTRD_SHAPES)
+    ont_graph = model_graph(MUSTRD_ONTOLOGY)
 
     valid_spec_uris, spec_graph, invalid_spec_results = \
         validate_specs(run_config, triple_stores, shacl_graph, ont_graph)
@@ -75,7 +76,7 @@ def main(argv):
     specs, skipped_spec_results = \
         get_specs(valid_spec_uris, spec_graph, triple_stores, run_config)
 
-    results = invalid_spec_results + skipped_spec_results + run_specs(specs)
+    results = invalid_spec_results + skipped_spec_results + run_specs(specs, args.jobs, args.order)
 
     review_results(results, verbose)
 
@@ -7,26 +7,23 @@ The pytest plugin delegates its spec-generation to the functions here, keeping a
 single source of truth.
 """
 import logging
-import os
-import time
 from pathlib import Path
 
-from rdflib import Graph
-
 from mustrd.mustrd import (
-    validate_specs, get_specs, run_spec, review_results,
+    validate_specs, get_specs, review_results,
     SpecPassed, SpecPassedWithWarning,
     get_triple_store_graph, get_triple_stores, get_credentials,
 )
 from mustrd.config import parse_config
+from mustrd.model_graphs import MUSTRD_ONTOLOGY, MUSTRD_SHAPES, model_graph
 from mustrd.namespace import TRIPLESTORE
+from mustrd.parallel import run_specs_timed
 from mustrd.reporting import coverage_spec
 from mustrd.results_rdf import RunResult
+from mustrd.scheduler import FILE_ORDER
 from mustrd.TestResult import TestResult
-from mustrd.utils import get_mustrd_root
 
 logger = logging.getLogger(__name__)
-mustrd_root = get_mustrd_root()
 
 _RDFLIB_STORE = {"type": TRIPLESTORE.RdfLib, "uri": TRIPLESTORE.RdfLib}
 
@@ -70,8 +67,8 @@ def generate_specs(config, triple_stores, file_name="*", selected_tests=None,
     """Validate + build the Specifications for one TestConfig across the given
     triple stores. Returns runnable specs + skipped/invalid SpecResults.
     (Extracted from the plugin's generate_tests_for_config.)"""
-    shacl_graph = Graph().parse(Path(os.path.join(mustrd_root, "model/mustrdShapes.ttl")))
-    ont_graph = Graph().parse(Path(os.path.join(mustrd_root, "model/ontology.ttl")))
+    shacl_graph = model_graph(MUSTRD_SHAPES)
+    ont_graph = model_graph(MUSTRD_ONTOLOGY)
 
     valid_spec_uris, spec_graph, invalid_specs = validate_specs(
         config, triple_stores, shacl_graph, ont_graph, file_name or "*",
@@ -97,7 +94,7 @@ def _triple_store_name(spec):
 
 
 def run_config(config_path, secrets=None, selected_tests=None, ignore_focus=False,
-               verbose=False, review=False):
+               verbose=False, review=False, jobs=1, order=FILE_ORDER):
     """Run every spec in a MustrdTest config and return the plain-data inputs the
     reporting library consumes:
 
@@ -108,6 +105,11 @@ def run_config(config_path, secrets=None, selected_tests=None, ignore_focus=Fals
     - test_results: a TestResult per run spec, for the plain --md ResultList.
     - run_results: a RunResult per test (incl. skipped/invalid), for the results graph.
     - spec_paths: hasSpecPath dirs, for competency-question discovery.
+
+    `jobs` is how many specs may be in flight at once (0: one per CPU) — see
+    mustrd.parallel. `order` is the order they run in — `given` groups specs
+    sharing a given, `file` keeps the file order (mustrd.scheduler). Every list
+    above keeps the spec order either way.
     """
     test_configs = parse_config(Path(config_path))
     results, all_specs, spec_by_uri, test_results, run_results = [], [], {}, [], []
@@ -122,11 +124,8 @@ def run_config(config_path, secrets=None, selected_tests=None, ignore_focus=Fals
         specs, skipped = generate_specs(run_cfg, triple_stores,
                                         selected_tests=selected_tests,
                                         ignore_focus=ignore_focus)
-        for spec in specs:
+        for spec, (result, duration) in zip(specs, run_specs_timed(specs, jobs, order)):
             ts = _triple_store_name(spec)
-            t0 = time.perf_counter()
-            result = run_spec(spec)
-            duration = time.perf_counter() - t0
             results.append(result)
             outcome = _outcome(result)
             test_name = f"{getattr(spec, 'spec_file_name', spec.spec_uri)}@{ts}"
@@ -0,0 +1,158 @@
+"""SELECT results read from the wire a binding at a time.
+
+A remote store's SELECT used to come back as the whole response body decoded to
+one string, which `table_comparison` then parsed twice — once to check it was
+JSON, once to build the DataFrame. For a result of a few hundred MB that is the
+body, a decoded copy of it and two complete parse trees in memory at once.
+
+`StreamedSelectResult` instead wraps the still-open HTTP response, and
+`select_bindings` yields its `results.bindings` one object at a time as the
+chunks arrive, so only the binding being decoded (and the DataFrame columns
+being built from it) is ever held. In-memory results — rdflib's, or a body some
+caller already has as a string — go through the same `select_bindings`, so
+there is one way in for `json_results_to_panda_dataframe`.
+
+The stream is parsed with the standard library alone: everything before the
+bindings array and after it (the head, the closing braces, and any `link` or
+extra members) is kept and parsed, with the array emptied, as a check that the
+document as a whole is SPARQL JSON. A document that is not raises ValueError,
+exactly as `json.loads` would have for the string.
+
+A connection dropped mid-body surfaces from `requests` as ChunkedEncodingError
+(or urllib3's ProtocolError), both RequestExceptions, which mustrd reports as a
+SPARQL execution error. Read in one go, the same failure was a connection
+error, so `bindings` raises it as one.
+"""
+import codecs
+import json
+import re
+from typing import Iterable, Iterator, Union
+
+from requests import ConnectionError, Response
+from requests.exceptions import ChunkedEncodingError
+from urllib3.exceptions import ProtocolError
+
+CHUNK_SIZE = 64 * 1024
+
+_BINDINGS = re.compile(r'"bindings"\s*:\s*\[')
+_decoder = json.JSONDecoder()
+
+
+class StreamedSelectResult:
+    """A SELECT result still on the wire. It can be read once."""
+
+    def __init__(self, response: Response):
+        self.response = response
+
+    def bindings(self) -> Iterator[dict]:
+        try:
+            yield from iter_select_bindings(self._chunks())
+        finally:
+            self.close()
+
+    def _chunks(self) -> Iterator[bytes]:
+        try:
+            yield from self.response.iter_content(CHUNK_SIZE)
+        except (ChunkedEncodingError, ProtocolError) as e:
+            raise ConnectionError(f"Connection lost reading SPARQL results from {self.response.url}: {e}") from e
+
+    def close(self):
+        self.response.close()
+
+    def __repr__(self):
+        return f"StreamedSelectResult({self.response.url})"
+
+
+def select_bindings(result: Union[str, bytes, StreamedSelectResult]) -> Iterator[dict]:
+    """The `results.bindings` of a SPARQL JSON SELECT result, in order."""
+    if isinstance(result, StreamedSelectResult):
+        return result.bindings()
+    return iter(json.loads(result)["results"]["bindings"])
+
+
+def close_select_result(result):
+    """Release a result's connection if it was never read to the end."""
+    if isinstance(result, StreamedSelectResult):
+        result.close()
+
+
+def iter_select_bindings(chunks: Iterable[bytes]) -> Iterator[dict]:
+    chunks = iter(chunks)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+
+    def more() -> bool:
+        nonlocal buffer
+        for chunk in chunks:
+            if chunk:
+                buffer += decoder.decode(chunk)
+                return True
+        buffer += decoder.decode(b"", final=True)
+        return False
+
+    # Up to and including the '[' that opens the bindings array.
+    search_from = 0
+    while True:
+        match = _BINDINGS.search(buffer, search_from)
+        if match:
+            break
+        # The key may straddle two chunks; only look again at what could hold it.
+        search_from = max(0, len(buffer) - 32)
+        if not more():
+            # No bindings array at all: whatever the document is, parse it whole
+            # so it fails (or doesn't) exactly as it would have as a string.
+            yield from iter(json.loads(buffer)["results"]["bindings"])
+            return
+    prefix = buffer[:match.end()]
+    buffer = buffer[match.end():]
+
+    position = 0
+    expect_value = True
+    after_comma = False
+    while True:
+        while True:
+            position = _skip_whitespace(buffer, position)
+            if position < len(buffer):
+                break
+            buffer, position = buffer[position:], 0
+            if not more():
+                raise ValueError("SPARQL results ended inside the bindings array")
+        if buffer[position] == "]":
+            if expect_value and after_comma:
+                raise ValueError("Trailing ',' in the bindings array")
+            break
+        if not expect_value:
+            if buffer[position] != ",":
+                raise ValueError(f"Expected ',' in the bindings array, found {buffer[position]!r}")
+            position += 1
+            expect_value = after_comma = True
+            continue
+        try:
+            binding, end = _decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # Most likely the binding is cut off at the end of the chunk: drop
+            # what has been consumed and read on. At the end of the stream it is
+            # malformed, and the error stands.
+            buffer, position = buffer[position:], 0
+            if not more():
+                raise
+            continue
+        yield binding
+        position = end
+        expect_value = after_comma = False
+        if position > CHUNK_SIZE:
+            buffer, position = buffer[position:], 0
+
+    # The rest of the document, from the closing ']', read to the end.
+    while more():
+        pass
+    document = json.loads(prefix + buffer[position:])
+    results = document.get("results") if isinstance(document, dict) else None
+    if not isinstance(results, dict) or results.get("bindings") != []:
+        raise ValueError("Not SPARQL JSON results: no results.bindings array")
+
+
+def _skip_whitespace(text: str, position: int) -> int:
+    while position < len(text) and text[position] in " \t\n\r":
+        position += 1
+    return position
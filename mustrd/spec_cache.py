@@ -0,0 +1,183 @@
+"""On-disk cache of parsed, SHACL-validated spec files.
+
+`validate_specs` parses every `*.mustrd.ttl` and validates it against the spec
+shapes on every run. Both are pure functions of the file's bytes and the shapes,
+so the outcome is stored under `.mustrd_cache/` keyed on exactly those: a
+re-run over an unchanged suite loads each file's triples and verdict from a
+JSON entry — the triples as N-Triples, which is quicker to read than the spec's
+Turtle — and skips pyshacl.
+
+Entries are data, never code: the cache sits in the working directory, and
+anyone who can write there must not be able to run anything in the next test
+run by leaving a file behind. The worst a tampered entry can do is what editing
+the spec file itself could.
+
+The key is the SHA-256 of the file's path and content (the path because a
+relative IRI in a spec resolves against it), scoped by a fingerprint of the
+shapes and ontology graphs (canonicalised, so their blank nodes do not change it
+from run to run) and of the rdflib and pyshacl versions. Changing a spec, the
+model or either library misses the cache; nothing ever has to be invalidated by
+hand, and the directory can be deleted at any time.
+
+Nor does it grow without end. Each spec file has one entry: writing a new one
+for an edited file removes the old. Opening the cache removes whatever was
+cached against any other model or library version.
+
+Files that do not parse are not cached — they are re-read, and re-reported, on
+every run.
+
+The cache directory defaults to `.mustrd_cache` in the working directory.
+MUSTRD_CACHE_DIR moves it; setting it to `off` (or empty) disables it:
+
+    export MUSTRD_CACHE_DIR=off
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import pyshacl
+import rdflib
+from rdflib import Graph
+from rdflib.compare import to_canonical_graph
+
+log = logging.getLogger(__name__)
+
+CACHE_DIR_ENV = "MUSTRD_CACHE_DIR"
+DEFAULT_CACHE_DIR = ".mustrd_cache"
+# Part of the fingerprint, so that entries in an older layout are stale.
+CACHE_FORMAT = "json-nt-1"
+
+
+@dataclass
+class CachedSpecFile:
+    graph: Graph
+    conforms: bool
+    # The shapes' sh:resultMessage values, as pyshacl gave them.
+    messages: List[str]
+
+
+def cache_dir() -> Optional[Path]:
+    """Where the cache lives, or None when it is switched off."""
+    directory = os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR)
+    if not directory or directory.lower() == "off":
+        return None
+    return Path(directory)
+
+
+# pyshacl's advanced mode adds a couple of RDFS axioms to the shapes graph the
+# first time it validates with it, so a graph is fingerprinted as first seen and
+# the answer remembered for as long as the graph lives.
+_fingerprints = weakref.WeakKeyDictionary()
+
+
+def model_fingerprint(shacl_graph: Graph, ont_graph: Graph) -> str:
+    by_ontology = _fingerprints.setdefault(shacl_graph, weakref.WeakKeyDictionary())
+    if ont_graph not in by_ontology:
+        by_ontology[ont_graph] = _fingerprint(shacl_graph, ont_graph)
+    return by_ontology[ont_graph]
+
+
+def _fingerprint(shacl_graph: Graph, ont_graph: Graph) -> str:
+    digest = hashlib.sha256(
+        f"{CACHE_FORMAT} rdflib {rdflib.__version__} pyshacl {pyshacl.__version__}".encode())
+    for graph in (shacl_graph, ont_graph):
+        lines = to_canonical_graph(graph).serialize(format="nt").splitlines()
+        digest.update("\n".join(sorted(lines)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SpecCache:
+    def __init__(self, directory: Path, fingerprint: str):
+        self.directory = directory / "specs" / fingerprint[:16]
+
+    def _entry(self, file: Path, content: bytes) -> Path:
+        # A directory per spec file, holding the entry for its current content.
+        where = hashlib.sha256(str(Path(file).resolve()).encode("utf-8")).hexdigest()
+        return self.directory / where[:32] / f"{hashlib.sha256(content).hexdigest()}.json"
+
+    def get(self, file: Path, content: bytes) -> Optional[CachedSpecFile]:
+        entry = self._entry(file, content)
+        try:
+            with open(entry, encoding="utf-8") as f:
+                cached = json.load(f)
+            graph = Graph()
+            for prefix, namespace in cached["namespaces"]:
+                graph.bind(prefix, namespace, override=True)
+            # Parsing mints fresh blank nodes every time, as parsing the spec
+            # would: two runs' worth of specs merged into one graph must not
+            # share blank nodes.
+            graph.parse(data=cached["triples"], format="nt")
+            return CachedSpecFile(graph, bool(cached["conforms"]), list(cached["messages"]))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # A truncated or foreign file is a miss, not a failure.
+            log.warning(f"Ignoring unreadable spec cache entry {entry}: {e}")
+            return None
+
+    def put(self, file: Path, content: bytes, graph: Graph, conforms: bool,
+            messages: List[str]):
+        entry = self._entry(file, content)
+        payload = {
+            "triples": graph.serialize(format="nt"),
+            "namespaces": [[prefix, str(namespace)] for prefix, namespace in graph.namespaces()],
+            "conforms": conforms,
+            "messages": [str(message) for message in messages],
+        }
+        tmp = None
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            # Written aside and renamed into place, so a concurrent run (--jobs,
+            # xdist) never reads half an entry.
+            fd, tmp = tempfile.mkstemp(dir=entry.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp, entry)
+            tmp = None
+            self._evict(entry.parent, keep=entry)
+        except OSError as e:
+            log.warning(f"Could not write spec cache entry {entry}: {e}")
+        finally:
+            if tmp is not None:
+                _remove(Path(tmp))
+
+    @staticmethod
+    def _evict(directory: Path, keep: Path):
+        """Remove the entries for a spec file's earlier contents."""
+        for stale in directory.glob("*.json"):
+            if stale != keep:
+                _remove(stale)
+
+    def prune(self):
+        """Remove the entries kept for any other model or library version."""
+        for stale in self.directory.parent.glob("*"):
+            if stale != self.directory:
+                log.debug(f"Removing stale spec cache {stale}")
+                if stale.is_dir():
+                    shutil.rmtree(stale, ignore_errors=True)
+                else:
+                    _remove(stale)
+
+
+def _remove(path: Path):
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+def open_spec_cache(shacl_graph: Graph, ont_graph: Graph) -> Optional[SpecCache]:
+    """The cache for specs validated against these shapes, or None if disabled."""
+    directory = cache_dir()
+    if directory is None:
+        return None
+    cache = SpecCache(directory, model_fingerprint(shacl_graph, ont_graph))
+    cache.prune()
+    return cache
@@ -1,4 +1,6 @@
+import hashlib
 import os
+import weakref
 from collections import defaultdict
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -8,6 +10,7 @@ import pandas
 import requests
 from rdflib import RDF, Graph, URIRef, Variable, Literal, XSD, util, ConjunctiveGraph
 from rdflib.exceptions import ParserError
+from rdflib.namespace import SH
 from rdflib.term import Node
 from rdflib.plugins.stores.memory import Memory
 import edn_format
@@ -30,6 +33,8 @@ class SpecComponent:
 @dataclass
 class GivenSpec(SpecComponent):
     value: ConjunctiveGraph = None
+    # Names the given's source, for givens read from a file (see mustrd.loaded_givens).
+    fingerprint: str = None
 
 
 @dataclass
@@ -46,6 +51,15 @@ class AnzoWhenSpec(WhenSpec):
     spec_component_details: any = None
 
 
+@dataclass
+class DeferredWhenSpec(WhenSpec):
+    """A `when` that lives in Anzo's configuration: fetched by `resolve_whens`
+    when the spec runs, not when it is collected. What it was fetched as is kept
+    in `resolved`, for reporting on the queries the spec ran."""
+    spec_component_details: any = None
+    resolved: list = field(default=None, compare=False, repr=False)
+
+
 @dataclass
 class SpadeEdnGroupSourceWhenSpec(WhenSpec):
     file: str = None
@@ -56,6 +70,9 @@ class SpadeEdnGroupSourceWhenSpec(WhenSpec):
 class ThenSpec(SpecComponent):
     value: Graph = Graph()
     ordered: bool = False
+    # Names the then's source, for thens read from a file (see
+    # mustrd.mustrd.canonical_digest).
+    fingerprint: str = None
 
 
 @dataclass
@@ -111,8 +128,8 @@ def parse_spec_component(subject: URIRef,
                 run_config=run_config,
                 root_paths=get_components_roots(spec_graph, subject, run_config))
 
-            # get_spec_component potentially talks to anzo for EVERY spec, massively slowing things down
-            # can we defer it to run time?
+            # Nothing here may talk to a triple store: a `when` kept in Anzo is a
+            # DeferredWhenSpec until the spec runs (resolve_whens).
             spec_component = get_spec_component(spec_component_details)
             if isinstance(spec_component, list):
                 spec_components += spec_component
@@ -212,6 +229,10 @@ def _combine_given_specs(spec_components: List[GivenSpec]) -> GivenSpec:
                 combined.default_context += value
         given_spec = GivenSpec()
         given_spec.value = combined
+        # Fingerprinted only if every part is: one unnamed part could be anything.
+        fingerprints = [spec_component.fingerprint for spec_component in spec_components]
+        if all(fingerprints):
+            given_spec.fingerprint = _fingerprint(*fingerprints)
         return given_spec
 
 
@@ -387,9 +408,18 @@ def load_dataset_from_file(path: Path, spec_component: ThenSpec) -> ThenSpec:
         # read as the union, but iterating a Dataset yields QUADS, and plenty of
         # mustrd (coverage, reporting, graph comparison) iterates a given
         # expecting triples. Same reason StatementsDataset already uses one.
+        content = get_spec_component_from_file(path)
+        is_given = isinstance(spec_component, GivenSpec)
+        source_key = (str(path.resolve()), file_format, hashlib.sha256(content.encode("utf-8")).hexdigest())
+        then_key = None if is_given else source_key
+        spec_component.fingerprint = _fingerprint(*source_key)
+        shared = _then_graphs.get(then_key) if then_key else None
+        if shared is not None:
+            spec_component.value = shared
+            return spec_component
         quads = ConjunctiveGraph(store=Memory())
         try:
-            quads.parse(data=get_spec_component_from_file(path), format=file_format)
+            quads.parse(data=content, format=file_format)
         except ParserError as e:
             log.error(f"Problem parsing {path}, error of type {type(e)}")
             raise ValueError(f"Problem parsing {path}, error of type {type(e)}")
@@ -397,10 +427,27 @@ def load_dataset_from_file(path: Path, spec_component: ThenSpec) -> ThenSpec:
         # which has no named graphs to compare against — so it keeps the flat
         # Graph it has always been. Only `given` keeps its contexts, which is
         # what lets a GRAPH clause in the `when` resolve.
-        spec_component.value = quads if isinstance(spec_component, GivenSpec) else _flatten(quads)
+        if is_given:
+            spec_component.value = quads
+        else:
+            spec_component.value = _then_graphs[then_key] = _flatten(quads)
         return spec_component
 
 
+# Expected (then) graphs are never modified once built, so each is built once and
+# shared by every spec that reads the same source: one spec per triple store in a
+# multi-store run. Givens are never shared — an update runs against, and
+# changes, its given.
+# Held weakly: a graph is shared for as long as some spec still has it, and the
+# cache itself never keeps one alive.
+_then_graphs = weakref.WeakValueDictionary()
+_statement_thens = weakref.WeakKeyDictionary()
+
+
+def _fingerprint(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
 def _flatten(quads: ConjunctiveGraph) -> Graph:
     """The union of every graph in the dataset, as one plain Graph."""
     g = Graph()
@@ -504,6 +551,10 @@ def _get_spec_component_StatementsDataset(spec_component_details: SpecComponentD
         spec_component = GivenSpec()
     else:
         spec_component = ThenSpec()
+        thens = _statement_thens.setdefault(spec_component_details.spec_graph, {})
+        if spec_component_details.subject in thens:
+            spec_component.value = thens[spec_component_details.subject]
+            return spec_component
     spec_component.value = ConjunctiveGraph(store=Memory())
 
     data = get_spec_from_statements(spec_component_details.subject, spec_component_details.predicate,
@@ -514,7 +565,10 @@ def _get_spec_component_StatementsDataset(spec_component_details: SpecComponentD
     # as the union — and then not deleted. rdflib <= 7.1.4 deleted it anyway;
     # 7.6.0 is conformant, which is what broke every update spec. Reads are
     # unaffected either way, so the default graph is simply the correct home.
-    spec_component.value.default_context.parse(data=data)
+    default_graph = spec_component.value.default_context
+    default_graph.addN(triple + (default_graph,) for triple in data)
+    if isinstance(spec_component, ThenSpec):
+        thens[spec_component_details.subject] = spec_component.value
     return spec_component
 
 
@@ -544,9 +598,61 @@ def _get_spec_component_AnzoGraphmartDataset(spec_component_details: SpecCompone
     return spec_component
 
 
+def _declared_query_type(spec_component_details: SpecComponentDetails) -> URIRef:
+    return spec_component_details.spec_graph.value(subject=spec_component_details.spec_component_node,
+                                                   predicate=MUST.queryType)
+
+
 @get_spec_component.method((MUST.AnzoQueryBuilderSparqlSource, MUST.when))
-def _get_spec_component_AnzoQueryBuilderSparqlSource(spec_component_details: SpecComponentDetails) -> SpecComponent:
-    require_anzo(spec_component_details, MUST.AnzoQueryBuilderSparqlSource)
+@get_spec_component.method((MUST.AnzoGraphmartQueryDrivenTemplatedStepSparqlSource, MUST.when))
+@get_spec_component.method((MUST.AnzoGraphmartLayerSparqlSource, MUST.when))
+def _get_spec_component_deferred_anzo_when(spec_component_details: SpecComponentDetails) -> SpecComponent:
+    # Looking these up is a configuration query to Anzo per spec, which used to
+    # happen for every spec at collection, whether or not it then ran.
+    require_anzo(spec_component_details, spec_component_details.data_source_type)
+    return DeferredWhenSpec(queryType=_declared_query_type(spec_component_details),
+                            spec_component_details=spec_component_details)
+
+
+def dispatch_resolve_when(spec_component_details: SpecComponentDetails) -> Node:
+    return spec_component_details.data_source_type
+
+
+# Fetches what a DeferredWhenSpec stands for: a WhenSpec, or a list of them.
+resolve_when = MultiMethod("resolve_when", dispatch_resolve_when)
+
+
+def resolve_whens(whens: List[WhenSpec]) -> List[WhenSpec]:
+    """`whens` with every DeferredWhenSpec replaced by what it stands for."""
+    resolved = []
+    for when in whens:
+        if not isinstance(when, DeferredWhenSpec):
+            resolved.append(when)
+            continue
+        if when.resolved is None:
+            log.debug(f"Resolving {when.spec_component_details.data_source_type} "
+                      f"{when.spec_component_details.spec_component_node}")
+            fetched = resolve_when(when.spec_component_details)
+            when.resolved = fetched if isinstance(fetched, list) else [fetched]
+        resolved += when.resolved
+    return resolved
+
+
+def resolved_whens(whens: List[WhenSpec]) -> List[WhenSpec]:
+    """`whens` as far as they are known without asking Anzo: a DeferredWhenSpec
+    stands for what it was resolved to when its spec ran, and for nothing if it
+    has not run."""
+    known = []
+    for when in whens:
+        if isinstance(when, DeferredWhenSpec):
+            known += when.resolved or []
+        else:
+            known.append(when)
+    return known
+
+
+@resolve_when.method(MUST.AnzoQueryBuilderSparqlSource)
+def _resolve_when_AnzoQueryBuilderSparqlSource(spec_component_details: SpecComponentDetails) -> SpecComponent:
     spec_component = WhenSpec()
 
     # Get WHEN specComponent from query builder
@@ -557,9 +663,7 @@ def _get_spec_component_AnzoQueryBuilderSparqlSource(spec_component_details: Spe
     spec_component.value = get_query_from_querybuilder(triple_store=spec_component_details.mustrd_triple_store,
                                                        folder_name=query_folder,
                                                        query_name=query_name)
-    spec_component.queryType = spec_component_details.spec_graph.value(
-        subject=spec_component_details.spec_component_node,
-        predicate=MUST.queryType)
+    spec_component.queryType = _declared_query_type(spec_component_details)
     return spec_component
 
 
@@ -573,15 +677,12 @@ def _get_spec_component_AnzoGraphmartStepSparqlSource(spec_component_details: Sp
                                                              predicate=MUST.anzoQueryStep)
     spec_component.spec_component_details = spec_component_details
     spec_component.query_step_uri = query_step_uri
-    spec_component.queryType = spec_component_details.spec_graph.value(
-        subject=spec_component_details.spec_component_node,
-        predicate=MUST.queryType)
+    spec_component.queryType = _declared_query_type(spec_component_details)
     return spec_component
 
 
-@get_spec_component.method((MUST.AnzoGraphmartQueryDrivenTemplatedStepSparqlSource, MUST.when))
-def _get_spec_component_AnzoGraphmartQueryDrivenTemplatedStepSparqlSource(spec_component_details: SpecComponentDetails) -> SpecComponent: # noqa
-    require_anzo(spec_component_details, MUST.AnzoGraphmartQueryDrivenTemplatedStepSparqlSource)
+@resolve_when.method(MUST.AnzoGraphmartQueryDrivenTemplatedStepSparqlSource)
+def _resolve_when_AnzoGraphmartQueryDrivenTemplatedStepSparqlSource(spec_component_details: SpecComponentDetails) -> SpecComponent: # noqa
     spec_component = WhenSpec(
         spec_component_details.predicate, spec_component_details.mustrd_triple_store["type"])
 
@@ -592,15 +693,12 @@ def _get_spec_component_AnzoGraphmartQueryDrivenTemplatedStepSparqlSource(spec_c
                                               query_step_uri=query_step_uri)
     spec_component.paramQuery = queries["param_query"]
     spec_component.queryTemplate = queries["query_template"]
-    spec_component.queryType = spec_component_details.spec_graph.value(
-        subject=spec_component_details.spec_component_node,
-        predicate=MUST.queryType)
+    spec_component.queryType = _declared_query_type(spec_component_details)
     return spec_component
 
 
-@get_spec_component.method((MUST.AnzoGraphmartLayerSparqlSource, MUST.when))
-def _get_spec_component_AnzoGraphmartLayerSparqlSource(spec_component_details: SpecComponentDetails) -> list:
-    require_anzo(spec_component_details, MUST.AnzoGraphmartLayerSparqlSource)
+@resolve_when.method(MUST.AnzoGraphmartLayerSparqlSource)
+def _resolve_when_AnzoGraphmartLayerSparqlSource(spec_component_details: SpecComponentDetails) -> list:
     spec_components = []
     # Get the ordered  WHEN specComponents which is the transform and query driven template queries for the Layer
     graphmart_layer_uri = spec_component_details.spec_graph.value(
@@ -616,9 +714,7 @@ def _get_spec_component_AnzoGraphmartLayerSparqlSource(spec_component_details: S
         spec_component.queryTemplate = query.get("query_template")
         spec_component.spec_component_details = spec_component_details
         if spec_component.value:
-            spec_component.queryType = spec_component_details.spec_graph.value(
-                subject=spec_component_details.spec_component_node,
-                predicate=MUST.queryType)
+            spec_component.queryType = _declared_query_type(spec_component_details)
         else:
             spec_component.queryType = MUST.AnzoQueryDrivenUpdateSparql
         spec_components += [spec_component]
@@ -667,70 +763,77 @@ def get_spec_component_from_file(path: Path) -> str:
     return str(content)
 
 
+# The lookups below used to be one SPARQL query each, run for every spec and
+# predicate against the spec graph — which holds every spec in the suite. Parsing,
+# planning and evaluating a query per component dominated building a large suite.
+# They now follow the spec's own triples outward from its subject, with the
+# store's subject index, so each costs only the size of its spec and building a
+# suite is linear in the number of specs. Each keeps the semantics of the query it
+# replaced, including requiring every triple of the pattern to be present.
+
+def _components_of_type(subject: URIRef, predicate: URIRef, spec_graph: Graph, source_type: URIRef) -> List[Node]:
+    return [node for node in spec_graph.objects(subject, predicate)
+            if (node, RDF.type, source_type) in spec_graph]
+
+
+def _bound_values(node: Node, spec_graph: Graph):
+    """(variable, boundValue) for each must:hasBinding of the node."""
+    for binding in spec_graph.objects(node, MUST.hasBinding):
+        for variable in spec_graph.objects(binding, MUST.variable):
+            for value in spec_graph.objects(binding, MUST.boundValue):
+                yield variable, value
+
+
+def _table_rows(subject: URIRef, predicate: URIRef, spec_graph: Graph):
+    for table in _components_of_type(subject, predicate, spec_graph, MUST.TableDataset):
+        yield from spec_graph.objects(table, MUST.hasRow)
+
+
 def get_spec_from_statements(subject: URIRef,
                              predicate: URIRef,
                              spec_graph: Graph) -> Graph:
-    statements_query = f"""
-    prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-
-    CONSTRUCT {{ ?s ?p ?o }}
-    {{
-            <{subject}> <{predicate}> [
-                a <{MUST.StatementsDataset}> ;
-                <{MUST.hasStatement}> [
-                    rdf:subject ?s ;
-                    rdf:predicate ?p ;
-                    rdf:object ?o ;
-                ] ;
-            ]
-
-    }}
-    """
-    results = spec_graph.query(statements_query).graph
-    return results.serialize(format="ttl")
+    statements = Graph()
+    for dataset in _components_of_type(subject, predicate, spec_graph, MUST.StatementsDataset):
+        for statement in spec_graph.objects(dataset, MUST.hasStatement):
+            for s in spec_graph.objects(statement, RDF.subject):
+                for p in spec_graph.objects(statement, RDF.predicate):
+                    for o in spec_graph.objects(statement, RDF.object):
+                        statements.add((s, p, o))
+    return statements
 
 
 def get_spec_from_table(subject: URIRef,
                         predicate: URIRef,
                         spec_graph: Graph) -> pandas.DataFrame:
-    # query the spec to get the expected result to convert to dataframe for comparison
-    then_query = f"""
-        prefix sh:        <http://www.w3.org/ns/shacl#>
-            SELECT ?row ?variable ?binding ?order
-            WHERE {{
-                 <{subject}> <{predicate}> [
-                        a <{MUST.TableDataset}> ;
-                        <{MUST.hasRow}> ?row ].
-                          ?row  <{MUST.hasBinding}> [
-                                <{MUST.variable}> ?variable ;
-                                <{MUST.boundValue}> ?binding ; ] .
-                          OPTIONAL {{ ?row sh:order ?order . }}
-                                     .}}
-             ORDER BY ?order"""
-
-    expected_results = spec_graph.query(then_query)
+    # the expected result, as (row, variable, binding, order), to convert to a dataframe for comparison
+    expected_results = []
+    for row in _table_rows(subject, predicate, spec_graph):
+        orders = list(spec_graph.objects(row, SH.order)) or [None]
+        for variable, binding in _bound_values(row, spec_graph):
+            for order in orders:
+                expected_results.append((row, variable, binding, order))
     # get the unique row ids form the result to form the index of the results dataframe
-    index = {str(row.row) for row in expected_results}
+    index = {str(row) for row, _, _, _ in expected_results}
     # get the unique variables to form the columns of the results dataframe
     columns = set()
-    for row in expected_results:
-        columns.add(row.variable.value)
-        columns.add(row.variable.value + "_datatype")
+    for _, variable, _, _ in expected_results:
+        columns.add(variable.value)
+        columns.add(variable.value + "_datatype")
     # add an additional column for the sort order (if any) of the results
     columns.add("order")
     # create an empty dataframe to populate with the results data
     df = pandas.DataFrame(index=list(index), columns=list(columns))
     # fill the dataframe with the results data
-    for row in expected_results:
-        df.loc[str(row.row), row.variable.value] = str(row.binding)
-        df.loc[str(row.row), "order"] = row.order
-        if isinstance(row.binding, Literal):
+    for row, variable, binding, order in expected_results:
+        df.loc[str(row), variable.value] = str(binding)
+        df.loc[str(row), "order"] = order
+        if isinstance(binding, Literal):
             literal_type = str(XSD.string)
-            if hasattr(row.binding, "datatype") and row.binding.datatype:
-                literal_type = str(row.binding.datatype)
-            df.loc[str(row.row), row.variable.value + "_datatype"] = literal_type
+            if hasattr(binding, "datatype") and binding.datatype:
+                literal_type = str(binding.datatype)
+            df.loc[str(row), variable.value + "_datatype"] = literal_type
         else:
-            df.loc[str(row.row), row.variable.value + "_datatype"] = str(XSD.anyURI)
+            df.loc[str(row), variable.value + "_datatype"] = str(XSD.anyURI)
     # use the sort order sort the results
     df.sort_values(by="order", inplace=True)
     # drop the order column and replace the rowid index with a numeric one and replace empty values with spaces
@@ -742,49 +845,26 @@ def get_spec_from_table(subject: URIRef,
 
 def get_when_bindings(subject: URIRef,
                       spec_graph: Graph) -> dict:
-    # this query was restricted to queries of type MUST.TextSparqlSource, which seems unnecessary when get_when_bindings is called from specific methods
-    when_bindings_query = f"""SELECT ?variable ?binding {{ <{subject}> <{MUST.when}> [ a ?queryType ;
-    <{MUST.hasBinding}> [ <{MUST.variable}> ?variable ;
-    <{MUST.boundValue}> ?binding ; ] ; ]  ;}}"""
-    when_bindings = spec_graph.query(when_bindings_query)
-
-    if len(when_bindings.bindings) == 0:
-        return {}
-    else:
-        bindings = {}
-        for binding in when_bindings:
-            bindings[Variable(binding.variable.value)] = binding.binding
-        return bindings
+    # not restricted to any one query type: get_when_bindings is only called from the specific when handlers
+    bindings = {}
+    for when in spec_graph.objects(subject, MUST.when):
+        if (when, RDF.type, None) not in spec_graph:
+            continue
+        for variable, binding in _bound_values(when, spec_graph):
+            bindings[Variable(variable.value)] = binding
+    return bindings
 
 
 def is_then_select_ordered(subject: URIRef, predicate: URIRef, spec_graph: Graph) -> bool:
-    ask_select_ordered = f"""
-    ASK {{
-    {{SELECT (count(?binding) as ?totalBindings) {{
-    <{subject}> <{predicate}> [
-                a <{MUST.TableDataset}> ;
-                <{MUST.hasRow}> [ <{MUST.hasBinding}> [
-                                    <{MUST.variable}> ?variable ;
-                                    <{MUST.boundValue}> ?binding ;
-                            ] ;
-              ]
-            ]
-}} }}
-    {{SELECT (count(?binding) as ?orderedBindings) {{
-    <{subject}> <{predicate}> [
-                a <{MUST.TableDataset}> ;
-       <{MUST.hasRow}> [ sh:order ?order ;
-                    <{MUST.hasBinding}> [
-                    <{MUST.variable}> ?variable ;
-                                    <{MUST.boundValue}> ?binding ;
-                            ] ;
-              ]
-            ]
-}} }}
-    FILTER(?totalBindings = ?orderedBindings)
-}}"""
-    is_ordered = spec_graph.query(ask_select_ordered)
-    return is_ordered.askAnswer
+    # Ordered when every expected binding sits in a row with an sh:order (counted
+    # as the ASK this replaced counted them, once per order).
+    total_bindings = 0
+    ordered_bindings = 0
+    for row in _table_rows(subject, predicate, spec_graph):
+        bindings = sum(1 for _ in _bound_values(row, spec_graph))
+        total_bindings += bindings
+        ordered_bindings += bindings * len(list(spec_graph.objects(row, SH.order)))
+    return total_bindings == ordered_bindings
 
 
 @get_spec_component.method((MUST.SpadeEdnGroupSource, MUST.when))
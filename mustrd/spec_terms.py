@@ -0,0 +1,101 @@
+"""The terms each spec references, worked out once per report.
+
+Coverage walks every spec's given and queries to see what they use, and it used
+to walk them several times over: for the covered-term sets, again to link each
+term to the tests behind it, again for TBox axioms sitting in test data, and the
+CQ overlay once more for every spec a competency question links. Each walk
+re-ran `abox_terms` over a given that can be large, and a given file shared by
+many specs was walked again for each of them — each spec, on each store, parses
+its own copy of the file, but the copies all hold the same triples.
+
+A `SpecTermIndex` does each of them once. It is built per report, holds nothing
+beyond that report, and answers for a spec dict (see reporting.coverage_spec):
+
+* `data` / `query`: every IRI the spec's given populates (abox_terms), and every
+  IRI its queries name (query_uris);
+* `domain_data` / `domain_query`: the same, restricted to domain namespaces;
+* `tbox`: the schema triples in its given — class/property declarations and
+  rdfs:subClassOf/subPropertyOf/domain/range on domain terms — for coverage
+  to render.
+
+What a given yields is kept per given fingerprint (the hash of the files it was
+read from: see Specification.given_fingerprint), so a file shared by a thousand
+specs is scanned once. A given with no fingerprint is kept per graph object.
+Specs are looked up by identity: the CQ definitions link the same dicts the
+report lists.
+"""
+from dataclasses import dataclass
+from typing import Dict, Hashable, Tuple
+
+from rdflib import Graph, URIRef, RDF, RDFS
+
+from mustrd.ontology import CLASS_TYPES, PROPERTY_TYPES, abox_terms, is_domain_term, query_uris
+
+# rdf:type objects and predicates that make a triple a TBox (schema) axiom. When
+# these appear in a test's `given`, the fixture is defining ontology structure —
+# which belongs in the ontology, not the test data — so the report hints they be
+# moved. The type set is derived from ontology.PROPERTY_TYPES so it can't drift.
+TBOX_TYPES = CLASS_TYPES + tuple(PROPERTY_TYPES)
+TBOX_PREDICATES = (RDFS.subClassOf, RDFS.subPropertyOf, RDFS.domain, RDFS.range)
+
+_NOTHING = frozenset()
+
+
+@dataclass(frozen=True)
+class SpecTerms:
+    data: frozenset = _NOTHING
+    query: frozenset = _NOTHING
+    domain_data: frozenset = _NOTHING
+    domain_query: frozenset = _NOTHING
+    tbox: Tuple[tuple, ...] = ()
+
+
+def given_key(spec: dict) -> Hashable:
+    """What identifies `spec`'s given: its fingerprint, or failing that the graph
+    object itself. Specs with the same key have givens holding the same triples."""
+    fingerprint = spec.get("given_fingerprint")
+    return ("fingerprint", fingerprint) if fingerprint else ("graph", id(spec.get("given")))
+
+
+def _domain(terms) -> frozenset:
+    return frozenset(t for t in terms if is_domain_term(URIRef(t)))
+
+
+def tbox_triples(g: Graph) -> Tuple[tuple, ...]:
+    """The TBox axioms in one given graph, as (subject, predicate, object)."""
+    triples = set()
+    for ty in TBOX_TYPES:
+        triples.update((s, RDF.type, ty) for s in g.subjects(RDF.type, ty) if is_domain_term(s))
+    for pred in TBOX_PREDICATES:
+        triples.update((subj, pred, obj) for subj, obj in g.subject_objects(pred) if is_domain_term(subj))
+    return tuple(triples)
+
+
+class SpecTermIndex:
+    def __init__(self):
+        self._by_spec: Dict[int, Tuple[dict, SpecTerms]] = {}
+        self._by_given: Dict[Hashable, Tuple[Graph, frozenset, frozenset, tuple]] = {}
+
+    def _given(self, spec: dict) -> Tuple[frozenset, frozenset, tuple]:
+        # The graph is kept with its entry, so an id used as a key is not reused
+        # meanwhile.
+        key = given_key(spec)
+        if key not in self._by_given:
+            g = spec["given"]
+            data = frozenset(abox_terms(g))
+            self._by_given[key] = (g, data, _domain(data), tbox_triples(g))
+        return self._by_given[key][1:]
+
+    def terms(self, spec: dict) -> SpecTerms:
+        """What `spec` references: see the module docstring."""
+        if id(spec) in self._by_spec:
+            return self._by_spec[id(spec)][1]
+        g = spec.get("given")
+        data, domain_data, tbox = self._given(spec) if isinstance(g, Graph) else (_NOTHING, _NOTHING, ())
+        query = set()
+        for q in (spec.get("queries") or []):
+            if isinstance(q, str):
+                query |= query_uris(q)
+        terms = SpecTerms(data, frozenset(query), domain_data, _domain(query), tbox)
+        self._by_spec[id(spec)] = (spec, terms)
+        return terms
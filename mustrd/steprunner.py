@@ -9,11 +9,15 @@ from .mustrdRdfLib import execute_select as execute_select_rdflib
 from .mustrdRdfLib import execute_construct as execute_construct_rdflib
 from .mustrdRdfLib import execute_update as execute_update_rdflib
 from .mustrdAnzo import get_query_from_step, upload_given as upload_given_anzo
+from .mustrdAnzo import drop_graph as drop_graph_anzo
 from .mustrdAnzo import execute_update as execute_update_anzo
 from .mustrdAnzo import execute_construct as execute_construct_anzo
 from .mustrdAnzo import execute_select as execute_select_anzo
+from .mustrdAnzo import stream_select as stream_select_anzo
 from .spec_component import AnzoWhenSpec, WhenSpec, SpadeEdnGroupSourceWhenSpec
+from .sparql_results import close_select_result
 import logging
+from .lazy_log import brief
 
 log = logging.getLogger(__name__)
 
@@ -41,6 +45,25 @@ def _upload_given_anzo(triple_store: dict, given: Graph):
     upload_given_anzo(triple_store, given)
 
 
+def dispatch_drop_graph(triple_store: dict, graph: str):
+    return triple_store['type']
+
+
+# Removes a graph mustrd minted for one spec (see mustrd.isolation). Only remote
+# stores have anything to clean up: the default is a no-op.
+drop_graph = MultiMethod('drop_graph', dispatch_drop_graph)
+
+
+@drop_graph.method(Default)
+def _drop_graph_default(triple_store: dict, graph: str):
+    pass
+
+
+@drop_graph.method(TRIPLESTORE.Anzo)
+def _drop_graph_anzo(triple_store: dict, graph: str):
+    drop_graph_anzo(triple_store, graph)
+
+
 def dispatch_run_when(spec_uri: URIRef, triple_store: dict, when: WhenSpec):
     ts = triple_store['type']
     query_type = when.queryType
@@ -54,24 +77,31 @@ run_when_impl = MultiMethod('run_when', dispatch_run_when)
 def register_sparql_http_backend(triple_store_type: URIRef, backend):
     """Wire a standard SPARQL-1.1-over-HTTP backend into the dispatch tables.
 
-    Any module exposing upload_given / execute_update / execute_construct /
-    execute_select with the conventional (triple_store, when.value, when.bindings)
-    signatures gets all four operations registered for triple_store_type. Adding
+    Any module exposing upload_given / drop_graph / execute_update /
+    execute_construct / stream_select with the conventional (triple_store,
+    when.value, when.bindings) signatures gets all five operations registered
+    for triple_store_type. SELECT results are streamed, not read into a string:
+    table_comparison consumes them a binding at a time (see
+    mustrd.sparql_results). A backend written before streaming, with only
+    execute_select, still registers: its SELECT results are read whole. Adding
     such a backend is then one call instead of a wrapper per (type, query-type)
     pair. Stores that need bespoke handling (Anzo's query steps, RdfLib's
     in-memory given) register their own methods explicitly below.
     """
     upload_given.method(triple_store_type)(
         lambda triple_store, given: backend.upload_given(triple_store, given))
+    drop_graph.method(triple_store_type)(
+        lambda triple_store, graph: backend.drop_graph(triple_store, graph))
     run_when_impl.method((triple_store_type, MUST.UpdateSparql))(
         lambda spec_uri, triple_store, when:
             backend.execute_update(triple_store, when.value, when.bindings))
     run_when_impl.method((triple_store_type, MUST.ConstructSparql))(
         lambda spec_uri, triple_store, when:
             backend.execute_construct(triple_store, when.value, when.bindings))
+    select = getattr(backend, "stream_select", None) or backend.execute_select
     run_when_impl.method((triple_store_type, MUST.SelectSparql))(
         lambda spec_uri, triple_store, when:
-            backend.execute_select(triple_store, when.value, when.bindings))
+            select(triple_store, when.value, when.bindings))
 
 
 register_sparql_http_backend(TRIPLESTORE.GraphDb, mustrdGraphDb)
@@ -99,7 +129,7 @@ def _anzo_run_when_construct(spec_uri: URIRef, triple_store: dict, when: AnzoWhe
 
 @run_when_impl.method((TRIPLESTORE.Anzo, MUST.SelectSparql))
 def _anzo_run_when_select(spec_uri: URIRef, triple_store: dict, when: AnzoWhenSpec):
-    return execute_select_anzo(triple_store, when.value, when.bindings)
+    return stream_select_anzo(triple_store, when.value, when.bindings)
 
 
 @run_when_impl.method((TRIPLESTORE.RdfLib, MUST.UpdateSparql))
@@ -154,7 +184,7 @@ def _spade_edn_group_source_anzo(spec_uri: URIRef, triple_store: dict, when: Spa
         try:
             log.debug(f"Dispatching run_when for step: {step_when_spec}")
             query_result = run_when_impl(spec_uri, triple_store, step_when_spec)
-            log.debug(f"Executed SPARQL query: {query_result}")
+            log.debug("Executed SPARQL query: %s", brief(query_result))
             # Merge results if possible (e.g., for Graphs), else just keep last non-None
             if merged_result is None:
                 merged_result = query_result
@@ -162,12 +192,14 @@ def _spade_edn_group_source_anzo(spec_uri: URIRef, triple_store: dict, when: Spa
                 try:
                     merged_result += query_result  # For graph-like objects
                 except Exception:
-                    # If not mergeable, just keep the last result
+                    # If not mergeable, just keep the last result — releasing the
+                    # connection an unread streamed SELECT is holding.
+                    close_select_result(merged_result)
                     merged_result = query_result
         except Exception as e:
             log.error(f"Failed to execute SPARQL query: {e}")
 
-    log.debug(f"Final merged result: {merged_result}")
+    log.debug("Final merged result: %s", brief(merged_result))
     return merged_result
 
 
@@ -188,7 +220,7 @@ def _spade_edn_group_source_rdflib(spec_uri: URIRef, triple_store: dict, when: S
 
                 log.debug(f"Dispatching run_when for UpdateSparql step: {step_when_spec}")
                 query_result = run_when_impl(spec_uri, triple_store, step_when_spec)
-                log.debug(f"Executed SPARQL query: {query_result}")
+                log.debug("Executed SPARQL query: %s", brief(query_result))
                 merged_graph += query_result  # Merge the resulting graph
             else:
                 log.warning(f"Unsupported queryType: {step_when_spec.queryType}")
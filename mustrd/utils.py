@@ -13,7 +13,8 @@ def manage_http_response(response: Response, store_label: str, *,
                          success_codes=(200, 204),
                          auth_codes=(401,),
                          http_error_codes=(),
-                         auth_detail=None) -> str:
+                         auth_detail=None,
+                         stream=False):
     """Shared handling of a triple store's HTTP SPARQL response.
 
     The backends (GraphDB, Stardog, Anzo) differ only in which status codes mean
@@ -27,9 +28,15 @@ def manage_http_response(response: Response, store_label: str, *,
     - auth_codes: raise HTTPError, with auth_detail(content) if given else content
     - http_error_codes: raise HTTPError (non-auth, e.g. GraphDB 406)
     - anything else: raise RequestException
+
+    With stream=True (for a request made with stream=True) a success returns the
+    response itself, unread, for the caller to consume incrementally; the error
+    cases read the body and raise as above.
     """
-    content = response.content.decode("utf-8")
     code = response.status_code
+    if stream and code in success_codes:
+        return response
+    content = response.content.decode("utf-8")
     if code in success_codes:
         return content or None
     if code in auth_codes:
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""What debug logging used to cost a spec with DEBUG off.
+
+Runs one rdflib CONSTRUCT spec over givens of increasing size, with logging at
+INFO, and sets its time beside the work mustrd used to do for messages nobody
+read: the given serialized to Turtle before every upload, and the result graph
+formatted into a `result=` message. See mustrd.lazy_log.
+
+    python scripts/bench_debug_logging.py [triples ...]
+"""
+import logging
+import sys
+import time
+
+from rdflib import Graph, Literal, URIRef
+
+from mustrd.mustrd import Specification, run_spec
+from mustrd.namespace import MUST, TRIPLESTORE
+from mustrd.spec_component import ThenSpec, WhenSpec
+
+EX = "http://example.org/"
+SIZES = (1_000, 10_000, 50_000)
+CONSTRUCT = WhenSpec("CONSTRUCT { ?s ?p ?o } WHERE { ?s ?p ?o }", MUST.ConstructSparql)
+
+
+def given(size: int) -> Graph:
+    graph = Graph()
+    for n in range(size):
+        graph.add((URIRef(f"{EX}s{n // 10}"), URIRef(f"{EX}p{n % 10}"), Literal(n)))
+    return graph
+
+
+def seconds(function, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(sizes):
+    logging.basicConfig(level=logging.INFO)
+    print(f"{'triples':>8} {'run_spec':>10} {'removed':>10}")
+    for size in sizes:
+        graph = given(size)
+        spec = Specification(URIRef(f"{EX}spec"), {"type": TRIPLESTORE.RdfLib}, graph, [CONSTRUCT],
+                             ThenSpec(graph))
+        spec_time = seconds(lambda: run_spec(spec))
+        # The given as Turtle, and the result graph formatted for a message.
+        removed = seconds(lambda: (f"{graph.serialize(format='turtle')}", f"{graph=}"))
+        print(f"{size:>8} {spec_time:>9.3f}s {removed:>9.3f}s")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or SIZES)
@@ -0,0 +1,62 @@
+"""Running specs from an event loop (mustrd.async_runner)."""
+import asyncio
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from mustrd import async_runner
+from mustrd.async_runner import run_specs_async, run_specs_async_timed
+from mustrd.mustrd import SpecPassed, Specification, run_specs
+from mustrd.namespace import TRIPLESTORE
+from mustrd.runner import generate_specs
+
+
+def _rdflib_specs():
+    config = {"spec_path": Path("test/test-specs/expected-success"), "data_path": Path("test/data")}
+    specs, _ = generate_specs(config, [{"type": TRIPLESTORE.RdfLib, "uri": TRIPLESTORE.RdfLib}])
+    return specs
+
+
+def test_an_async_run_matches_a_serial_run_in_order():
+    specs = _rdflib_specs()
+    serial = run_specs(_rdflib_specs())
+
+    results = asyncio.run(run_specs_async(specs, concurrency=4))
+
+    assert [r.spec_uri for r in results] == [s.spec_uri for s in specs]
+    assert [type(r) for r in results] == [type(r) for r in serial]
+    assert all(isinstance(r, SpecPassed) for r in results)
+
+
+def _remote(uri, isolate):
+    store = {"type": TRIPLESTORE.GraphDb, "uri": "urn:store:gdb", "isolate_graphs": isolate}
+    return Specification(uri, store, None, [], None)
+
+
+def _peak_in_flight(specs, concurrency):
+    lock, in_flight, peak = threading.Lock(), [0], [0]
+
+    def run(spec):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return SpecPassed(spec.spec_uri, spec.triple_store["type"]), 0.05
+
+    with patch.object(async_runner, "timed_run_spec", side_effect=run):
+        outcomes = asyncio.run(run_specs_async_timed(specs, concurrency))
+    assert [result.spec_uri for result, _ in outcomes] == [spec.spec_uri for spec in specs]
+    return peak[0]
+
+
+def test_specs_against_an_isolating_store_are_in_flight_together():
+    specs = [_remote(f"urn:{n}", isolate=True) for n in range(8)]
+    assert _peak_in_flight(specs, concurrency=8) > 1
+
+
+def test_specs_sharing_a_store_graph_run_one_at_a_time():
+    specs = [_remote(f"urn:{n}", isolate=False) for n in range(4)]
+    assert _peak_in_flight(specs, concurrency=8) == 1
@@ -8,6 +8,8 @@ from rdflib.compare import isomorphic
 from mustrd.mustrd import SpecPassed, ConstructSpecFailure, SparqlParseFailure, \
      check_result, Specification
 from mustrd.steprunner import run_when_impl
+from mustrd import diff_render
+from mustrd.diff_render import DiffLimits
 from graph_util import graph_comparison_message
 from mustrd.namespace import MUST, TRIPLESTORE
 from mustrd.spec_component import ThenSpec, TableThenSpec, parse_spec_component
@@ -477,7 +479,9 @@ class TestRunConstructSpec:
         assert then_result == expected_result
         assert isinstance(then_component, ThenSpec)
 
-    def test_construct_spec_result_mismatch_fails_with_graph_comparison(self):
+    def test_construct_spec_result_mismatch_fails_with_graph_comparison(self, monkeypatch):
+        # in_both is only built when it will be shown.
+        monkeypatch.setattr(diff_render, "_limits", DiffLimits(show_in_both=True))
         run_config = {}
         triples = """
         @prefix test-data: <https://semanticpartners.com/data/test/> .
@@ -0,0 +1,129 @@
+"""A `when` kept in Anzo is fetched when its spec runs, not when it is collected."""
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+from rdflib import Graph, URIRef
+
+from mustrd import spec_component
+from mustrd.coverage import compute_coverage
+from mustrd.mustrd import SpecInvalid, TripleStoreConnectionError, get_spec, resolve_deferred_whens
+from mustrd.namespace import MUST, TRIPLESTORE
+from mustrd.reporting import coverage_spec
+from mustrd.spec_component import DeferredWhenSpec, WhenSpec, resolve_whens
+
+ANZO = {"type": TRIPLESTORE.Anzo, "uri": "urn:store:anzo", "input_graph": "http://ex/input",
+        "output_graph": "http://ex/output"}
+SPEC = URIRef("https://ex/spec")
+SPECS = """
+@prefix must: <https://mustrd.org/model/> .
+@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .
+<https://ex/spec> a must:TestSpec ;
+    must:given [ a must:StatementsDataset ;
+                 must:hasStatement [ a rdf:Statement ;
+                                     rdf:subject <urn:s> ; rdf:predicate <urn:p> ; rdf:object <urn:o> ] ] ;
+    must:when [ a must:AnzoQueryBuilderSparqlSource ;
+                must:queryFolder "Mustrd" ; must:queryName "mustrd-select" ;
+                must:queryType must:SelectSparql ] ,
+              [ a must:AnzoGraphmartLayerSparqlSource ;
+                must:anzoGraphmartLayer <https://ex/layer> ;
+                must:queryType must:UpdateSparql ] ;
+    must:then [ a must:EmptyTable ] .
+"""
+
+
+def _spec():
+    return get_spec(SPEC, Graph().parse(data=SPECS, format="ttl"),
+                    {"spec_path": Path("test"), "data_path": Path("test")}, ANZO)
+
+
+def _patched_anzo(query_builder=lambda **kwargs: "SELECT * WHERE { ?s ?p ?o }"):
+    layer = [{"query": "INSERT DATA { <urn:s> <urn:p> <urn:o> }"},
+             {"param_query": "SELECT ?x WHERE {}", "query_template": "INSERT DATA {}"}]
+    return patch.object(spec_component, "get_query_from_querybuilder", side_effect=query_builder), \
+        patch.object(spec_component, "get_queries_for_layer", side_effect=lambda **kwargs: layer)
+
+
+def test_collecting_a_spec_asks_anzo_nothing():
+    query_builder, layer = _patched_anzo()
+    with query_builder as asked_builder, layer as asked_layer:
+        spec = _spec()
+    assert not asked_builder.called and not asked_layer.called
+    assert all(isinstance(when, DeferredWhenSpec) for when in spec.when)
+    assert [when.queryType for when in spec.when] == [MUST.SelectSparql, MUST.UpdateSparql]
+
+
+def test_resolving_fetches_each_when_and_expands_a_layer():
+    spec = _spec()
+    query_builder, layer = _patched_anzo()
+    with query_builder, layer:
+        whens = resolve_whens(spec.when)
+
+    assert not any(isinstance(when, DeferredWhenSpec) for when in whens)
+    assert [when.queryType for when in whens] == \
+        [MUST.SelectSparql, MUST.UpdateSparql, MUST.AnzoQueryDrivenUpdateSparql]
+    assert whens[0].value == "SELECT * WHERE { ?s ?p ?o }"
+
+
+def test_other_whens_are_left_alone():
+    when = WhenSpec("SELECT * WHERE { ?s ?p ?o }", MUST.SelectSparql)
+    assert resolve_whens([when]) == [when]
+
+
+def test_a_query_anzo_does_not_have_makes_the_spec_invalid_when_it_runs():
+    def missing(**kwargs):
+        raise FileNotFoundError("Query mustrd-select not found in folder Mustrd")
+
+    spec = _spec()
+    query_builder, layer = _patched_anzo(missing)
+    with query_builder, layer:
+        result = resolve_deferred_whens(spec)
+    assert isinstance(result, SpecInvalid)
+    assert "mustrd-select" in result.message
+
+
+def test_an_unreachable_anzo_is_a_connection_error():
+    def unreachable(**kwargs):
+        raise requests.ConnectionError("down")
+
+    query_builder, layer = _patched_anzo(unreachable)
+    with query_builder, layer:
+        assert isinstance(resolve_deferred_whens(_spec()), TripleStoreConnectionError)
+
+
+def test_a_when_is_fetched_once_however_often_it_is_resolved():
+    spec = _spec()
+    query_builder, layer = _patched_anzo()
+    with query_builder as asked_builder, layer as asked_layer:
+        assert resolve_whens(spec.when) == resolve_whens(spec.when)
+    assert asked_builder.call_count == 1 and asked_layer.call_count == 1
+
+
+ONTOLOGY = """
+@prefix onto: <http://onto.org/> .
+@prefix owl:  <http://www.w3.org/2002/07/owl#> .
+onto:City a owl:Class .
+onto:Harbour a owl:Class .
+"""
+
+
+def test_coverage_counts_the_queries_a_deferred_when_ran():
+    spec = _spec()
+    assert coverage_spec(spec, "passed", "spec")["queries"] == []
+
+    query_builder, layer = _patched_anzo(lambda **kwargs: "SELECT ?c WHERE { ?c a <http://onto.org/City> }")
+    with query_builder, layer:
+        resolve_deferred_whens(spec)
+    cspec = coverage_spec(spec, "passed", "spec")
+    assert cspec["queries"] == ["SELECT ?c WHERE { ?c a <http://onto.org/City> }",
+                                "INSERT DATA { <urn:s> <urn:p> <urn:o> }"]
+
+    coverage = compute_coverage([cspec], ontology=Graph().parse(data=ONTOLOGY, format="ttl"))
+    roles = {record["iri"]: record["role"] for record in coverage["term_records"]}
+    assert roles["http://onto.org/City"] != "unused"
+    assert roles["http://onto.org/Harbour"] == "unused"
+
+
+def test_queries_run_elsewhere_stand_in_for_the_specs_own():
+    cspec = coverage_spec(_spec(), "passed", "spec", ["SELECT * WHERE { ?s a <http://onto.org/City> }"])
+    assert cspec["queries"] == ["SELECT * WHERE { ?s a <http://onto.org/City> }"]
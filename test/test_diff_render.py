@@ -0,0 +1,96 @@
+"""A failed spec's diff is printed bounded (mustrd.diff_render)."""
+import pandas
+import pytest
+from rdflib import Graph, Literal, URIRef
+
+from mustrd import diff_render
+from mustrd.diff_render import DiffLimits, set_diff_limits
+from mustrd.mustrd import ConstructSpecFailure, GraphComparison, SelectSpecFailure, write_result_diff_to_log
+from mustrd.namespace import TRIPLESTORE
+
+EX = "http://ex/"
+SPEC = URIRef(EX + "spec")
+
+
+@pytest.fixture(autouse=True)
+def default_limits():
+    set_diff_limits(DiffLimits())
+    yield
+    set_diff_limits(DiffLimits())
+
+
+def _graph(size, predicate="p", start=0):
+    graph = Graph()
+    for n in range(start, start + size):
+        graph.add((URIRef(f"{EX}s{n:04}"), URIRef(EX + predicate), Literal(n)))
+    return graph
+
+
+def _rendered(result):
+    lines = []
+    write_result_diff_to_log(result, lines.append)
+    return "\n".join(lines)
+
+
+def _graph_failure():
+    missing = _graph(300) + _graph(20, "q", 300)
+    return ConstructSpecFailure(SPEC, TRIPLESTORE.RdfLib,
+                                GraphComparison(missing, _graph(1, start=900), _graph(1000, "r")))
+
+
+def test_a_large_graph_diff_is_summarised_and_capped():
+    rendered = _rendered(_graph_failure())
+
+    assert "320 triples, by predicate: <http://ex/p> (300), <http://ex/q> (20)" in rendered
+    assert "... and 270 more" in rendered
+    assert rendered.count(":s0") == 50 + 1
+    assert "in_both" not in rendered
+
+
+def test_the_triples_shown_are_the_first_in_order():
+    rendered = _rendered(_graph_failure())
+    assert ":s0000 " in rendered and ":s0049 " in rendered and ":s0050 " not in rendered
+
+
+def test_in_both_is_shown_only_when_asked_for():
+    set_diff_limits(DiffLimits(max_triples=5, show_in_both=True))
+    rendered = _rendered(_graph_failure())
+    assert "in_both" in rendered and "1000 triples, by predicate: <http://ex/r> (1000)" in rendered
+
+
+def test_the_full_diff_can_be_spilled_to_files(tmp_path):
+    set_diff_limits(DiffLimits(max_triples=5, spill_dir=tmp_path))
+    rendered = _rendered(_graph_failure())
+
+    spilled = sorted(path.name for path in tmp_path.iterdir())
+    assert len(spilled) == 2 and all(name.endswith(".nt") for name in spilled)
+    missing, = [path for path in tmp_path.iterdir() if "in_expected_not_in_actual" in path.name]
+    assert len(Graph().parse(missing, format="nt")) == 320
+    assert f"written to {missing}" in rendered
+
+
+def _table_diff(rows):
+    expected = pandas.DataFrame({"s": [f"s{n}" for n in range(rows)], "o": range(rows)})
+    actual = expected.copy()
+    actual["o"] = actual["o"] + 1
+    return expected.compare(actual, result_names=("expected", "actual"))
+
+
+def test_a_large_table_diff_is_summarised_and_capped(tmp_path):
+    set_diff_limits(DiffLimits(max_rows=10, spill_dir=tmp_path))
+    rendered = _rendered(SelectSpecFailure(SPEC, TRIPLESTORE.RdfLib, _table_diff(200), "values differ"))
+
+    assert "200 rows differ, by column: o (200)" in rendered
+    assert "... and 190 more" in rendered
+    spilled, = tmp_path.iterdir()
+    assert len(pandas.read_csv(spilled, header=[0, 1], index_col=0)) == 200
+
+
+def test_a_select_failure_without_a_table_still_renders():
+    assert "not in JSON" in _rendered(SelectSpecFailure(SPEC, TRIPLESTORE.RdfLib, None, "Sparql result is not in JSON"))
+
+
+def test_limits_are_process_wide():
+    limits = DiffLimits(max_triples=1)
+    set_diff_limits(limits)
+    assert diff_render.diff_limits() is limits
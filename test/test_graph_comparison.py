@@ -0,0 +1,128 @@
+"""Graph thens are compared in tiers: set checks first, blank-node
+canonicalisation only when there are blank nodes, and a diff only on failure."""
+import gc
+import pickle
+import weakref
+from pathlib import Path
+
+import pytest
+from rdflib import Graph, URIRef
+from rdflib.compare import graph_diff, isomorphic
+
+import mustrd.mustrd as mustrd_module
+from mustrd import diff_render
+from mustrd.diff_render import DiffLimits
+from mustrd.mustrd import graph_comparison, graphs_match
+from mustrd.namespace import TRIPLESTORE
+from mustrd.runner import generate_specs
+from mustrd.spec_component import ThenSpec, load_dataset_from_file
+
+PREFIXES = "@prefix : <https://example.org/> ."
+GROUND = f"{PREFIXES} :a :p :b, :c ; :q 1 ."
+WITH_BNODES = f"{PREFIXES} :a :p [ :q 1 ], [ :q 2 ] ."
+
+
+def _graph(data):
+    return Graph().parse(data=data, format="ttl")
+
+
+@pytest.fixture
+def no_canonicalisation(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("ground graphs were canonicalised")
+    monkeypatch.setattr(mustrd_module, "to_isomorphic", fail)
+    monkeypatch.setattr(mustrd_module, "to_canonical_graph", fail)
+
+
+def test_ground_graphs_are_compared_as_sets(no_canonicalisation):
+    assert graphs_match(_graph(GROUND), _graph(GROUND))
+    assert not graphs_match(_graph(GROUND), _graph(f"{PREFIXES} :a :p :b, :c ; :q 2 ."))
+    assert not graphs_match(_graph(GROUND), _graph(f"{PREFIXES} :a :p :b, :c ."))
+
+
+def test_graphs_with_blank_nodes_are_canonicalised():
+    assert graphs_match(_graph(WITH_BNODES), _graph(WITH_BNODES))
+    assert not graphs_match(_graph(WITH_BNODES), _graph(f"{PREFIXES} :a :p [ :q 1 ], [ :q 3 ] ."))
+
+
+@pytest.fixture
+def showing_in_both(monkeypatch):
+    monkeypatch.setattr(diff_render, "_limits", DiffLimits(show_in_both=True))
+
+
+@pytest.mark.parametrize("expected_data, actual_data", [
+    (GROUND, f"{PREFIXES} :a :p :b, :d ; :q 1 ."),
+    (WITH_BNODES, f"{PREFIXES} :a :p [ :q 1 ], [ :q 3 ] ."),
+])
+def test_a_diff_is_what_graph_diff_gives(showing_in_both, expected_data, actual_data):
+    expected = _graph(expected_data)
+    actual = _graph(actual_data)
+
+    comparison = graph_comparison(expected, actual)
+
+    in_both, in_expected, in_actual = graph_diff(expected, actual)
+    assert isomorphic(comparison.in_expected_not_in_actual, in_expected)
+    assert isomorphic(comparison.in_actual_not_in_expected, in_actual)
+    assert isomorphic(comparison.in_both, in_both)
+
+
+@pytest.mark.parametrize("actual_data", [f"{PREFIXES} :a :p :b, :d ; :q 1 .", WITH_BNODES])
+def test_in_both_is_built_only_when_it_is_shown(actual_data):
+    comparison = graph_comparison(_graph(GROUND), _graph(actual_data))
+    assert len(comparison.in_both) == 0
+    assert len(comparison.in_expected_not_in_actual) > 0
+
+
+def test_the_expected_side_is_canonicalised_once(monkeypatch):
+    expected = _graph(WITH_BNODES)
+    canonicalised = []
+    real = mustrd_module.to_isomorphic
+    monkeypatch.setattr(mustrd_module, "to_isomorphic",
+                        lambda graph: canonicalised.append(graph) or real(graph))
+
+    for _ in range(3):
+        assert graphs_match(expected, _graph(WITH_BNODES))
+
+    assert canonicalised.count(expected) == 1
+    assert len(canonicalised) == 4
+
+
+def test_copies_of_a_then_read_from_one_file_are_canonicalised_once(monkeypatch):
+    # What a --jobs worker sees: a fresh unpickled then graph for every spec.
+    monkeypatch.setattr(mustrd_module, "_canonical_digests_by_source", {})
+    canonicalised = []
+    real = mustrd_module.to_isomorphic
+    monkeypatch.setattr(mustrd_module, "to_isomorphic",
+                        lambda graph: canonicalised.append(graph) or real(graph))
+
+    copies = [pickle.loads(pickle.dumps(_graph(WITH_BNODES))) for _ in range(3)]
+    for expected in copies:
+        assert graphs_match(expected, _graph(WITH_BNODES), "then.ttl")
+
+    assert sum(any(graph is copy for copy in copies) for graph in canonicalised) == 1
+
+
+@pytest.mark.parametrize("spec_uri", [
+    "https://semanticpartners.com/data/test/a_complete_construct_scenario_when_file_then_file",
+    "https://semanticpartners.com/data/test/a_complete_construct_scenario",
+])
+def test_each_store_shares_one_expected_graph(spec_uri):
+    config = {"spec_path": Path("test/test-specs/expected-success"), "data_path": Path("test/data")}
+    stores = [{"type": TRIPLESTORE.RdfLib, "uri": TRIPLESTORE.RdfLib},
+              {"type": TRIPLESTORE.RdfLib, "uri": URIRef("https://example.org/another-rdflib")}]
+    specs, _ = generate_specs(config, stores)
+
+    first, second = [spec.then.value for spec in specs if spec.spec_uri == URIRef(spec_uri)]
+    assert len(first) and first is second
+
+
+def test_an_expected_graph_is_shared_only_while_a_spec_holds_it(tmp_path):
+    then_file = tmp_path / "then.ttl"
+    then_file.write_text(GROUND)
+    first = load_dataset_from_file(then_file, ThenSpec()).value
+    assert load_dataset_from_file(then_file, ThenSpec()).value is first
+
+    expected = weakref.ref(first)
+    del first
+    gc.collect()
+    assert expected() is None
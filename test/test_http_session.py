@@ -0,0 +1,93 @@
+"""Requests to a remote store share one pooled session per store (mustrd.http_session)."""
+import io
+from unittest.mock import patch
+
+import pytest
+import requests
+from rdflib import Graph, Literal, RDF, URIRef
+
+from mustrd import mustrdGraphDb
+from mustrd.http_session import RETRY_METHODS, close_sessions, new_session, store_session
+from mustrd.isolation import isolate
+from mustrd.mustrd import get_triple_stores
+from mustrd.namespace import TRIPLESTORE
+
+GRAPHDB = {"type": TRIPLESTORE.GraphDb, "uri": URIRef("urn:store:gdb"), "url": "http://localhost:7200",
+           "repository": "mustrd", "username": "u", "password": "p", "input_graph": None}
+
+
+@pytest.fixture(autouse=True)
+def fresh_sessions():
+    close_sessions()
+    yield
+    close_sessions()
+
+
+class _FakeResponse:
+    status_code = 200
+    content = b"<http://ex/s> <http://ex/p> <http://ex/o> ."
+
+    def __init__(self):
+        self.raw = io.BytesIO(self.content)
+
+    def close(self):
+        pass
+
+
+def test_every_request_to_a_store_goes_through_one_session():
+    sessions = []
+
+    def respond(session, **kwargs):
+        sessions.append(session)
+        return _FakeResponse()
+
+    with patch.object(requests.Session, "post", autospec=True, side_effect=respond), \
+            patch.object(requests.Session, "put", autospec=True, side_effect=respond):
+        mustrdGraphDb.upload_given(GRAPHDB, Graph().parse(data=_FakeResponse.content, format="nt"))
+        mustrdGraphDb.execute_update(GRAPHDB, "INSERT DATA { <http://ex/s> <http://ex/p> 1 }")
+        # mustrd.isolation's per-spec copy of the config still shares the pool.
+        mustrdGraphDb.execute_construct(isolate(GRAPHDB), "CONSTRUCT { ?s ?p ?o } WHERE { ?s ?p ?o }")
+
+    assert len(sessions) == 4 and all(session is sessions[0] for session in sessions)
+    assert store_session(dict(GRAPHDB, uri=URIRef("urn:store:other"))) is not sessions[0]
+
+
+def test_the_pool_and_retry_policy_come_from_the_session_settings():
+    adapter = new_session(pool_size=3, max_retries=2, retry_backoff=0.5).get_adapter("https://example.org")
+    assert adapter._pool_maxsize == 3
+    retry = adapter.max_retries
+    assert (retry.total, retry.connect, retry.backoff_factor) == (2, 2, 0.5)
+    # An update is a POST: a response it may already have caused is never retried.
+    assert "POST" not in RETRY_METHODS and retry.allowed_methods == RETRY_METHODS
+
+    defaults = new_session().get_adapter("http://example.org")
+    assert defaults._pool_maxsize == 10 and defaults.max_retries.total == 0
+
+
+def test_pool_and_retries_are_read_from_the_store_config():
+    store = URIRef("urn:store:gdb")
+    config = Graph()
+    config.add((store, RDF.type, TRIPLESTORE.GraphDb))
+    config.add((store, TRIPLESTORE.url, Literal("http://localhost:7200")))
+    config.add((store, TRIPLESTORE.repository, Literal("mustrd")))
+    config.add((store, TRIPLESTORE.poolSize, Literal(4)))
+    config.add((store, TRIPLESTORE.maxRetries, Literal(3)))
+    config.add((store, TRIPLESTORE.retryBackoff, Literal(0.25)))
+
+    triple_store = get_triple_stores(config)[0]
+
+    assert (triple_store["pool_size"], triple_store["max_retries"], triple_store["retry_backoff"]) == (4, 3, 0.25)
+    retry = store_session(triple_store).get_adapter(triple_store["url"]).max_retries
+    assert retry.total == 3
+
+
+def test_a_negative_retry_count_does_not_validate():
+    store = URIRef("urn:store:gdb")
+    config = Graph()
+    config.add((store, RDF.type, TRIPLESTORE.GraphDb))
+    config.add((store, TRIPLESTORE.url, Literal("http://localhost:7200")))
+    config.add((store, TRIPLESTORE.repository, Literal("mustrd")))
+    config.add((store, TRIPLESTORE.maxRetries, Literal(-1)))
+
+    with pytest.raises(ValueError, match="not conform"):
+        get_triple_stores(config)
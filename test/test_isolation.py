@@ -0,0 +1,108 @@
+"""Per-spec named graphs for remote stores (mustrd.isolation, isolateGraphs).
+
+No server needed: the GraphDB backend's requests calls are patched, and the
+tests check which graphs a spec is loaded into, queried over and dropped from.
+"""
+from unittest.mock import patch
+
+import requests
+from rdflib import Graph, Literal, RDF, URIRef
+
+from mustrd.isolation import isolate, isolated_graphs, mint_graph
+from mustrd.mustrd import Specification, SpecPassed, get_triple_stores, run_spec
+from mustrd.namespace import MUST, TRIPLESTORE
+from mustrd.parallel import partition
+from mustrd.spec_component import ThenSpec, WhenSpec
+
+GRAPHDB = {
+    "type": TRIPLESTORE.GraphDb, "uri": URIRef("urn:store:gdb"),
+    "url": "http://localhost:7200", "repository": "mustrd",
+    "username": "u", "password": "p",
+    "input_graph": "https://example.org/input", "isolate_graphs": True,
+}
+
+
+class _FakeResponse:
+    def __init__(self, status_code=200, content=b""):
+        self.status_code = status_code
+        self.content = content
+
+
+def test_minted_graphs_derive_from_the_configured_iri_and_differ_per_spec():
+    first, second = isolate(GRAPHDB), isolate(GRAPHDB)
+    assert first["input_graph"].startswith("https://example.org/input/mustrd-")
+    assert first["input_graph"] != second["input_graph"]
+    # The store's own config is untouched.
+    assert GRAPHDB["input_graph"] == "https://example.org/input"
+
+
+def test_a_store_without_graphs_still_gets_a_named_input_graph():
+    isolated = isolate({"type": TRIPLESTORE.GraphDb, "input_graph": None})
+    assert isolated["input_graph"].startswith("urn:mustrd:isolated:")
+    assert "output_graph" not in isolated
+    assert mint_graph("http://ex/g/", "t", "input_graph") == "http://ex/g/mustrd-t"
+
+
+def test_isolated_graphs_are_dropped_even_when_the_spec_fails():
+    deleted = []
+    with patch.object(requests.Session, "delete",
+                      side_effect=lambda url, auth: deleted.append(url) or _FakeResponse(204)):
+        try:
+            with isolated_graphs(GRAPHDB) as triple_store:
+                minted = triple_store["input_graph"]
+                raise RuntimeError("spec blew up")
+        except RuntimeError:
+            pass
+    assert len(deleted) == 1
+    assert "mustrd-" in deleted[0] and minted.rsplit("-", 1)[1] in deleted[0]
+
+
+def test_run_spec_loads_queries_and_drops_its_own_graph():
+    calls = []
+
+    def put(url, auth, data, headers):
+        calls.append(("put", url))
+        return _FakeResponse(204)
+
+    def post(url, data, params, auth, headers):
+        calls.append(("post", params["default-graph-uri"]))
+        return _FakeResponse(200, b"<http://ex/s> <http://ex/p> <http://ex/o> .")
+
+    def delete(url, auth):
+        calls.append(("delete", url))
+        return _FakeResponse(204)
+
+    given = Graph().parse(data="<http://ex/s> <http://ex/p> <http://ex/o> .", format="ttl")
+    then = Graph().parse(data="<http://ex/s> <http://ex/p> <http://ex/o> .", format="ttl")
+    spec = Specification(URIRef("urn:spec"), GRAPHDB, given,
+                         [WhenSpec("CONSTRUCT { ?s ?p ?o } WHERE { ?s ?p ?o }", MUST.ConstructSparql)],
+                         ThenSpec(then))
+
+    with patch.object(requests.Session, "put", side_effect=put), \
+            patch.object(requests.Session, "post", side_effect=post), \
+            patch.object(requests.Session, "delete", side_effect=delete):
+        result = run_spec(spec)
+
+    assert isinstance(result, SpecPassed)
+    (_, put_url), (_, queried), (_, delete_url) = calls
+    assert queried.startswith("https://example.org/input/mustrd-")
+    token = queried.rsplit("mustrd-", 1)[1]
+    assert token in put_url and token in delete_url
+
+
+def test_isolate_graphs_is_read_from_the_store_config():
+    store = URIRef("urn:store:gdb")
+    config = Graph()
+    config.add((store, RDF.type, TRIPLESTORE.GraphDb))
+    config.add((store, TRIPLESTORE.url, Literal("http://localhost:7200")))
+    config.add((store, TRIPLESTORE.repository, Literal("mustrd")))
+    config.add((store, TRIPLESTORE.isolateGraphs, Literal(True)))
+
+    assert get_triple_stores(config)[0]["isolate_graphs"] is True
+
+
+def test_specs_against_an_isolating_store_are_not_serialised():
+    specs = [Specification(URIRef(f"urn:{n}"), GRAPHDB, None, [], None) for n in "abc"]
+    local, remote = partition(specs)
+    assert local == []
+    assert sorted(remote.values()) == [[0], [1], [2]]
@@ -0,0 +1,59 @@
+"""Debug messages are only formatted when DEBUG is on (mustrd.lazy_log)."""
+import logging
+from unittest.mock import patch
+
+import pandas
+from rdflib import Graph, Literal, URIRef
+
+from mustrd.lazy_log import Lazy, brief, turtle
+from mustrd.mustrd import SpecPassed, Specification, run_spec
+from mustrd.namespace import MUST, TRIPLESTORE
+from mustrd.spec_component import ThenSpec, WhenSpec
+
+EX = "http://ex/"
+CONSTRUCT = WhenSpec("CONSTRUCT { ?s ?p ?o } WHERE { ?s ?p ?o }", MUST.ConstructSparql)
+
+
+def _given(size=3):
+    graph = Graph()
+    for n in range(size):
+        graph.add((URIRef(f"{EX}s{n}"), URIRef(EX + "p"), Literal(n)))
+    return graph
+
+
+def _run(given):
+    spec = Specification(URIRef("urn:spec"), {"type": TRIPLESTORE.RdfLib}, given, [CONSTRUCT], ThenSpec(given))
+    serialize = Graph.serialize
+    with patch.object(Graph, "serialize", autospec=True, side_effect=serialize) as serialized:
+        assert isinstance(run_spec(spec), SpecPassed)
+    return [call.kwargs.get("format") for call in serialized.call_args_list]
+
+
+def test_lazy_is_worked_out_only_when_formatted():
+    calls = []
+    value = Lazy(lambda: calls.append(1) or "text")
+    assert not calls
+    assert f"{value}" == "text" and calls == [1]
+
+
+def test_a_spec_serializes_nothing_with_debug_off(caplog):
+    caplog.set_level(logging.INFO, logger="mustrd")
+    assert "turtle" not in _run(_given())
+
+
+def test_with_debug_on_the_given_is_logged_as_turtle(caplog):
+    caplog.set_level(logging.DEBUG, logger="mustrd")
+    given = _given()
+    assert "turtle" in _run(given)
+    assert any(":s0 " in record.getMessage() for record in caplog.records)
+
+
+def test_brief_says_how_big_a_result_is():
+    assert str(brief(_given(4))) == "<Graph of 4 triples>"
+    assert str(brief(pandas.DataFrame({"s": [1, 2], "o": [3, 4]}))) == "<DataFrame of 2 rows x 2 columns>"
+    assert str(brief("x" * 1000)).endswith("(1000 characters)")
+    assert str(brief(None)) == "None"
+
+
+def test_turtle_serializes_when_formatted():
+    assert ":s0 " in str(turtle(_given()))
@@ -0,0 +1,96 @@
+"""A given already loaded in a store is not uploaded again (mustrd.loaded_givens)."""
+import io
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+import requests
+from rdflib import Graph, URIRef
+
+from mustrd import loaded_givens
+from mustrd.mustrd import SpecPassed, Specification, run_spec
+from mustrd.namespace import MUST, TRIPLESTORE
+from mustrd.runner import generate_specs
+from mustrd.spec_component import ThenSpec, WhenSpec
+
+DATA = b"<http://ex/s> <http://ex/p> <http://ex/o> .\n"
+GRAPHDB = {"type": TRIPLESTORE.GraphDb, "uri": "urn:store:gdb", "url": "http://localhost:7200",
+           "repository": "mustrd", "username": "u", "password": "p", "input_graph": None}
+CONSTRUCT = WhenSpec("CONSTRUCT { ?s ?p ?o } WHERE { ?s ?p ?o }", MUST.ConstructSparql)
+UPDATE = WhenSpec("INSERT DATA { <http://ex/s> <http://ex/p> <http://ex/o> }", MUST.UpdateSparql)
+
+
+@pytest.fixture(autouse=True)
+def nothing_loaded():
+    loaded_givens._loaded.clear()
+    yield
+    loaded_givens._loaded.clear()
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self):
+        self.content = DATA
+        self.raw = io.BytesIO(DATA)
+
+    def close(self):
+        pass
+
+
+def _spec(fingerprint, when=CONSTRUCT, triple_store=GRAPHDB):
+    graph = Graph().parse(data=DATA.decode(), format="nt")
+    return Specification(URIRef("urn:spec"), triple_store, graph, [when], ThenSpec(graph),
+                         given_fingerprint=fingerprint)
+
+
+def _uploads(*specs):
+    puts = []
+    with patch.object(requests.Session, "put", side_effect=lambda **kw: puts.append(kw) or _Response()), \
+            patch.object(requests.Session, "post", side_effect=lambda **kw: _Response()):
+        for spec in specs:
+            assert isinstance(run_spec(spec), SpecPassed)
+    return len(puts)
+
+
+def test_read_only_specs_sharing_a_given_upload_it_once():
+    assert _uploads(_spec("a"), _spec("a"), _spec("a")) == 1
+
+
+def test_a_different_given_is_uploaded():
+    assert _uploads(_spec("a"), _spec("b"), _spec("a")) == 3
+
+
+def test_an_update_spec_makes_the_next_spec_upload_again():
+    # The update itself runs against the loaded given; the spec after it cannot.
+    assert _uploads(_spec("a"), _spec("a", UPDATE), _spec("a")) == 2
+    loaded_givens._loaded.clear()
+    assert _uploads(_spec("a", UPDATE), _spec("a", UPDATE)) == 2
+
+
+def test_a_given_without_a_fingerprint_is_always_uploaded():
+    assert _uploads(_spec(None), _spec(None)) == 2
+
+
+def test_a_store_can_opt_out():
+    store = dict(GRAPHDB, reuse_givens=False)
+    assert _uploads(_spec("a", triple_store=store), _spec("a", triple_store=store)) == 2
+
+
+def test_a_failed_upload_is_not_remembered():
+    spec = _spec("a")
+    with patch.object(requests.Session, "put", side_effect=requests.ConnectionError("down")), \
+            pytest.raises(requests.ConnectionError):
+        run_spec(spec)
+    assert not loaded_givens.is_loaded(GRAPHDB, "a")
+
+
+def test_specs_reading_one_given_file_share_a_fingerprint():
+    config = {"spec_path": Path("test/test-specs/expected-success"), "data_path": Path("test/data")}
+    specs, _ = generate_specs(config, [{"type": TRIPLESTORE.RdfLib, "uri": TRIPLESTORE.RdfLib}])
+    by_file = {}
+    for spec in specs:
+        if spec.given_fingerprint:
+            by_file.setdefault(spec.given_fingerprint, set()).add(spec.spec_uri)
+    assert by_file
+    assert any(len(uris) > 1 for uris in by_file.values())
@@ -0,0 +1,29 @@
+"""mustrd's model graphs are parsed once per process (mustrd.model_graphs)."""
+from pathlib import Path
+
+from rdflib import Graph
+
+from mustrd.config import parse_config
+from mustrd.model_graphs import MUSTRD_SHAPES, model_graph
+from mustrd.namespace import MUST
+
+CONFIG = Path("test/test-mustrd-config/test_mustrd_simple.ttl")
+
+
+def test_each_model_graph_is_parsed_once_and_shared():
+    shapes = model_graph(MUSTRD_SHAPES)
+    assert model_graph(MUSTRD_SHAPES) is shapes
+    assert (MUST.TestSpecShape, None, None) in shapes
+
+
+def test_parsing_a_config_again_does_not_reparse_the_model(monkeypatch):
+    parse_config(CONFIG)
+    parsed = []
+    real = Graph.parse
+    monkeypatch.setattr(Graph, "parse",
+                        lambda self, source=None, **kw: parsed.append(source) or real(self, source, **kw))
+
+    parse_config(CONFIG)
+    parse_config(CONFIG)
+
+    assert [str(source) for source in parsed] == [str(CONFIG), str(CONFIG)]
@@ -7,6 +7,7 @@ Anzo integration tests — they are left to be run against a real instance.
 from unittest.mock import patch
 
 import pytest
+import requests
 from rdflib import Graph, Literal, Variable
 
 from mustrd import mustrdStardog
@@ -96,7 +97,7 @@ def test_select_posts_query_with_dataset_params():
         captured["headers"] = headers
         return _FakeResponse(200, b"results")
 
-    with patch.object(mustrdStardog.requests, "post", side_effect=fake_post):
+    with patch.object(requests.Session, "post", side_effect=fake_post):
         result = mustrdStardog.execute_select(ts, "SELECT * WHERE { ?s ?p ?o }")
 
     assert result == "results"
@@ -129,7 +130,7 @@ def test_upload_given_puts_turtle_to_input_graph():
     given = Graph()
     given.parse(data="<http://ex/s> <http://ex/p> <http://ex/o> .", format="ttl")
 
-    with patch.object(mustrdStardog.requests, "put", side_effect=fake_put):
+    with patch.object(requests.Session, "put", side_effect=fake_put):
         mustrdStardog.upload_given(ts, given)
 
     assert captured["url"].startswith("http://localhost:5820/mustrd?graph=")
@@ -140,7 +141,7 @@ def test_upload_given_puts_turtle_to_input_graph():
 
 def test_auth_error_raises():
     ts = {"url": "http://localhost:5820", "database": "mustrd", "token": "bad"}
-    with patch.object(mustrdStardog.requests, "post",
+    with patch.object(requests.Session, "post",
                       side_effect=lambda **kw: _FakeResponse(401, b"nope")):
         with pytest.raises(Exception):
             mustrdStardog.execute_select(ts, "SELECT * WHERE { ?s ?p ?o }")
@@ -0,0 +1,96 @@
+"""Each ontology file is parsed once per report (mustrd.ontology.OntologySet)."""
+from unittest.mock import patch
+
+from rdflib import Graph
+
+from mustrd.coverage import term_source_index
+from mustrd.ontology import OntologySet, declared_terms, load_ontology, ontology_report, term_ontology_index
+from mustrd.reporting import ReportOptions, produce_report
+
+PLACES = """
+@prefix place: <http://onto.org/place/> .
+@prefix owl:   <http://www.w3.org/2002/07/owl#> .
+<http://onto.org/place/> a owl:Ontology .
+place:City a owl:Class .
+"""
+
+ROUTES = """
+@prefix route: <http://onto.org/route/> .
+@prefix owl:   <http://www.w3.org/2002/07/owl#> .
+<http://onto.org/route/> a owl:Ontology .
+route:connects a owl:ObjectProperty .
+"""
+
+
+def _ontologies(tmp_path):
+    (tmp_path / "places.ttl").write_text(PLACES)
+    (tmp_path / "routes.ttl").write_text(ROUTES)
+    return tmp_path
+
+
+def _parses():
+    return patch.object(Graph, "parse", autospec=True, side_effect=Graph.parse)
+
+
+def test_every_reader_shares_one_parse_per_file(tmp_path):
+    ontologies = OntologySet([_ontologies(tmp_path)])
+    with _parses() as parsed:
+        union = load_ontology(ontologies)
+        rows = ontology_report(ontologies)
+        by_ontology = term_ontology_index(ontologies)
+        by_file = term_source_index(ontologies)
+    assert parsed.call_count == 2
+    assert set(declared_terms(union)) == {"http://onto.org/place/City", "http://onto.org/route/connects"}
+    assert {r["uri"] for r in rows} == {"http://onto.org/place/", "http://onto.org/route/"}
+    assert by_ontology["http://onto.org/route/connects"] == "http://onto.org/route/"
+    assert by_file["http://onto.org/place/City"]["file"].name == "places.ttl"
+
+
+def test_the_union_keeps_each_files_prefixes(tmp_path):
+    union = OntologySet([_ontologies(tmp_path)]).union()
+    prefixes = dict(union.namespaces())
+    assert str(prefixes["place"]) == "http://onto.org/place/"
+    assert str(prefixes["route"]) == "http://onto.org/route/"
+
+
+def test_a_file_that_does_not_parse_is_read_once_and_skipped(tmp_path, caplog):
+    _ontologies(tmp_path)
+    (tmp_path / "broken.ttl").write_text("this is not turtle")
+    ontologies = OntologySet([tmp_path])
+    assert len(load_ontology(ontologies)) == 4
+    assert [r["uri"] for r in ontology_report(ontologies) if "broken" in r["path"]] == [None]
+    assert caplog.text.count("Could not parse ontology file") == 1
+
+
+def test_no_files_is_no_ontology(tmp_path):
+    assert OntologySet([tmp_path]).union() is None
+    assert OntologySet([]).files == []
+
+
+def test_a_report_parses_the_ontology_once(tmp_path):
+    _ontologies(tmp_path)
+    opts = ReportOptions(md_path=str(tmp_path / "report" / "report.md"), term_coverage=True,
+                         term_links="file", ontology_paths=(str(tmp_path),))
+    spec = {"name": "a.mustrd.ttl", "uri": "http://ex/a", "passed": True, "given": None,
+            "queries": ["SELECT * WHERE { ?s a <http://onto.org/place/City> }"]}
+    with _parses() as parsed:
+        coverage, _, _ = produce_report([spec], [], [], True, opts)
+    assert coverage is not None
+    assert parsed.call_count == 2
+
+
+def test_a_report_with_coverage_cq_and_file_links(tmp_path):
+    _ontologies(tmp_path)
+    opts = ReportOptions(md_path=str(tmp_path / "report" / "report.md"), term_coverage=True, cq=True,
+                         term_links="file", ontology_paths=(str(tmp_path),))
+    spec = {"name": "a.mustrd.ttl", "uri": "http://ex/a", "passed": True, "given": None,
+            "queries": ["SELECT * WHERE { ?s a <http://onto.org/place/City> }"]}
+    cq = {"id": "http://ex/cq/where", "name": "where", "source_file": None,
+          "question": "Where is it?", "questions": ["Where is it?"], "specs": [spec], "missing_specs": []}
+    with _parses() as parsed:
+        coverage, _, _ = produce_report([spec], [cq], [], True, opts)
+    assert coverage is not None
+    assert parsed.call_count == 2
+    report = (tmp_path / "report" / "report.md").read_text()
+    assert "## Competency Questions Report" in report
+    assert "places.ttl#L" in report
@@ -0,0 +1,85 @@
+"""Updates on the rdflib backend write to a copy-on-write overlay of the given,
+never to the given itself (mustrd.overlay)."""
+from pathlib import Path
+
+import pytest
+from rdflib import ConjunctiveGraph
+from rdflib.plugins.stores.memory import Memory
+
+from mustrd.mustrd import SpecPassed, run_spec
+from mustrd.mustrdRdfLib import execute_update
+from mustrd.namespace import MUST, TRIPLESTORE
+from mustrd.overlay import is_overlay, overlay
+from mustrd.runner import generate_specs
+
+GIVEN = """
+    @prefix : <https://example.org/> .
+    :a :p 1 ; :q 2 .
+    :b :p 3 .
+    :g1 { :a :p 1 . :c :p 4 . }
+    :g2 { :d :p 5 . }
+"""
+
+UPDATES = [
+    "PREFIX : <https://example.org/> INSERT DATA { :x :p 9 . GRAPH :g3 { :y :p 8 } }",
+    "PREFIX : <https://example.org/> DELETE WHERE { ?s :p ?o }",
+    "PREFIX : <https://example.org/> DELETE { GRAPH :g1 { ?s ?p ?o } } WHERE { GRAPH :g1 { ?s ?p ?o } }",
+    "PREFIX : <https://example.org/> DELETE { ?s :p ?o } INSERT { ?s :r ?o } WHERE { ?s :p ?o }",
+    "PREFIX : <https://example.org/> DELETE DATA { :a :q 2 } ; INSERT DATA { :a :q 2 }",
+    "PREFIX : <https://example.org/> DROP GRAPH :g1",
+    "PREFIX : <https://example.org/> CLEAR ALL",
+    "PREFIX : <https://example.org/> INSERT { GRAPH :g2 { ?s :p ?o } } WHERE { GRAPH :g1 { ?s :p ?o } }",
+]
+
+
+def _given():
+    given = ConjunctiveGraph(store=Memory())
+    given.parse(data=GIVEN, format="trig")
+    return given
+
+
+def _quads(graph):
+    # Each parse names its graph and default context afresh; compare by role.
+    names = {graph.default_context.identifier: "default", graph.identifier: "graph"}
+    return sorted((s, p, o, names.get(c.identifier, str(c.identifier)))
+                  for s, p, o, c in graph.quads((None, None, None, None)))
+
+
+@pytest.mark.parametrize("update", UPDATES)
+def test_an_update_on_the_overlay_matches_one_on_a_copy(update):
+    copy = _given()
+    copy.update(update)
+
+    given = _given()
+    before = _quads(given)
+    view = overlay(given)
+    view.update(update)
+
+    assert _quads(view) == _quads(copy)
+    assert set(view) == set(copy)
+    assert len(view) == len(copy)
+    assert _quads(given) == before
+
+
+def test_execute_update_leaves_the_given_as_parsed():
+    given = _given()
+    before = _quads(given)
+    store = {"type": TRIPLESTORE.RdfLib, "given": given}
+
+    result = execute_update(store, given, "PREFIX : <https://example.org/> DELETE WHERE { ?s ?p ?o }")
+
+    assert len(result) == 0 and is_overlay(result)
+    assert store["given"] is result
+    assert _quads(given) == before
+
+
+def test_an_update_spec_can_be_run_again():
+    config = {"spec_path": Path("test/test-specs/expected-success"), "data_path": Path("test/data")}
+    specs, _ = generate_specs(config, [{"type": TRIPLESTORE.RdfLib, "uri": TRIPLESTORE.RdfLib}])
+    updates = [spec for spec in specs if spec.when[0].queryType == MUST.UpdateSparql]
+    assert updates
+
+    for spec in updates:
+        first, second = run_spec(spec), run_spec(spec)
+        assert isinstance(first, SpecPassed), first
+        assert type(second) is type(first)
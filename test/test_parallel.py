@@ -0,0 +1,109 @@
+"""Concurrent spec execution (mustrd.parallel, `--jobs`).
+
+Runs the repo's own expected-success specs through rdflib serially and with a
+pool, and checks the two runs agree spec for spec — same order, same result
+types. The remote-store path needs no server: it is the grouping that keeps two
+specs against one store from running at once, and that is pure.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from mustrd import diff_render, parallel
+from mustrd.diff_render import DiffLimits
+from mustrd.mustrd import Specification, SpecInvalid, SpecPassed, run_specs
+from mustrd.namespace import TRIPLESTORE
+from mustrd.parallel import partition, process_pool, resolve_jobs, run_specs_timed
+from mustrd.runner import generate_specs
+
+SPECS = Path("test/test-specs/expected-success")
+DATA = Path("test/data")
+
+
+def _specs():
+    config = {"spec_path": SPECS, "data_path": DATA}
+    store = {"type": TRIPLESTORE.RdfLib, "uri": TRIPLESTORE.RdfLib}
+    specs, _ = generate_specs(config, [store])
+    return specs
+
+
+def test_parallel_run_matches_serial_run_in_order():
+    specs = _specs()
+    assert len(specs) > 10
+
+    serial = run_specs(_specs())
+    parallel = run_specs(specs, jobs=4)
+
+    assert [r.spec_uri for r in parallel] == [s.spec_uri for s in specs]
+    assert [type(r) for r in parallel] == [type(r) for r in serial]
+    assert all(isinstance(r, SpecPassed) for r in parallel)
+
+
+def test_timed_run_reports_a_duration_per_spec():
+    specs = _specs()[:3]
+    outcomes = run_specs_timed(specs, jobs=2)
+    assert len(outcomes) == 3
+    assert all(duration >= 0 for _, duration in outcomes)
+
+
+def _spec(uri, store_type, store_uri=None):
+    return Specification(uri, {"type": store_type, "uri": store_uri or store_type},
+                         None, [], None)
+
+
+def test_remote_specs_are_grouped_per_store_and_rdflib_runs_locally():
+    specs = [
+        _spec("urn:a", TRIPLESTORE.RdfLib),
+        _spec("urn:b", TRIPLESTORE.GraphDb, "urn:store:gdb-1"),
+        _spec("urn:c", TRIPLESTORE.GraphDb, "urn:store:gdb-2"),
+        _spec("urn:d", TRIPLESTORE.GraphDb, "urn:store:gdb-1"),
+        SpecInvalid("urn:e", TRIPLESTORE.RdfLib, "broken"),
+        _spec("urn:f", TRIPLESTORE.RdfLib),
+    ]
+
+    local, remote = partition(specs)
+
+    assert local == [0, 5]
+    # Two specs against the same store share its input graph: one group, so they
+    # run one after the other.
+    assert remote["urn:store:gdb-1"] == [1, 3]
+    assert remote["urn:store:gdb-2"] == [2]
+    assert remote[None] == [4]
+
+
+def test_zero_jobs_means_one_per_cpu():
+    assert resolve_jobs(0) >= 1
+    assert resolve_jobs(3) == 3
+
+
+def test_worker_processes_are_not_forked():
+    with process_pool(1) as processes:
+        assert processes._mp_context.get_start_method() in ("forkserver", "spawn")
+
+
+def test_worker_processes_share_the_diff_limits(monkeypatch):
+    # A worker's graph comparison only builds "in both" if the run shows it.
+    monkeypatch.setattr(diff_render, "_limits", DiffLimits(max_triples=3, show_in_both=True))
+    with process_pool(1) as processes:
+        assert processes.submit(diff_render.diff_limits).result() == DiffLimits(max_triples=3, show_in_both=True)
+
+
+def test_jobs_is_one_budget_across_both_pools(monkeypatch):
+    sizes = {}
+
+    def pool(kind, make):
+        def sized(max_workers, **kwargs):
+            sizes[kind] = max_workers
+            return make(max_workers=max_workers)
+        return sized
+
+    monkeypatch.setattr(parallel, "process_pool", pool("processes", ThreadPoolExecutor))
+    monkeypatch.setattr(parallel, "ThreadPoolExecutor", pool("threads", ThreadPoolExecutor))
+    monkeypatch.setattr(parallel, "timed_run_spec",
+                        lambda spec: (SpecPassed(spec.spec_uri, spec.triple_store["type"]), 0.0))
+    specs = [_spec(f"urn:local{n}", TRIPLESTORE.RdfLib) for n in range(4)] + \
+        [_spec(f"urn:remote{n}", TRIPLESTORE.GraphDb, f"urn:store:gdb-{n}") for n in range(4)]
+
+    results = run_specs(specs, jobs=3)
+
+    assert [r.spec_uri for r in results] == [s.spec_uri for s in specs]
+    assert sizes == {"processes": 1, "threads": 2}
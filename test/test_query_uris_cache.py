@@ -0,0 +1,47 @@
+"""Each distinct query is parsed once per process (mustrd.ontology.query_uris)."""
+from unittest.mock import patch
+
+import pytest
+
+from mustrd import ontology
+from mustrd.ontology import query_uris, query_uris_cache_clear, query_uris_cache_info
+
+QUERY = "SELECT ?s WHERE { ?s a <http://onto.org/City> }"
+UPDATE = "INSERT DATA { <http://onto.org/a> <http://onto.org/p> 1 }"
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    query_uris_cache_clear()
+    yield
+    query_uris_cache_clear()
+
+
+def test_a_query_asked_about_again_is_not_parsed_again():
+    with patch.object(ontology, "prepareQuery", wraps=ontology.prepareQuery) as parsed:
+        first = query_uris(QUERY)
+        assert "http://onto.org/City" in first and query_uris(QUERY) == first
+    assert parsed.call_count == 1
+    info = query_uris_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+
+def test_updates_and_unparseable_text_are_cached_too():
+    assert {"http://onto.org/a", "http://onto.org/p"} <= query_uris(UPDATE)
+    assert query_uris("not sparql") == set()
+    query_uris("not sparql")
+    assert query_uris_cache_info().hits == 1
+
+
+def test_callers_cannot_change_what_is_cached():
+    query_uris(QUERY).add("http://onto.org/Other")
+    assert "http://onto.org/Other" not in query_uris(QUERY)
+
+
+def test_the_least_recently_used_query_is_dropped():
+    with patch.object(ontology, "_query_terms", ontology._QueryTermCache(2)):
+        for n in range(3):
+            query_uris(f"SELECT * WHERE {{ ?s <http://onto.org/p{n}> ?o }}")
+        query_uris("SELECT * WHERE { ?s <http://onto.org/p0> ?o }")
+        info = query_uris_cache_info()
+    assert (info.hits, info.misses, info.currsize, info.maxsize) == (0, 4, 2, 2)
@@ -0,0 +1,124 @@
+"""What an update spec reads back from a remote store (mustrd.read_back)."""
+import io
+from unittest.mock import patch
+
+import pytest
+import requests
+from rdflib import BNode, Graph, Literal, RDF, URIRef
+
+from mustrd import mustrdGraphDb, mustrdStardog
+from mustrd.mustrd import SpecPassed, Specification, get_triple_stores, run_spec
+from mustrd.namespace import MUST, TRIPLESTORE
+from mustrd.read_back import READ_BACK_ALL, read_back_query, scope_read_back
+from mustrd.spec_component import TableThenSpec, ThenSpec, WhenSpec
+
+EX = "http://ex/"
+RESULT = b"<http://ex/s> <http://ex/p> <http://ex/o> .\n<http://ex/s> <http://ex/q> \"\xc3\xa9\" .\n"
+
+
+class _StreamedResponse:
+    status_code = 200
+
+    def __init__(self, body=RESULT):
+        self.content = body
+        self.raw = io.BytesIO(body)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def _graph(data):
+    return Graph().parse(data=data, format="nt")
+
+
+def _update_spec(triple_store, then):
+    return Specification(URIRef("urn:spec"), triple_store, None,
+                         [WhenSpec("INSERT DATA { <http://ex/s> <http://ex/p> <http://ex/o> }", MUST.UpdateSparql)],
+                         then)
+
+
+GRAPHDB = {"type": TRIPLESTORE.GraphDb, "uri": "urn:store:gdb", "url": "http://localhost:7200",
+           "repository": "mustrd", "username": "u", "password": "p", "input_graph": None,
+           "read_back": TRIPLESTORE.ThenSubjects}
+
+
+def test_the_read_back_is_scoped_to_the_then_subjects_only_when_asked():
+    then = ThenSpec(_graph(RESULT.decode()))
+    scoped = scope_read_back(_update_spec(GRAPHDB, then))
+    assert scoped.triple_store["read_back_subjects"] == [URIRef(EX + "s")]
+    assert "VALUES ?s { <http://ex/s> }" in read_back_query(scoped.triple_store)
+    assert "read_back_subjects" not in GRAPHDB
+
+    whole = dict(GRAPHDB, read_back=None)
+    assert scope_read_back(_update_spec(whole, then)).triple_store is whole
+    assert read_back_query(whole) == READ_BACK_ALL
+
+
+@pytest.mark.parametrize("then", [
+    ThenSpec(Graph().add((BNode(), URIRef(EX + "p"), Literal(1)))),
+    ThenSpec(Graph()),
+    TableThenSpec(),
+])
+def test_a_then_that_cannot_name_its_subjects_is_read_back_whole(then):
+    spec = _update_spec(GRAPHDB, then)
+    assert scope_read_back(spec) is spec
+
+
+def test_graphdb_reads_back_the_then_subjects_as_streamed_ntriples():
+    posts = []
+
+    def post(**kwargs):
+        posts.append(kwargs)
+        return _StreamedResponse(b"" if len(posts) == 1 else RESULT)
+
+    then = ThenSpec(_graph(RESULT.decode()))
+    with patch.object(requests.Session, "post", side_effect=post):
+        result = run_spec(_update_spec(GRAPHDB, then))
+
+    assert isinstance(result, SpecPassed), result
+    update, read_back = posts
+    assert read_back["headers"]["Accept"] == "application/n-triples"
+    assert read_back["stream"] is True
+    assert "VALUES ?s { <http://ex/s> }" in read_back["data"]
+
+
+def test_stardog_reads_back_only_the_written_graphs_when_asked():
+    stardog = {"type": TRIPLESTORE.Stardog, "url": "http://localhost:5820", "database": "mustrd",
+               "token": "t", "input_graph": "http://ex/input", "materialised_graphs": ["http://ex/reference"],
+               "virtual_graphs": ["virtual://v"]}
+    posts = []
+
+    def post(**kwargs):
+        posts.append(kwargs)
+        return _StreamedResponse()
+
+    with patch.object(requests.Session, "post", side_effect=post):
+        mustrdStardog.read_back(stardog)
+        mustrdStardog.read_back(dict(stardog, read_back=TRIPLESTORE.WrittenGraphs))
+
+    dataset, written = (post["params"]["default-graph-uri"] for post in posts)
+    assert dataset == ["http://ex/input", "http://ex/reference", "virtual://v"]
+    assert written == ["http://ex/input"]
+
+
+def test_the_ntriples_stream_is_parsed_and_released():
+    response = _StreamedResponse()
+    with patch.object(requests.Session, "post", return_value=response):
+        graph = mustrdGraphDb.read_back(GRAPHDB)
+    assert (URIRef(EX + "s"), URIRef(EX + "q"), Literal("é")) in graph
+    assert len(graph) == 2 and response.closed
+
+
+def test_read_back_is_read_from_the_store_config():
+    store = URIRef("urn:store:gdb")
+    config = Graph()
+    config.add((store, RDF.type, TRIPLESTORE.GraphDb))
+    config.add((store, TRIPLESTORE.url, Literal("http://localhost:7200")))
+    config.add((store, TRIPLESTORE.repository, Literal("mustrd")))
+    config.add((store, TRIPLESTORE.readBack, TRIPLESTORE.ThenSubjects))
+    assert get_triple_stores(config)[0]["read_back"] == TRIPLESTORE.ThenSubjects
+
+    config.set((store, TRIPLESTORE.readBack, URIRef("https://mustrd.org/triplestore/Everything")))
+    with pytest.raises(ValueError, match="not conform"):
+        get_triple_stores(config)
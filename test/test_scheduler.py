@@ -0,0 +1,101 @@
+"""The order specs run in (mustrd.scheduler)."""
+import asyncio
+
+import pytest
+from rdflib import Graph, URIRef
+
+from mustrd import scheduler
+from mustrd.mustrd import Specification, run_specs
+from mustrd.namespace import MUST, TRIPLESTORE
+from mustrd.scheduler import FILE_ORDER, GIVEN_ORDER, in_order, in_order_async, schedule
+from mustrd.spec_component import ThenSpec, WhenSpec
+
+GRAPHDB = {"type": TRIPLESTORE.GraphDb, "uri": "urn:store:gdb"}
+STARDOG = {"type": TRIPLESTORE.Stardog, "uri": "urn:store:sd"}
+SELECT = WhenSpec("SELECT * WHERE { ?s ?p ?o }", MUST.SelectSparql)
+UPDATE = WhenSpec("DELETE WHERE { ?s ?p ?o }", MUST.UpdateSparql)
+
+
+def _spec(name, fingerprint, when=SELECT, triple_store=GRAPHDB, given=True):
+    return Specification(URIRef(f"urn:spec:{name}"), triple_store, Graph() if given else None, [when],
+                         ThenSpec(Graph()), given_fingerprint=fingerprint)
+
+
+def _names(specs, order=GIVEN_ORDER):
+    return [str(specs[position].spec_uri).split(":")[-1] for position in schedule(specs, order)]
+
+
+def test_specs_sharing_a_given_run_together_read_only_first():
+    specs = [_spec("a1", "a", UPDATE), _spec("b1", "b"), _spec("a2", "a"), _spec("b2", "b", UPDATE),
+             _spec("a3", "a")]
+    assert _names(specs) == ["a2", "a3", "a1", "b1", "b2"]
+
+
+def test_stores_are_grouped_apart():
+    specs = [_spec("g1", "a"), _spec("s1", "a", triple_store=STARDOG), _spec("g2", "a")]
+    assert _names(specs) == ["g1", "g2", "s1"]
+
+
+def test_a_spec_without_a_given_stays_after_the_spec_it_inherits_from():
+    specs = [_spec("a1", "a", UPDATE), _spec("inherits", None, given=False), _spec("b1", "b"),
+             _spec("a2", "a")]
+    assert _names(specs) == ["a2", "a1", "inherits", "b1"]
+
+
+def test_a_given_without_a_fingerprint_is_not_moved():
+    specs = [_spec("x", None), _spec("a1", "a"), _spec("y", None), _spec("a2", "a")]
+    assert _names(specs) == ["x", "a1", "a2", "y"]
+
+
+def test_file_order_keeps_the_order_specs_were_read_in():
+    specs = [_spec("a1", "a", UPDATE), _spec("b1", "b"), _spec("a2", "a")]
+    assert _names(specs, FILE_ORDER) == ["a1", "b1", "a2"]
+
+
+def test_results_come_back_in_input_order():
+    specs = [_spec("a1", "a", UPDATE), _spec("b1", "b"), _spec("a2", "a")]
+    ran = []
+
+    def run(scheduled):
+        ran.extend(spec.spec_uri for spec in scheduled)
+        return [spec.spec_uri for spec in scheduled]
+
+    assert in_order(specs, GIVEN_ORDER, run) == [spec.spec_uri for spec in specs]
+    assert ran == [specs[2].spec_uri, specs[0].spec_uri, specs[1].spec_uri]
+
+
+def test_awaited_results_come_back_in_the_same_order():
+    specs = [_spec("a1", "a", UPDATE), _spec("b1", "b"), _spec("a2", "a")]
+
+    ran = []
+
+    async def run(scheduled):
+        ran.extend(spec.spec_uri for spec in scheduled)
+        return [spec.spec_uri for spec in scheduled]
+
+    assert asyncio.run(in_order_async(specs, GIVEN_ORDER, run)) == [spec.spec_uri for spec in specs]
+    assert ran == [specs[2].spec_uri, specs[0].spec_uri, specs[1].spec_uri]
+
+
+def test_run_specs_runs_in_the_scheduled_order(monkeypatch):
+    specs = [_spec("a1", "a", UPDATE), _spec("b1", "b"), _spec("a2", "a")]
+    ran = []
+    monkeypatch.setattr("mustrd.mustrd.run_spec", lambda spec: ran.append(spec) or spec.spec_uri)
+
+    assert run_specs(specs, order=GIVEN_ORDER) == [spec.spec_uri for spec in specs]
+    assert ran == [specs[2], specs[0], specs[1]]
+
+
+def test_specs_run_as_read_unless_asked(monkeypatch):
+    specs = [_spec("a1", "a", UPDATE), _spec("b1", "b"), _spec("a2", "a")]
+    ran = []
+    monkeypatch.setattr("mustrd.mustrd.run_spec", lambda spec: ran.append(spec) or spec.spec_uri)
+
+    run_specs(specs)
+    assert ran == specs
+    assert schedule(specs) == [0, 1, 2]
+
+
+def test_an_unknown_order_is_refused():
+    with pytest.raises(ValueError, match="Unknown spec order"):
+        scheduler.schedule([], "random")
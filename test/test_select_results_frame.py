@@ -0,0 +1,40 @@
+"""SELECT results in SPARQL JSON become a DataFrame (json_results_to_panda_dataframe)."""
+import json
+
+from rdflib import XSD
+
+from mustrd.mustrd import json_results_to_panda_dataframe
+
+
+def _results(*bindings):
+    return json.dumps({"head": {"vars": []}, "results": {"bindings": list(bindings)}})
+
+
+def test_columns_follow_first_appearance_and_unbound_is_blank():
+    df = json_results_to_panda_dataframe(_results(
+        {"s": {"type": "uri", "value": "https://example.org/s"},
+         "o": {"type": "literal", "value": "1", "datatype": str(XSD.integer)}},
+        {"o": {"type": "literal", "value": "plain"},
+         "extra": {"type": "bnode", "value": "b0"}},
+    ))
+
+    assert list(df.columns) == ["s", "s_datatype", "o", "o_datatype", "extra", "extra_datatype"]
+    assert df.to_dict("records") == [
+        {"s": "https://example.org/s", "s_datatype": str(XSD.anyURI),
+         "o": "1", "o_datatype": str(XSD.integer), "extra": "", "extra_datatype": ""},
+        {"s": "", "s_datatype": "",
+         "o": "plain", "o_datatype": str(XSD.string), "extra": "b0", "extra_datatype": str(XSD.anyURI)},
+    ]
+
+
+def test_no_rows_or_no_variables_give_an_empty_frame():
+    assert json_results_to_panda_dataframe(_results()).empty
+    assert json_results_to_panda_dataframe(_results({}, {})).shape == (0, 0)
+
+
+def test_a_large_result_is_built_in_one_pass():
+    rows = [{"n": {"type": "literal", "value": str(i), "datatype": str(XSD.integer)}}
+            for i in range(50_000)]
+    df = json_results_to_panda_dataframe(_results(*rows))
+    assert df.shape == (50_000, 2)
+    assert df["n"].iloc[-1] == "49999"
@@ -0,0 +1,149 @@
+"""SELECT results parsed a binding at a time from the response stream
+(mustrd.sparql_results)."""
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+from rdflib import URIRef
+
+from rdflib import Graph
+from urllib3.exceptions import ProtocolError
+
+from mustrd import mustrd, mustrdGraphDb, steprunner
+from mustrd.mustrd import Specification, TripleStoreConnectionError, json_results_to_panda_dataframe
+from mustrd.namespace import MUST, TRIPLESTORE
+from mustrd.sparql_results import StreamedSelectResult, iter_select_bindings
+from mustrd.spec_component import SpadeEdnGroupSourceWhenSpec, ThenSpec, WhenSpec
+
+BINDINGS = [
+    {"s": {"type": "uri", "value": "https://example.org/s"},
+     "o": {"type": "literal", "value": "café \"]}, {", "xml:lang": "fr"}},
+    {"o": {"type": "literal", "value": "1", "datatype": "http://www.w3.org/2001/XMLSchema#integer"}},
+]
+# A variable called "bindings" in the head must not be taken for the array.
+DOCUMENT = json.dumps({"head": {"vars": ["bindings", "s", "o"]},
+                       "results": {"bindings": BINDINGS}}, ensure_ascii=False).encode("utf-8")
+
+
+def _chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, len(DOCUMENT)])
+def test_bindings_are_the_same_however_the_body_is_chunked(size):
+    assert list(iter_select_bindings(_chunked(DOCUMENT, size))) == BINDINGS
+
+
+@pytest.mark.parametrize("body", [
+    b"not json",
+    b'{"results": {"bindings": [{}, ]}}',
+    b'{"results": {"bindings": [{} {}]}}',
+    b'{"results": {"bindings": [{}',
+    b'{"results": {"bindings": [{}]}',
+])
+def test_a_malformed_body_is_a_value_error(body):
+    with pytest.raises(ValueError):
+        list(iter_select_bindings(_chunked(body, 3)))
+
+
+class _StreamingResponse:
+    url = "http://localhost/repositories/mustrd"
+
+    def __init__(self, status_code: int, body: bytes):
+        self.status_code = status_code
+        self.body = body
+        self.closed = False
+
+    @property
+    def content(self):
+        return self.body
+
+    def iter_content(self, chunk_size):
+        return iter(_chunked(self.body, 5))
+
+    def close(self):
+        self.closed = True
+
+
+TRIPLE_STORE = {"url": "http://localhost", "repository": "mustrd", "username": "u",
+                "password": "p", "input_graph": None}
+
+
+def test_graphdb_select_is_streamed_into_the_frame():
+    response = _StreamingResponse(200, DOCUMENT)
+    with patch.object(requests.Session, "post", return_value=response) as post:
+        result = mustrdGraphDb.stream_select(TRIPLE_STORE, "SELECT * { ?s ?o ?o }")
+
+    assert post.call_args.kwargs["stream"] is True
+    assert isinstance(result, StreamedSelectResult) and not response.closed
+    df = json_results_to_panda_dataframe(result)
+    assert list(df["o"]) == [BINDINGS[0]["o"]["value"], "1"]
+    assert response.closed
+
+
+def test_graphdb_select_errors_are_raised_before_streaming():
+    with patch.object(requests.Session, "post", return_value=_StreamingResponse(401, b"nope")):
+        with pytest.raises(Exception, match="authentication error"):
+            mustrdGraphDb.stream_select(TRIPLE_STORE, "SELECT * { ?s ?o ?o }")
+
+
+def test_a_backend_without_stream_select_still_answers_select():
+    class Legacy:
+        @staticmethod
+        def execute_select(triple_store, query, bindings):
+            return DOCUMENT.decode("utf-8")
+
+    store = URIRef("urn:test:legacy-store")
+    steprunner.register_sparql_http_backend(store, Legacy)
+    when = WhenSpec("SELECT * WHERE { ?s ?p ?o }", MUST.SelectSparql)
+    assert steprunner.run_when_impl("urn:spec", {"type": store}, when) == DOCUMENT.decode("utf-8")
+
+
+def test_a_spade_step_result_that_is_replaced_is_closed():
+    first, second = (StreamedSelectResult(MagicMock()) for _ in range(2))
+    steps = SpadeEdnGroupSourceWhenSpec(
+        [WhenSpec("SELECT * WHERE { ?s ?p ?o }", MUST.SelectSparql)] * 2, MUST.SpadeEdnGroupSource)
+    with patch.object(steprunner, "run_when_impl", side_effect=[first, second]):
+        result = steprunner._spade_edn_group_source_anzo("urn:spec", {"type": TRIPLESTORE.Anzo}, steps)
+    assert result is second
+    first.response.close.assert_called_once()
+    second.response.close.assert_not_called()
+
+
+class _DroppedResponse(_StreamingResponse):
+    def iter_content(self, chunk_size):
+        yield self.body[:20]
+        raise requests.exceptions.ChunkedEncodingError(ProtocolError("Connection broken"))
+
+
+def test_a_connection_lost_mid_body_is_a_connection_error():
+    result = StreamedSelectResult(_DroppedResponse(200, DOCUMENT))
+    with pytest.raises(requests.ConnectionError, match="Connection lost"):
+        list(result.bindings())
+    assert result.response.closed
+
+
+SELECT = WhenSpec("SELECT * WHERE { ?s ?p ?o }", MUST.SelectSparql)
+
+
+def _spec(whens, then):
+    store = {"type": TRIPLESTORE.GraphDb, "uri": "urn:test:store"}
+    return Specification(URIRef("urn:spec"), store, Graph(), whens, then)
+
+
+def test_a_connection_lost_mid_body_fails_the_spec_as_a_connection_error():
+    response = _DroppedResponse(200, DOCUMENT)
+    with patch.object(mustrd, "upload_given"), \
+            patch.object(mustrd, "run_when_impl", return_value=StreamedSelectResult(response)):
+        result = mustrd.run_spec(_spec([SELECT], mustrd.TableThenSpec()))
+    assert isinstance(result, TripleStoreConnectionError)
+
+
+def test_streamed_results_no_spec_checks_are_closed():
+    first, second = (_StreamingResponse(200, DOCUMENT) for _ in range(2))
+    results = [StreamedSelectResult(first), StreamedSelectResult(second)]
+    # A graph then: the SELECT result never reaches table_comparison.
+    with patch.object(mustrd, "upload_given"), patch.object(mustrd, "run_when_impl", side_effect=results):
+        mustrd.run_spec(_spec([SELECT, SELECT], ThenSpec(Graph())))
+    assert first.closed and second.closed
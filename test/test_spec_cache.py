@@ -0,0 +1,112 @@
+"""The on-disk spec cache (mustrd.spec_cache): a re-run over unchanged spec files
+skips the parse and the SHACL validation, and reports exactly what the first run
+did."""
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+from rdflib import Graph
+
+import mustrd.mustrd as mustrd_module
+from mustrd import spec_cache
+from mustrd.mustrd import validate_specs
+from mustrd.namespace import TRIPLESTORE
+from mustrd.utils import get_mustrd_root
+
+SPECS = Path("test/test-specs/expected-failures")
+STORES = [{"type": TRIPLESTORE.RdfLib, "uri": TRIPLESTORE.RdfLib}]
+
+
+@pytest.fixture
+def models():
+    root = get_mustrd_root()
+    return (Graph().parse(root / "model/mustrdShapes.ttl"),
+            Graph().parse(root / "model/ontology.ttl"))
+
+
+@pytest.fixture
+def spec_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("MUSTRD_CACHE_DIR", str(tmp_path / "cache"))
+    specs = tmp_path / "specs"
+    shutil.copytree(SPECS, specs)
+    return specs
+
+
+def _validate(spec_dir, models):
+    uris, graph, invalid = validate_specs({"spec_path": spec_dir}, STORES, *models)
+    return (sorted(map(str, uris)), len(graph),
+            sorted((str(i.spec_uri), i.message) for i in invalid))
+
+
+def _forbid_validation(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("spec file was validated again")
+    monkeypatch.setattr(mustrd_module, "validate", fail)
+
+
+def test_second_run_is_served_from_the_cache(spec_dir, models, monkeypatch):
+    first = _validate(spec_dir, models)
+    assert any(message for _, message in first[2]), "expected some SHACL failures"
+
+    _forbid_validation(monkeypatch)
+    assert _validate(spec_dir, models) == first
+
+
+def test_an_edited_file_is_validated_again(spec_dir, models, monkeypatch):
+    _validate(spec_dir, models)
+    edited = sorted(spec_dir.glob("*.mustrd.ttl"))[0]
+    edited.write_text(edited.read_text() + "\n# edited\n")
+
+    validated = []
+    real = mustrd_module.validate
+    monkeypatch.setattr(mustrd_module, "validate",
+                        lambda graph, **kw: validated.append(graph) or real(graph, **kw))
+    _validate(spec_dir, models)
+    assert len(validated) == 1
+
+
+def test_the_cache_can_be_switched_off(spec_dir, models, monkeypatch):
+    monkeypatch.setenv("MUSTRD_CACHE_DIR", "off")
+    _validate(spec_dir, models)
+    assert not (spec_dir.parent / "cache").exists()
+
+
+def _entries(spec_dir):
+    return sorted((spec_dir.parent / "cache").rglob("*.*"))
+
+
+def test_entries_are_data_not_pickles(spec_dir, models):
+    _validate(spec_dir, models)
+    entries = _entries(spec_dir)
+    assert entries and all(entry.suffix == ".json" for entry in entries)
+    cached = json.loads(entries[0].read_text())
+    assert set(cached) == {"triples", "namespaces", "conforms", "messages"}
+    Graph().parse(data=cached["triples"], format="nt")
+
+
+def test_an_edited_file_replaces_its_entry(spec_dir, models):
+    _validate(spec_dir, models)
+    before = len(_entries(spec_dir))
+    edited = sorted(spec_dir.glob("*.mustrd.ttl"))[0]
+    edited.write_text(edited.read_text() + "\n# edited\n")
+    _validate(spec_dir, models)
+    assert len(_entries(spec_dir)) == before
+
+
+def test_entries_for_another_model_are_removed(spec_dir, models):
+    stale = spec_dir.parent / "cache" / "specs" / "0123456789abcdef" / "ab" / "old.pickle"
+    stale.parent.mkdir(parents=True)
+    stale.write_bytes(b"not for loading")
+    _validate(spec_dir, models)
+    assert not stale.parent.parent.exists()
+
+
+def test_a_failed_write_leaves_no_temporary_file(tmp_path, monkeypatch):
+    def broken(*args, **kwargs):
+        raise TypeError("not serializable")
+    monkeypatch.setattr(spec_cache.json, "dump", broken)
+    cache = spec_cache.SpecCache(tmp_path, "f" * 64)
+    with pytest.raises(TypeError):
+        cache.put(Path("a.mustrd.ttl"), b"content", Graph(), True, [])
+    assert not list(tmp_path.rglob("*.tmp"))
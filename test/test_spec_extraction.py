@@ -0,0 +1,78 @@
+"""Specs are built from the spec graph with direct triple lookups, not a SPARQL
+query per component (mustrd.spec_component)."""
+from pathlib import Path
+
+from rdflib import Graph, Literal, Variable
+from rdflib.namespace import Namespace
+
+from mustrd.mustrd import get_specs, validate_specs
+from mustrd.model_graphs import MUSTRD_ONTOLOGY, MUSTRD_SHAPES, model_graph
+from mustrd.namespace import MUST, TRIPLESTORE
+from mustrd.spec_component import (get_spec_from_statements, get_spec_from_table,
+                                   get_when_bindings, is_then_select_ordered)
+
+TEST_DATA = Namespace("https://semanticpartners.com/data/test/")
+STORE = {"type": TRIPLESTORE.RdfLib, "uri": TRIPLESTORE.RdfLib}
+
+SPEC = """
+    @prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .
+    @prefix sh: <http://www.w3.org/ns/shacl#> .
+    @prefix must: <https://mustrd.org/model/> .
+    @prefix test-data: <https://semanticpartners.com/data/test/> .
+
+    test-data:spec a must:TestSpec ;
+        must:given [ a must:StatementsDataset ;
+                     must:hasStatement [ a rdf:Statement ;
+                                         rdf:subject test-data:sub ;
+                                         rdf:predicate test-data:pred ;
+                                         rdf:object test-data:obj ] ] ;
+        must:when [ a must:TextSparqlSource ;
+                    must:queryText "select ?o { ?s ?p ?o }" ;
+                    must:queryType must:SelectSparql ;
+                    must:hasBinding [ must:variable "s" ; must:boundValue test-data:sub ] ] ;
+        must:then [ a must:TableDataset ;
+                    must:hasRow [ sh:order 2 ;
+                                  must:hasBinding [ must:variable "o" ; must:boundValue "second" ] ] ,
+                                [ sh:order 1 ;
+                                  must:hasBinding [ must:variable "o" ; must:boundValue "first" ] ] ] .
+
+    # Another spec in the same graph, which none of the lookups may pick up.
+    test-data:other a must:TestSpec ;
+        must:when [ a must:TextSparqlSource ;
+                    must:hasBinding [ must:variable "x" ; must:boundValue test-data:x ] ] ;
+        must:then [ a must:TableDataset ;
+                    must:hasRow [ must:hasBinding [ must:variable "o" ; must:boundValue "other" ] ] ] .
+"""
+
+
+def test_components_are_read_from_the_spec_alone():
+    spec_graph = Graph().parse(data=SPEC, format="ttl")
+    spec = TEST_DATA.spec
+
+    given = get_spec_from_statements(spec, MUST.given, spec_graph)
+    assert set(given) == {(TEST_DATA.sub, TEST_DATA.pred, TEST_DATA.obj)}
+    assert get_when_bindings(spec, spec_graph) == {Variable("s"): TEST_DATA.sub}
+    assert list(get_spec_from_table(spec, MUST.then, spec_graph)["o"]) == ["first", "second"]
+    assert is_then_select_ordered(spec, MUST.then, spec_graph)
+    assert not is_then_select_ordered(TEST_DATA.other, MUST.then, spec_graph)
+
+
+def test_a_table_with_an_unordered_row_is_unordered():
+    spec_graph = Graph().parse(data=SPEC, format="ttl")
+    row = next(spec_graph.objects(next(spec_graph.objects(TEST_DATA.spec, MUST.then)), MUST.hasRow))
+    spec_graph.remove((row, None, Literal(2)))
+    spec_graph.remove((row, None, Literal(1)))
+    assert not is_then_select_ordered(TEST_DATA.spec, MUST.then, spec_graph)
+
+
+def test_building_the_suite_runs_no_sparql(monkeypatch):
+    config = {"spec_path": Path("test/test-specs/expected-success"), "data_path": Path("test/data")}
+    uris, spec_graph, _ = validate_specs(config, [STORE], model_graph(MUSTRD_SHAPES),
+                                         model_graph(MUSTRD_ONTOLOGY))
+
+    def fail(self, *args, **kwargs):
+        raise AssertionError("spec graph queried with SPARQL")
+    monkeypatch.setattr(Graph, "query", fail)
+
+    specs, invalid = get_specs(uris, spec_graph, [STORE], config)
+    assert len(specs) > 10 and not invalid
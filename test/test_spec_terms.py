@@ -0,0 +1,85 @@
+"""One term extraction per spec for a whole report (mustrd/spec_terms.py)."""
+from unittest.mock import patch
+
+from rdflib import Graph
+
+from mustrd import spec_terms
+from mustrd.coverage import compute_coverage
+from mustrd.cq import cq_facts
+from mustrd.spec_terms import SpecTermIndex
+
+ONTO = """
+@prefix onto: <http://onto.org/> .
+@prefix owl:  <http://www.w3.org/2002/07/owl#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+onto:Place a owl:Class .
+onto:City a owl:Class ; rdfs:subClassOf onto:Place .
+onto:isLocatedIn a owl:ObjectProperty .
+"""
+
+DATA = """
+@prefix onto: <http://onto.org/> .
+@prefix ex:   <http://example.org/> .
+@prefix owl:  <http://www.w3.org/2002/07/owl#> .
+ex:Rotterdam a onto:City ; onto:isLocatedIn ex:NL .
+onto:Town a owl:Class .
+"""
+
+QUERY = "PREFIX onto: <http://onto.org/> SELECT ?c WHERE { ?x onto:isLocatedIn ?c }"
+
+
+def _graph(ttl):
+    return Graph().parse(data=ttl, format="turtle")
+
+
+def _spec(name, given, queries=(), given_fingerprint=None):
+    return {"name": name, "uri": f"http://ex/{name}", "passed": True,
+            "given": given, "given_fingerprint": given_fingerprint, "queries": list(queries)}
+
+
+def _cqdef(*specs):
+    return {"id": "http://ex/cq/cq", "name": "cq", "source_file": None,
+            "question": "Where is it?", "questions": ["Where is it?"],
+            "specs": list(specs), "missing_specs": []}
+
+
+def test_what_a_spec_references():
+    terms = SpecTermIndex().terms(_spec("a", _graph(DATA), [QUERY]))
+    assert {"http://onto.org/City", "http://onto.org/isLocatedIn"} <= terms.data
+    assert "http://onto.org/isLocatedIn" in terms.query
+    assert terms.domain_data == {"http://onto.org/City", "http://onto.org/isLocatedIn"}
+    assert [str(s) for s, _, _ in terms.tbox] == ["http://onto.org/Town"]
+
+
+def test_a_spec_with_no_given_references_only_its_queries():
+    terms = SpecTermIndex().terms(_spec("a", None, [QUERY, None]))
+    assert terms.data == frozenset() and terms.tbox == ()
+    assert "http://onto.org/isLocatedIn" in terms.domain_query
+
+
+def test_a_shared_given_is_scanned_once_per_report():
+    # Each spec parses its own copy of a shared given file; the fingerprint ties them.
+    specs = [_spec(f"s{n}.mustrd.ttl", _graph(DATA), [QUERY], given_fingerprint="given.ttl")
+             for n in range(5)]
+    index = SpecTermIndex()
+    with patch.object(spec_terms, "abox_terms", wraps=spec_terms.abox_terms) as scanned:
+        cov = compute_coverage(specs, ontology=_graph(ONTO), cq_defs=[_cqdef(*specs)], index=index)
+        cq_facts([_cqdef(*specs)], index)
+    assert scanned.call_count == 1
+    assert cov["covered"] >= 2
+
+
+def test_givens_without_a_fingerprint_are_scanned_per_graph():
+    shared = _graph(DATA)
+    specs = [_spec("a.mustrd.ttl", shared, [QUERY]), _spec("b.mustrd.ttl", shared, [QUERY]),
+             _spec("c.mustrd.ttl", _graph(DATA), [QUERY])]
+    with patch.object(spec_terms, "abox_terms", wraps=spec_terms.abox_terms) as scanned:
+        compute_coverage(specs, ontology=_graph(ONTO), index=SpecTermIndex())
+    assert scanned.call_count == 2
+
+
+def test_coverage_is_the_same_with_or_without_a_shared_index():
+    specs = [_spec("a.mustrd.ttl", _graph(DATA), [QUERY]), _spec("b.mustrd.ttl", None, [QUERY])]
+    fresh = compute_coverage(specs, ontology=_graph(ONTO), cq_defs=[_cqdef(specs[0])])
+    shared = compute_coverage(specs, ontology=_graph(ONTO), cq_defs=[_cqdef(specs[0])], index=SpecTermIndex())
+    assert fresh == shared
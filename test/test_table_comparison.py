@@ -0,0 +1,59 @@
+"""SELECT tables are compared as multisets of rows before any DataFrame diff is
+built (mustrd.mustrd._compare_results, calculate_row_difference)."""
+import pandas
+import pytest
+from rdflib import XSD
+
+from mustrd.mustrd import Specification, calculate_row_difference, compare_table_results
+from mustrd.namespace import MUST, TRIPLESTORE
+from mustrd.spec_component import TableThenSpec, WhenSpec
+
+STRING = str(XSD.string)
+
+
+def _table(rows):
+    return pandas.DataFrame([{"s": s, "s_datatype": STRING, "o": o, "o_datatype": STRING}
+                             for s, o in rows], dtype=object)
+
+
+def _spec(then_rows, query="SELECT ?s ?o { ?s ?p ?o }"):
+    return Specification(MUST.spec, {"type": TRIPLESTORE.RdfLib}, None,
+                         [WhenSpec(value=query, queryType=MUST.SelectSparql)],
+                         TableThenSpec(value=_table(then_rows)))
+
+
+@pytest.fixture
+def no_diffing(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("a passing table was diffed")
+    monkeypatch.setattr(pandas.DataFrame, "compare", fail)
+    monkeypatch.setattr(pandas.DataFrame, "merge", fail)
+
+
+def test_the_same_rows_in_another_order_pass_without_a_diff(no_diffing):
+    rows = [(f"s{i}", str(i % 7)) for i in range(1000)]
+    df_diff, _ = compare_table_results(_table(reversed(rows)), _spec(rows))
+    assert df_diff.empty
+
+
+def test_an_ordered_query_compares_rows_in_sequence():
+    rows = [("a", "1"), ("b", "2")]
+    spec = _spec(rows, "SELECT ?s ?o { ?s ?p ?o } ORDER BY ?s")
+    assert compare_table_results(_table(rows), spec)[0].empty
+    assert not compare_table_results(_table(reversed(rows)), spec)[0].empty
+
+
+def test_a_duplicated_row_is_not_the_same_table():
+    df_diff, _ = compare_table_results(_table([("a", "1"), ("a", "1")]),
+                                       _spec([("a", "1"), ("b", "2")]))
+    assert not df_diff.empty
+
+
+def test_row_difference_matches_a_left_merge():
+    df1 = pandas.DataFrame({"a": ["x", "x", "y", "z"]}, dtype=object)
+    df2 = pandas.DataFrame({"a": ["x", "x", "x"], "b": ["1", "2", "2"]}, dtype=object)
+
+    merged = df1.merge(df2.drop_duplicates(), how="left", indicator=True)
+    expected = merged[merged["_merge"] == "left_only"].drop("_merge", axis=1)
+
+    pandas.testing.assert_frame_equal(calculate_row_difference(df1, df2), expected)
@@ -32,6 +32,8 @@ from graph_util import graph_comparison_message
 from mustrd.namespace import MUST, TRIPLESTORE
 from mustrd.spec_component import parse_spec_component
 from mustrd.steprunner import run_when_impl
+from mustrd import diff_render
+from mustrd.diff_render import DiffLimits
 
 TEST_DATA = Namespace("https://semanticpartners.com/data/test/")
 
@@ -265,8 +267,9 @@ class TestRunUpdateSpec:
         expected_result = SpecPassed(spec_uri, self.triple_store["type"])
         assert then_result == expected_result
 
-    def test_insert_spec_fails_with_graph_comparison(self):
-
+    def test_insert_spec_fails_with_graph_comparison(self, monkeypatch):
+        # in_both is only built when it will be shown.
+        monkeypatch.setattr(diff_render, "_limits", DiffLimits(show_in_both=True))
         given = Graph().parse(data=self.given_sub_pred_obj, format="ttl")
         query = "insert { ?o ?p ?s } where {?s ?p ?o}"
         spec = f"""
@@ -390,8 +393,9 @@ class TestRunUpdateSpec:
         else:
             raise Exception(f"Unexpected result type {result_type}")
 
-    def test_insert_data_spec_fails_with_graph_comparison(self):
-
+    def test_insert_data_spec_fails_with_graph_comparison(self, monkeypatch):
+        # in_both is only built when it will be shown.
+        monkeypatch.setattr(diff_render, "_limits", DiffLimits(show_in_both=True))
         given = Graph().parse(data=self.given_sub_pred_obj, format="ttl")
         query = """PREFIX t:<https://semanticpartners.com/data/test/> insert data {t:subject t:predicate t:object}"""
 
@@ -0,0 +1,122 @@
+"""How a given is sent to a remote store (mustrd.upload)."""
+import gzip
+from unittest.mock import patch
+
+import pytest
+import requests
+from rdflib import BNode, Graph, Literal, RDF, URIRef
+
+from mustrd import mustrdAnzo, mustrdGraphDb
+from mustrd.mustrd import get_triple_stores
+from mustrd.namespace import TRIPLESTORE
+from mustrd.upload import given_chunks, ntriples, upload_requests
+
+EX = "http://ex/"
+GRAPHDB = {"type": TRIPLESTORE.GraphDb, "uri": "urn:store:gdb", "url": "http://localhost:7200",
+           "repository": "mustrd", "username": "u", "password": "p", "input_graph": None}
+
+
+def _given(size, bnode=False):
+    given = Graph()
+    for n in range(size):
+        given.add((URIRef(f"{EX}s{n}"), URIRef(EX + "p"), Literal(f"line\n{n}")))
+    if bnode:
+        given.add((BNode(), URIRef(EX + "p"), Literal(0)))
+    return given
+
+
+def _parsed(body: bytes, content_type: str) -> Graph:
+    return Graph().parse(data=body.decode("utf-8"),
+                         format="nt" if content_type == "application/n-triples" else "ttl")
+
+
+def test_by_default_a_given_is_one_turtle_put():
+    given = _given(5)
+    (method, body, headers), = upload_requests(GRAPHDB, given)
+    assert (method, headers) == ("put", {"Content-Type": "text/turtle"})
+    assert set(_parsed(body, headers["Content-Type"])) == set(given)
+
+
+def test_a_large_given_is_put_then_posted_in_ntriples_parts():
+    given = _given(25)
+    store = dict(GRAPHDB, upload_format=TRIPLESTORE.NTriples, upload_chunk_size=10)
+
+    requests_made = list(upload_requests(store, given))
+
+    assert [method for method, _, _ in requests_made] == ["put", "post", "post"]
+    uploaded = Graph()
+    for _, body, headers in requests_made:
+        assert headers == {"Content-Type": "application/n-triples"}
+        uploaded += _parsed(body, headers["Content-Type"])
+    assert set(uploaded) == set(given)
+
+
+def test_a_given_with_blank_nodes_is_never_split():
+    store = dict(GRAPHDB, upload_chunk_size=10)
+    assert len(list(given_chunks(store, _given(25, bnode=True)))) == 1
+    assert len(list(given_chunks(store, _given(25)))) == 3
+
+
+def test_a_gzipped_upload_says_so():
+    given = _given(5)
+    (_, body, headers), = upload_requests(dict(GRAPHDB, gzip_upload=True, upload_format=TRIPLESTORE.NTriples),
+                                          given)
+    assert headers["Content-Encoding"] == "gzip"
+    assert set(_parsed(gzip.decompress(body), headers["Content-Type"])) == set(given)
+
+
+class _FakeResponse:
+    status_code = 204
+    content = b""
+
+
+def test_graphdb_sends_every_part_to_the_input_graph():
+    calls = []
+
+    def send(method):
+        return lambda **kwargs: calls.append((method, kwargs["headers"])) or _FakeResponse()
+
+    store = dict(GRAPHDB, upload_format=TRIPLESTORE.NTriples, upload_chunk_size=2, gzip_upload=True)
+    with patch.object(requests.Session, "put", side_effect=send("put")), \
+            patch.object(requests.Session, "post", side_effect=send("post")):
+        mustrdGraphDb.upload_given(store, _given(5))
+
+    assert [method for method, _ in calls] == ["put", "post", "post"]
+    assert all(headers["Content-Encoding"] == "gzip" for _, headers in calls)
+
+
+def test_anzo_inserts_each_part_of_the_given():
+    queries = []
+    store = {"input_graph": "http://ex/input", "output_graph": "http://ex/output", "upload_chunk_size": 2}
+    with patch.object(mustrdAnzo, "query_azg", side_effect=lambda **kwargs: queries.append(kwargs["query"])):
+        mustrdAnzo.upload_given(store, _given(5))
+
+    inserts = [query for query in queries if query.startswith("INSERT DATA")]
+    assert len(inserts) == 3
+    assert all("graph <http://ex/input>" in query for query in inserts)
+
+
+def test_upload_settings_are_read_from_the_store_config():
+    store = URIRef("urn:store:gdb")
+    config = Graph()
+    config.add((store, RDF.type, TRIPLESTORE.GraphDb))
+    config.add((store, TRIPLESTORE.url, Literal("http://localhost:7200")))
+    config.add((store, TRIPLESTORE.repository, Literal("mustrd")))
+    config.add((store, TRIPLESTORE.uploadFormat, TRIPLESTORE.NTriples))
+    config.add((store, TRIPLESTORE.gzipUpload, Literal(True)))
+    config.add((store, TRIPLESTORE.uploadChunkSize, Literal(1000)))
+
+    triple_store = get_triple_stores(config)[0]
+
+    assert (triple_store["upload_format"], triple_store["gzip_upload"], triple_store["upload_chunk_size"]) == \
+        (TRIPLESTORE.NTriples, True, 1000)
+    config.set((store, TRIPLESTORE.uploadChunkSize, Literal(0)))
+    with pytest.raises(ValueError, match="not conform"):
+        get_triple_stores(config)
+
+
+def test_a_part_is_written_as_n_triples_a_parser_reads_back():
+    triples = [(URIRef(EX + "s"), URIRef(EX + "p"), Literal('a "quoted"\nline', lang="en")),
+               (URIRef(EX + "s"), URIRef(EX + "p"), Literal(1)),
+               (URIRef(EX + "s"), RDF.type, URIRef(EX + "C"))]
+    assert set(Graph().parse(data=ntriples(triples), format="nt")) == set(triples)
@@ -0,0 +1,96 @@
+"""pytest-xdist support in the plugin: specs are built once, on the controller,
+and the workers' results are merged back there for the reports.
+
+The hand-off and the merge are driven directly through the plugin's hooks; the
+last test runs a real `-n 2` session when pytest-xdist is installed.
+"""
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from rdflib import Graph
+
+from mustrd.mustrd import Specification
+from mustrd.mustrdTestPlugin import MustrdTestPlugin
+
+CONFIG = Path("test/test-mustrd-config/test_mustrd_simple.ttl")
+
+
+def _config(workerinput=None):
+    config = SimpleNamespace(args=[], getoption=lambda name: None)
+    if workerinput is not None:
+        config.workerinput = workerinput
+    return config
+
+
+def _controller_with_handoff():
+    controller = MustrdTestPlugin(None, CONFIG, None)
+    node = SimpleNamespace(config=_config(), workerinput={})
+    controller.pytest_configure_node(node)
+    return controller, node.workerinput
+
+
+def test_workers_load_the_specs_the_controller_built():
+    controller, workerinput = _controller_with_handoff()
+    try:
+        assert Path(workerinput["mustrd_specs"]).is_file()
+
+        worker = MustrdTestPlugin(None, CONFIG, None)
+        worker._generate_spec_groups = lambda path: pytest.fail("worker rebuilt the specs")
+        groups = worker.spec_groups(_config(workerinput), CONFIG)
+
+        expected = controller.spec_groups(_config(), CONFIG)
+        assert {str(k): [s.spec_uri for s in v] for k, v in groups.items()} == \
+            {str(k): [s.spec_uri for s in v] for k, v in expected.items()}
+        # The given survives the trip with its triples in the default graph,
+        # where an unqualified query finds them.
+        given = next(s.given for specs in groups.values() for s in specs
+                     if isinstance(s, Specification) and s.given is not None)
+        assert len(given.default_context) == len(given) > 0
+    finally:
+        controller._remove_spec_handoff()
+    assert not Path(workerinput["mustrd_specs"]).exists()
+
+
+def test_controller_merges_worker_reports_against_its_own_specs():
+    controller, _ = _controller_with_handoff()
+    controller._remove_spec_handoff()
+    (pytest_path, specs), = controller.spec_groups(_config(), CONFIG).items()
+
+    def report(when, outcome, index):
+        names = (specs[index].spec_file_name, str(pytest_path), CONFIG.name, False)
+        return SimpleNamespace(when=when, outcome=outcome, duration=0.1,
+                               user_properties=[("mustrd_result", names + ((str(pytest_path), index),))])
+
+    for r in (report("setup", "passed", 0), report("call", "passed", 0),
+              report("call", "failed", 1), report("teardown", "passed", 1)):
+        controller.pytest_runtest_logreport(r)
+
+    session = SimpleNamespace(results={})
+    test_results, all_specs, _, _, run_results = controller._collect_results(session)
+
+    assert [r.status for r in run_results] == ["passed", "failed"]
+    assert [r.spec_uri for r in run_results] == [str(specs[0].spec_uri), str(specs[1].spec_uri)]
+    assert all(r.test_type == "mustrd" for r in run_results)
+    assert [s["passed"] for s in all_specs] == [True, False]
+
+
+def test_a_distributed_run_reports_every_spec(tmp_path):
+    pytest.importorskip("xdist")
+    results = tmp_path / "results.ttl"
+    run = subprocess.run(
+        [sys.executable, "-m", "pytest", "-p", "no:cacheprovider", "-q", "-n", "2",
+         "--mustrd", f"--config={CONFIG}", f"--results-rdf={results}", str(CONFIG)],
+        capture_output=True, text=True)
+    serial = MustrdTestPlugin(None, CONFIG, None)
+    serial._read_selection(_config())
+    expected = sum(len(specs) for specs in serial.spec_groups(_config(), CONFIG).values())
+
+    assert results.is_file(), run.stdout[-2000:]
+    graph = Graph().parse(results)
+    recorded = graph.query("""
+        PREFIX cov: <https://mustrd.org/coverage/>
+        SELECT (COUNT(?r) AS ?n) WHERE { ?r a cov:TestResult ; cov:testType "mustrd" }""")
+    assert int(next(iter(recorded))[0]) == expected